@@ -0,0 +1,76 @@
+"""gunicorn settings for every deployment of this app (Render, Docker, local).
+
+gunicorn reads ``./gunicorn.conf.py`` on its own; ``python -m lib.serve``
+(the start command) names it anyway (``-c gunicorn.conf.py``) so nobody has
+to know that. Flags on the command line still win over anything here.
+
+The point of this file is ``preload_app``: the master imports ``run`` — docs
+compiled, pages registered, Dash's first-request setup paid — and the
+workers are forks that share all of it copy-on-write, instead of each
+building its own copy. See lib/prefork.py for what has to be restarted per
+worker and why. ``GUNICORN_PRELOAD=0`` goes back to building per worker
+(needed for ``--reload``, which cannot reload a preloaded app).
+
+This is the Flask build's server. lib.serve starts the ASGI backends under
+uvicorn or hypercorn instead; without a preloading master,
+lib.prefork.in_each_worker just runs its work at import, and each worker
+warms on its first ``/readyz``.
+"""
+import json
+import os
+from dataclasses import asdict
+
+from lib.serve import SERVER_PLAN_ENV, plan
+
+# Sized from the container's CPU and memory limits (lib/serve.py);
+# WEB_CONCURRENCY / WEB_THREADS override. `python -m lib.serve` passes the
+# same numbers as flags.
+_plan = plan("flask")
+bind = _plan.bind
+worker_class = _plan.worker_class
+workers = _plan.workers
+threads = _plan.threads
+timeout = 60
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+if preload_app:
+    # Set before gunicorn imports the app, so run.py defers per-worker
+    # threads to post_fork (lib.prefork.in_each_worker).
+    from lib.prefork import PRELOAD_ENV
+
+    os.environ[PRELOAD_ENV] = "1"
+
+
+def when_ready(server):
+    # What actually runs, command-line flags included, for /api/backend; the
+    # workers inherit it with the rest of the environment.
+    cfg = server.cfg
+    os.environ[SERVER_PLAN_ENV] = json.dumps(dict(
+        asdict(_plan), worker_class=cfg.worker_class_str, workers=cfg.workers,
+        threads=cfg.threads, bind=",".join(cfg.bind)))
+    # After the preload, before the first fork: anything built here is shared.
+    if not preload_app:
+        return
+    from lib import prefork
+
+    warmed = prefork.warm(server.app.wsgi())
+    prefork.freeze_shared_heap()
+    server.log.info("[boilerplate] preloaded app shared with workers "
+                    "(warm-up %s)", "done" if warmed else "skipped")
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from lib import prefork
+
+    prefork.worker_started()
+
+
+def worker_exit(server, worker):
+    # The tracker's atexit flush is inherited across the fork and would run
+    # at interpreter exit too; flushing here does not depend on gunicorn
+    # exiting the worker through sys.exit.
+    from lib.analytics_tracker import tracker
+
+    tracker.flush()
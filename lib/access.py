@@ -28,7 +28,12 @@ inheriting a gate it did not ask for.
 from __future__ import annotations
 
 import logging
-from typing import Optional
+import os
+import sys
+import threading
+from contextvars import ContextVar
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
 
 from lib import auth, hub_client, page_tiers, page_visibility
 
@@ -63,36 +68,166 @@ def llms_public(path: str) -> bool:
     return page_tiers.get_llms_public(path)
 
 
+# ---------------------------------------------------------------------------
+# The decision table
+# ---------------------------------------------------------------------------
+#
+# Everything above resolves a page from four ledgers — the board's
+# overrides, the frontmatter registrations, the hub ceiling and two env
+# defaults — and check()/resolve_page_access() used to redo that walk on
+# every request. The answer changes only when one of those inputs does, so
+# each page's decision is compiled once and the table is thrown away when
+# the ledgers' fingerprint moves: a version counter per ledger
+# (page_tiers.version, page_visibility.version) and the hub snapshot's
+# identity (hub_client returns the same dict until it fetches a new one).
+#
+# The env defaults are not in the fingerprint: an os.environ miss costs more
+# than the rest of the lookup together. A decision instead records which
+# defaults it actually read — only pages that neither registered a tier nor
+# pinned llms_public read any — and re-checks just those. Clerk's
+# availability is not an input either: both the raw and the degraded tier
+# are compiled, and the caller picks.
+
+
+class Decision(NamedTuple):
+    """One page's compiled access inputs."""
+
+    tier: str           # override-aware local tier under the hub ceiling
+    degraded: str       # what ``tier`` means with authentication unavailable
+    llms_public: bool   # the machine-surface axis, override-aware
+    window_open: bool   # check()'s llms_public exemption applies
+    env: tuple          # ((name, value), ...) of the env defaults read
+
+
+_TABLE: Dict[str, Decision] = {}
+_table_inputs: tuple = ()
+# Paths outside the registries (any URL can be asked about) are memoized
+# too, up to this many per table.
+_TABLE_MAX = 4096
+_table_lock = threading.Lock()
+
+
+def _table_fingerprint() -> tuple:
+    return (page_tiers.version(), page_visibility.version(), hub_client.hub_tiers())
+
+
+def _compile(path: str, ceiling: Dict[str, str]) -> Decision:
+    """The slow path: what the table holds for ``path``."""
+    hub_tier = page_tiers.ceiling_for(path, ceiling)
+    local = local_tier(path)
+    # The ceiling only ever RAISES: a board override can loosen a local
+    # declaration, never what the network restricted.
+    tier = page_tiers.more_restrictive(local, hub_tier) if hub_tier else local
+    machine = llms_public(path)
+    # Exempt ONLY a locally declared gate: when the hub's ceiling is what
+    # raised this page above public, the machine lane stays bound too.
+    window = (tier == "auth" and machine
+              and hub_tier not in ("auth", "admin", "hidden"))
+
+    env = []
+    tier_from_env = (
+        page_visibility.tier_override(path) is None
+        and not page_tiers.declares_tier(path)
+    ) or (hub_tier and hub_tier not in page_tiers.TIERS)  # ranked as the default
+    if tier_from_env:
+        env.append("PAGE_DEFAULT_TIER")
+    if page_visibility.llms_public_override(path) is None \
+            and not page_tiers.pins_llms_public(path):
+        env.append("LLMS_PUBLIC_DEFAULT")
+    return Decision(tier, page_tiers.degraded_tier(tier), machine, window,
+                    tuple((name, os.environ.get(name)) for name in env))
+
+
+def decision(path: str) -> Decision:
+    """``path``'s compiled :class:`Decision`, rebuilding the table first
+    when any input changed since it was built."""
+    global _TABLE, _table_inputs
+    # Read before building: a table built from inputs newer than its
+    # fingerprint is merely rebuilt once more, never served stale.
+    inputs = _table_fingerprint()
+    if inputs != _table_inputs:
+        ceiling = inputs[2]
+        with _table_lock:
+            if inputs != _table_inputs:
+                _TABLE = {p: _compile(p, ceiling) for p in page_tiers.registered()}
+                _table_inputs = inputs
+    table = _TABLE
+    found = table.get(path)
+    if found is None or any(os.environ.get(name) != value for name, value in found.env):
+        found = _compile(path, inputs[2])
+        if len(table) < _TABLE_MAX or path in table:
+            table[path] = found
+    return found
+
+
+def clear_decisions() -> None:
+    """Drop the table; the next lookup rebuilds it."""
+    global _table_inputs
+    _table_inputs = ()
+
+
 def _raw_tier(path: str) -> str:
     """Local tier (override-aware) with the hub's ceiling applied, no
-    degradation. The ceiling only ever RAISES: a board override can loosen a
-    local declaration, never what the network restricted."""
-    hub_tier = hub_client.hub_tiers().get(path)
-    local = local_tier(path)
-    return page_tiers.more_restrictive(local, hub_tier) if hub_tier else local
+    degradation."""
+    return decision(path).tier
+
+
+def identity_free_verdict(path: str) -> str | None:
+    """:func:`resolve_page_access`'s answer when it cannot depend on who is
+    asking, else None.
+
+    Public and hidden pages, and every page while Clerk is unconfigured, get
+    the same verdict for every visitor. Only a non-public page on a
+    Clerk-enabled deployment needs the request's identity — that is the None.
+    Callers with no request context to read identity from
+    (lib/page_snapshots answers navigations from in front of the framework)
+    use this to decide whether they may answer at all.
+    """
+    tier = _raw_tier(path)
+
+    if tier == "hidden":
+        return "hidden"
+    if tier == "public":
+        return "allow"
+
+    if not auth.clerk_enabled():
+        if tier == "admin":
+            return "allow" if auth.admin_access_open() else "forbidden"
+        return "allow"
+    return None
+
+
+# The ?key= of the current request where no framework request object can
+# be read from a policy callback — FastAPI. Set by the install_async
+# middleware; Flask and Quart are read directly.
+_REQUEST_KEY: ContextVar[Optional[str]] = ContextVar("access_request_key", default=None)
 
 
 def _request_key() -> str:
     """The ``?key=`` on the current request, or "". Never raises, never logs."""
+    key = _REQUEST_KEY.get()
+    if key is not None:
+        return key
     try:
-        from flask import request, has_request_context
-
-        if not has_request_context():
-            return ""
-        return (request.args.get("key") or "").strip()
+        # sys.modules, as in lib.auth: whichever framework serves is loaded.
+        for name in ("flask", "quart"):
+            framework = sys.modules.get(name)
+            if framework is not None and framework.has_request_context():
+                return (framework.request.args.get("key") or "").strip()
+        return ""
     except Exception:
         return ""
 
 
 def effective_tier(path: str) -> str:
     """This page's tier, with the hub ceiling applied and degradation handled."""
-    tier = _raw_tier(path)
+    compiled = decision(path)
     if not auth.clerk_enabled():
         # No way to identify anyone: everything except `hidden` falls open.
         # See lib/page_tiers.degraded_tier for why that is the right trade
         # for reading documentation, and why admin surfaces don't rely on it.
-        return page_tiers.degraded_tier(tier)
-    return tier
+        return compiled.degraded
+    return compiled.tier
 
 
 def check(path: str) -> str:
@@ -102,12 +237,50 @@ def check(path: str) -> str:
     it stays cheap: a dict lookup, and at most one cached hub call for the
     agent path.
     """
-    tier = effective_tier(path)
+    verdict, tier = _settle_locally(path)
+    if verdict is not None:
+        return verdict
+
+    # No session: an agent, or an anonymous browser. Only a key can help now.
+    key = _request_key()
+    if not key:
+        return "gated"
+    # An agent's first keyed fetch asks about every page it could fetch next
+    # under the same tier, in one round trip; the rest of its crawl is hits.
+    verdict = hub_client.cached_verdict(key, path)
+    # Siblings are a registry walk; not worth it for a batch that cannot go.
+    if verdict is None and hub_client.batch_ready():
+        verdict = hub_client.verify_many(key, _same_tier_siblings(path, tier)).get(path)
+    return verdict or hub_client.verify(key, path, tier)
+
+
+async def check_async(path: str, key: Optional[str] = None) -> str:
+    """:func:`check` for an event loop — same verdicts, same caches, and the
+    hub awaited rather than blocking the loop's thread."""
+    await hub_client.hub_tiers_async()
+    verdict, tier = _settle_locally(path)
+    if verdict is not None:
+        return verdict
+
+    key = _request_key() if key is None else key
+    if not key:
+        return "gated"
+    verdict = hub_client.cached_verdict(key, path)
+    if verdict is None and hub_client.batch_ready():
+        verdict = (await hub_client.verify_many_async(
+            key, _same_tier_siblings(path, tier))).get(path)
+    return verdict or await hub_client.verify_async(key, path, tier)
+
+
+def _settle_locally(path: str) -> Tuple[Optional[str], str]:
+    """(verdict, tier) — the verdict None when only a key can decide."""
+    compiled = decision(path)
+    tier = compiled.tier if auth.clerk_enabled() else compiled.degraded
 
     if tier == "hidden":
-        return "deny"
+        return "deny", tier
     if tier == "public":
-        return "allow"
+        return "allow", tier
 
     # The second axis: an `auth` page whose machine twin stays open. This is
     # the window posture — humans meet the sign-in card (resolve_page_access,
@@ -118,23 +291,28 @@ def check(path: str) -> str:
     # ONLY to a locally declared gate: when the hub's ceiling is what raised
     # this page above public, the machine lane must stay bound too — a
     # satellite's env default cannot loosen what the network restricted.
-    if tier == "auth" and llms_public(path):
-        hub_tier = hub_client.hub_tiers().get(path)
-        if hub_tier not in ("auth", "admin", "hidden"):
-            return "allow"
+    if tier == "auth" and compiled.window_open:
+        return "allow", tier
 
     # A signed-in reader in a browser. Resolved here, without the hub.
     user = auth.current_user()
     if user is not None:
         if tier == "admin":
-            return "allow" if auth.is_admin_user(user) else "gated"
-        return "allow"
+            return ("allow" if auth.is_admin_user(user) else "gated"), tier
+        return "allow", tier
+    return None, tier
 
-    # No session: an agent, or an anonymous browser. Only a key can help now.
-    key = _request_key()
-    if not key:
-        return "gated"
-    return hub_client.verify(key, path, tier)
+
+def _same_tier_siblings(path: str, tier: str) -> dict:
+    """``{path: tier}`` for ``path`` and every registered page a key would
+    be asked about under the same tier. A page the machine window already
+    opens never reaches the hub, so it is left out of the batch too."""
+    siblings = {path: tier}
+    for other in page_tiers.registered():
+        if other != path and effective_tier(other) == tier \
+                and not (tier == "auth" and decision(other).window_open):
+            siblings[other] = tier
+    return siblings
 
 
 def resolve_page_access(path: str) -> str:
@@ -155,22 +333,14 @@ def resolve_page_access(path: str) -> str:
     tier — not ``degraded_tier()``, which maps admin to public and would
     fall the wrong way here.
     """
-    tier = _raw_tier(path)
-
-    if tier == "hidden":
-        return "hidden"
-    if tier == "public":
-        return "allow"
-
-    if not auth.clerk_enabled():
-        if tier == "admin":
-            return "allow" if auth.admin_access_open() else "forbidden"
-        return "allow"
+    verdict = identity_free_verdict(path)
+    if verdict is not None:
+        return verdict
 
     user = auth.current_user()
     if user is None:
         return "sign_in"
-    if tier == "admin" and not auth.is_admin_user(user):
+    if _raw_tier(path) == "admin" and not auth.is_admin_user(user):
         return "forbidden"
     return "allow"
 
@@ -266,13 +436,14 @@ _sign_in_url = sign_in_url
 
 
 def gating_configured() -> bool:
-    """True when at least one page is not public.
+    """True when at least one page, or one section rule, is not public.
 
     A site whose pages are all public gains nothing from a per-request check
     and pays for it on every hot path, so the wiring stays off until a tier
     says otherwise.
     """
-    return any(tier != "public" for tier in page_tiers.registered().values())
+    return any(tier != "public" for tiers in (page_tiers.registered(), page_tiers.rules())
+               for tier in tiers.values())
 
 
 def configure(force: bool = False) -> bool:
@@ -287,9 +458,80 @@ def configure(force: bool = False) -> bool:
 
     configure_access(check, gate_doc=gate_doc, link_suffix=link_suffix)
     configure_viewer_identity(auth.viewer_identity)
+    # Fetch the hub's ceiling now, off the request path (lib/hub_client).
+    hub_client.prime_tiers()
     logger.info(
         "access control ON (clerk=%s, hub=%s)",
         auth.clerk_enabled(),
         hub_client.enabled(),
     )
     return True
+
+
+# ---------------------------------------------------------------------------
+# ASGI backends: keyed requests are verified on the event loop
+# ---------------------------------------------------------------------------
+# dash-improve-my-llms calls check() synchronously, from a worker thread on
+# FastAPI and Quart, so a keyed fetch whose verdict is not cached would hold
+# that thread for a hub round trip. In front of the package, the middleware
+# below runs check_async for the requested page on the loop; the verdicts it
+# obtains (the page and its same-tier siblings, in one batch) land in the
+# shared cache, and the package's check() a moment later is a hit. It also
+# hands the key to check() on FastAPI, whose policy callbacks have no request
+# to read it from.
+
+
+def _page_of(url_path: str) -> str:
+    """The page a machine-lane URL is about: ``/guide/llms.txt`` -> ``/guide``."""
+    if url_path.endswith("/llms.txt") and url_path != "/llms.txt":
+        url_path = url_path[: -len("/llms.txt")]
+    return url_path.rstrip("/") or "/"
+
+
+def _credential_headers(scope) -> dict:
+    """The two headers :func:`auth.carries_credentials` reads, decoded."""
+    return {name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers") or ()
+            if name in (b"authorization", b"cookie")}
+
+
+class _AsyncKeyCheck:
+    """Pure-ASGI middleware: verify a request's ``?key=`` without a thread."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        query = scope.get("query_string") or b""
+        if scope["type"] != "http" or b"key=" not in query:
+            return await self.app(scope, receive, send)
+        key = (parse_qs(query.decode("latin-1")).get("key") or [""])[0].strip()
+        token = _REQUEST_KEY.set(key)
+        try:
+            # This runs outside every request scope, where current_user()
+            # sees nobody: a signed-in reader with ?key= would buy a hub
+            # batch that check() then settles locally. Session credentials
+            # present -> leave it to check(), which has the request.
+            if key and hub_client.enabled() and not auth.carries_credentials(
+                    _credential_headers(scope)):
+                try:
+                    await check_async(_page_of(scope.get("path") or "/"), key)
+                except Exception:  # noqa: BLE001 — check() decides, with its own fail-safe
+                    logger.debug("async key check failed", exc_info=True)
+            return await self.app(scope, receive, send)
+        finally:
+            _REQUEST_KEY.reset(token)
+
+
+def install_async(app, backend_info) -> bool:
+    """Put :class:`_AsyncKeyCheck` in front of an ASGI backend; True when
+    installed. The Flask backend has no loop to spare and needs nothing."""
+    if not backend_info.is_async:
+        return False
+    if backend_info.name == "fastapi":
+        app.server.add_middleware(_AsyncKeyCheck)
+        return True
+    if not hasattr(app.server, "asgi_app"):  # pragma: no cover - old Quart
+        return False
+    app.server.asgi_app = _AsyncKeyCheck(app.server.asgi_app)
+    return True
@@ -45,6 +45,8 @@ import dash_mantine_components as dmc
 from dash import MATCH, Input, Output, callback, clientside_callback, dcc, html, no_update
 from dash_iconify import DashIconify
 
+from lib import request_timing
+
 logger = logging.getLogger(__name__)
 
 AD_SERVER_URL = os.environ.get("AD_SERVER_URL", "https://2plot.dev").rstrip("/")
@@ -76,6 +78,18 @@ _breaker_lock = threading.Lock()
 _last_failure = 0.0
 
 
+def _reset_after_fork() -> None:
+    # A pooled connection opened before a fork would be one socket shared by
+    # every worker, their requests and responses interleaved on it.
+    global _session, _breaker_lock
+    _session = requests.Session()
+    _breaker_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 def fetch_ad(page: str) -> dict | None:
     """GET one campaign from the ad server; None on any failure.
 
@@ -91,18 +105,19 @@ def fetch_ad(page: str) -> dict | None:
     from lib.constants import internal_ua
 
     try:
-        resp = _session.get(
-            f"{AD_SERVER_URL}/api/ad-network/serve",
-            params={"app": APP_ID, "page": page},
-            timeout=_TIMEOUT,
-            # The highest-volume outbound call this app makes — one per docs
-            # page view, server-to-server. Without the internal-traffic token
-            # every one of them reached 2plot.dev as `python-requests/2.x`,
-            # which its tracker classifies as a bot: this satellite's readers
-            # were being counted as crawler traffic on the hub. See
-            # lib/constants.INTERNAL_UA.
-            headers={"User-Agent": internal_ua("ad-client")},
-        )
+        with request_timing.timed("ad-fetch"):
+            resp = _session.get(
+                f"{AD_SERVER_URL}/api/ad-network/serve",
+                params={"app": APP_ID, "page": page},
+                timeout=_TIMEOUT,
+                # The highest-volume outbound call this app makes — one per docs
+                # page view, server-to-server. Without the internal-traffic token
+                # every one of them reached 2plot.dev as `python-requests/2.x`,
+                # which its tracker classifies as a bot: this satellite's readers
+                # were being counted as crawler traffic on the hub. See
+                # lib/constants.INTERNAL_UA.
+                headers={"User-Agent": internal_ua("ad-client")},
+            )
         if resp.status_code == 200 and resp.content:
             return resp.json()
         return None  # 204 = nothing to serve; not a failure
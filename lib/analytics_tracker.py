@@ -31,17 +31,21 @@ Accuracy notes (these are the things that quietly wreck the numbers):
   silently overwrite each other's hits. The buffer keeps a docs site from
   rewriting the whole file on every request, and retention keeps it bounded.
 """
+import asyncio
 import atexit
 import json
 import os
 import threading
 import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import lru_cache
 
 import requests
 
+from lib import path_kinds, request_timing
+
 try:  # POSIX only — Windows dev boxes just run without the cross-process lock
     import fcntl
 except ImportError:  # pragma: no cover
@@ -62,6 +66,11 @@ FLUSH_INTERVAL_S = float(os.getenv("ANALYTICS_FLUSH_INTERVAL_S", "30"))
 RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "45"))
 MAX_VISITS = int(os.getenv("ANALYTICS_MAX_VISITS", "20000"))
 
+# Hits an event loop may hold for the tracker before it starts dropping them
+# (see AsyncTrackerFront). Far above any real backlog — the drain runs
+# between requests — so a drop means the loop itself is starved.
+ASYNC_QUEUE_MAX = int(os.getenv("ANALYTICS_QUEUE_MAX", "1024"))
+
 _IP_HEADERS = (
     "cf-connecting-ip",     # Cloudflare
     "true-client-ip",       # Cloudflare Enterprise / Akamai
@@ -71,6 +80,14 @@ _IP_HEADERS = (
 
 _PRIVATE_PREFIXES = ('10.', '172.', '192.168.', 'fe80:', 'fc00:', 'fd00:')
 
+# Every header ``track_visit`` reads. A front end that has raw header bytes
+# (lib/asgi_middleware) copies these and nothing else.
+HEADERS_READ = ("user-agent",) + _IP_HEADERS + ("cf-ipcountry",)
+
+# What reaches the ledger: pages, and the machine surfaces the rollup
+# reports as agent hits. Everything else is machinery (lib/path_kinds).
+RECORDED_KINDS = (path_kinds.PAGE, path_kinds.AGENT_SURFACE)
+
 
 def analytics_path() -> Path:
     """Resolve the ledger path (env override, else repo root).
@@ -82,10 +99,45 @@ def analytics_path() -> Path:
                 or _REPO_ROOT / "visitor_analytics.json")
 
 
+def is_tracked_path(path) -> bool:
+    """Whether a hit on ``path`` could reach the ledger at all.
+
+    Decided from the path alone, so a front end can drop an asset request
+    before it copies a single header.
+    """
+    return path_kinds.classify(path) in RECORDED_KINDS
+
+
+class LowercaseHeaders(dict):
+    """Header names already lowercase — what the edge middlewares hand over.
+
+    ``_lower_headers`` passes one through untouched, so a hit from
+    lib/wsgi_middleware or lib/asgi_middleware is never copied again.
+    """
+
+
+# HEADERS_READ as WSGI environ keys: `x-forwarded-for` -> HTTP_X_FORWARDED_FOR.
+_ENVIRON_KEYS = tuple((name, "HTTP_" + name.upper().replace("-", "_"))
+                      for name in HEADERS_READ)
+
+
+def environ_headers(environ) -> LowercaseHeaders:
+    """The headers ``track_visit`` reads, straight from a WSGI environ —
+    a lookup each, without building Werkzeug's header view of the rest."""
+    found = LowercaseHeaders()
+    for name, key in _ENVIRON_KEYS:
+        value = environ.get(key)
+        if value is not None:
+            found[name] = value
+    return found
+
+
 def _lower_headers(headers) -> dict:
     """Normalise any header mapping (Flask, Starlette, dict) to lowercase."""
     if not headers:
         return {}
+    if type(headers) is LowercaseHeaders:
+        return headers
     try:
         return {str(k).lower(): v for k, v in headers.items()}
     except Exception:
@@ -286,7 +338,15 @@ class AnalyticsTracker:
 
         ``headers`` is optional but strongly recommended — it's what makes the
         client IP and country correct behind a proxy. See ``client_ip``.
+
+        Blocking when it trips a flush. On an event loop use ``async_front``.
         """
+        visit_data = self.visit_record(path, user_agent, ip_address, headers)
+        if visit_data is not None and self.buffer_hit(visit_data):
+            self.flush()
+
+    def visit_record(self, path, user_agent, ip_address=None, headers=None):
+        """The ledger row for a hit, or ``None`` when it is not a visit."""
         # --- The network's internal-traffic contract, applied at WRITE time --
         #
         # https://2plot.ai/docs/satellite-analytics, "Internal traffic": a
@@ -309,22 +369,7 @@ class AnalyticsTracker:
         if INTERNAL_UA_TOKEN in (user_agent or "").lower():
             return
 
-        # Skip internal Dash paths and static assets. `/healthz` and `/health`
-        # are here too: the hub sweeps /healthz hourly and Render's own probe
-        # hits it far more often than that, so storing it turns the ledger into
-        # a record of monitoring. lib/traffic_rollup also drops it at read time
-        # — that stays, for ledgers written before this rule existed.
-        skip_paths = [
-            '.css', '.js', '.png', '.jpg', '.ico', '.svg', '.woff', '.woff2', '.ttf', '.eot',
-            '_dash', '_reload-hash', 'favicon', '/_dash-update-component',
-            '/_dash-layout', '/_dash-dependencies', '/_dash-component-suites',
-            '/assets/', '/healthz', '/health', '[]'  # Also skip malformed paths
-        ]
-        if any(skip in path for skip in skip_paths):
-            return
-
-        # Only track valid paths that start with /
-        if not path or not path.startswith('/') or path.startswith('//'):
+        if not is_tracked_path(path):
             return
 
         device_type = self.detect_device_type(user_agent)
@@ -357,12 +402,14 @@ class AnalyticsTracker:
                 # hits disk (the marker never survives into the ledger).
                 visit_data["_geo_pending"] = ip_address
 
+        return visit_data
+
+    def buffer_hit(self, visit_data) -> bool:
+        """Hold a row for the next flush; True when that flush is due."""
         with self._buffer_lock:
             self._buffer.append(visit_data)
-            due = (len(self._buffer) >= FLUSH_EVERY
-                   or (time.time() - self._last_flush) >= FLUSH_INTERVAL_S)
-        if due:
-            self.flush()
+            return (len(self._buffer) >= FLUSH_EVERY
+                    or (time.time() - self._last_flush) >= FLUSH_INTERVAL_S)
 
     # ------------------------------------------------------------------ disk --
 
@@ -379,7 +426,8 @@ class AnalyticsTracker:
             return
         try:
             self._backfill_geo(pending)
-            self._write(pending)
+            with request_timing.timed("analytics-flush"):
+                self._write(pending)
         except Exception:
             # Never lose the app over analytics; put the hits back so the next
             # flush can retry them.
@@ -456,5 +504,123 @@ def _prune(visits):
     return visits
 
 
+class AsyncTrackerFront:
+    """The tracker as an event loop sees it (FastAPI and Quart).
+
+    ``track_visit`` is fine on a Flask worker thread and wrong on a loop: the
+    hit that trips a flush holds the whole worker — every connection it is
+    serving — through an ``flock``, a full ledger read and a full rewrite.
+
+    Here a request only ``put_nowait``s its hit on a bounded per-loop queue.
+    A drain task classifies and buffers hits between requests, and a due
+    flush goes to a dedicated single-thread executor; one already running
+    absorbs the next (``coalesced``). A full queue drops the hit rather than
+    make a request wait: a docs site can lose a page view, not a response.
+    ``stats()`` reports those counters, for a health probe or a shell.
+
+    Cancelling the drain (``asyncio.run`` and uvicorn both do at shutdown)
+    buffers whatever is still queued, and the tracker's ``atexit`` flush
+    writes it.
+    """
+
+    def __init__(self, tracker, maxsize=None):
+        self.tracker = tracker
+        self.maxsize = ASYNC_QUEUE_MAX if maxsize is None else maxsize
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._queues = {}           # loop -> asyncio.Queue (its drain holds it)
+        self._executor = None
+        self._flushing = None       # concurrent.futures.Future of the last flush
+        self._counts = {"accepted": 0, "dropped": 0, "max_depth": 0,
+                        "flushes": 0, "coalesced": 0}
+
+    def submit(self, path, user_agent, ip_address=None, headers=None) -> bool:
+        """Queue a hit from the running loop; False when it was dropped."""
+        queue = self._queue()
+        try:
+            queue.put_nowait((path, user_agent, ip_address, headers))
+        except asyncio.QueueFull:
+            with self._lock:
+                self._counts["dropped"] += 1
+            return False
+        depth = queue.qsize()
+        with self._lock:
+            self._counts["accepted"] += 1
+            if depth > self._counts["max_depth"]:
+                self._counts["max_depth"] = depth
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            counts["depth"] = sum(q.qsize() for q in self._queues.values())
+            counts["flushing"] = bool(self._flushing and not self._flushing.done())
+        return counts
+
+    def _queue(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queue = self._queues.get(loop)
+            if queue is None:
+                queue = self._queues[loop] = asyncio.Queue(self.maxsize)
+                loop.create_task(self._drain(loop, queue))
+        return queue
+
+    async def _drain(self, loop, queue):
+        try:
+            while True:
+                self._take(await queue.get(), loop)
+        finally:
+            while not queue.empty():
+                self._take(queue.get_nowait(), None)
+            with self._lock:
+                if self._queues.get(loop) is queue:
+                    del self._queues[loop]
+
+    def _take(self, hit, loop):
+        path, user_agent, ip_address, headers = hit
+        try:
+            visit_data = self.tracker.visit_record(path, user_agent,
+                                                   ip_address, headers)
+            if visit_data is not None and self.tracker.buffer_hit(visit_data) \
+                    and loop is not None:
+                self._flush_in_background()
+        except Exception:
+            pass
+
+    def _flush_in_background(self):
+        with self._lock:
+            if self._flushing is not None and not self._flushing.done():
+                self._counts["coalesced"] += 1
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="analytics-flush")
+            self._counts["flushes"] += 1
+            self._flushing = self._executor.submit(self.tracker.flush)
+
+
 # Global tracker instance
 tracker = AnalyticsTracker()
+async_front = AsyncTrackerFront(tracker)
+
+
+def _reset_after_fork() -> None:
+    # A forked worker (gunicorn preload_app) inherits neither the flush
+    # thread nor the parent's loops, nor the geolocation threads its in-flight
+    # set is waiting on. The copied buffer stays the parent's to flush: kept,
+    # it would land in the ledger once per worker.
+    global _geo_lock
+    _geo_lock = threading.Lock()
+    _geo_inflight.clear()
+    tracker._buffer_lock = threading.Lock()
+    tracker._buffer = []
+    tracker._last_flush = time.time()
+    async_front._lock = threading.Lock()
+    async_front._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,42 +1,118 @@
 """
-ASGI/Starlette middleware ports of Flask-only hooks used in this boilerplate.
+ASGI middleware ports of Flask-only hooks used in this boilerplate.
 
-When the Dash backend is FastAPI, these slot in where the Flask
-``before_request`` decorator was used.
+When the Dash backend is FastAPI or Quart, these slot in where Flask uses
+``wsgi_app`` wrappers (lib/wsgi_middleware, lib/proxy).
+
+Everything this app does at the edge of a request is ONE raw ASGI callable,
+:class:`EdgeMiddleware`: the forwarded-scheme fix (lib/proxy), the analytics
+hand-off and request timing. As separate layers, the proxy fix decoded
+every header into a fresh dict of strings to read one of them, and then the
+tracker decoded them again. Fused, the raw header list is scanned once, and
+only the few values actually used are decoded.
+
+It is not a Starlette ``BaseHTTPMiddleware`` subclass. That runs the app in a
+separate task and re-streams its response through a memory channel — for
+every request, including the static assets and Dash internals that
+analytics discards on sight — and ``dispatch`` needs a ``Request`` built
+before it can even look at the path. Here the path is read straight off the
+scope, and an asset request with the scheme fix off costs one memoized
+classification and nothing else.
 """
 from __future__ import annotations
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from time import perf_counter
+
+from lib import path_kinds, proxy, request_timing
+from lib.analytics_tracker import (
+    HEADERS_READ,
+    RECORDED_KINDS,
+    LowercaseHeaders,
+    async_front,
+)
 
-from lib.analytics_tracker import tracker
+# ASGI header names arrive lowercased, as bytes.
+_WANTED = frozenset(name.encode("latin-1") for name in HEADERS_READ)
+_FORWARDED_PROTO = b"x-forwarded-proto"
+_FORWARDED_SSL = b"x-forwarded-ssl"
 
 
-class AnalyticsMiddleware(BaseHTTPMiddleware):
-    """Track every request through the analytics tracker.
+class EdgeMiddleware:
+    """Fix the scheme, hand the hit to analytics, time the request.
 
-    Mirrors the Flask ``before_request`` shim in ``run.py``. Failures are
-    silently swallowed — analytics should never block a real response.
+    Mirrors lib/wsgi_middleware and lib/proxy's ``wsgi_app`` wrappers on
+    Flask. Failures in the analytics half are silently
+    swallowed — analytics should never block a real response.
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app, fix_scheme: bool = False):
+        self.app = app
+        self.fix_scheme = fix_scheme
+
+    async def __call__(self, scope, receive, send):
+        # Lifespan and websocket scopes carry nothing worth rewriting or
+        # counting; touching them risks breaking startup for no gain.
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = perf_counter()
+        path = scope.get("path") or ""
+        kind = path_kinds.classify(path)
+        tracked = kind in RECORDED_KINDS
+        if tracked or self.fix_scheme:
+            scope = self._read_headers(scope, path, tracked)
         try:
-            client = request.client
-            ip = client.host if client else None
+            await self.app(scope, receive, send)
+        finally:
+            request_timing.record(kind, perf_counter() - started)
+
+    def _read_headers(self, scope, path: str, tracked: bool):
+        # One pass over the raw list. A repeated header keeps its first value:
+        # the client's hop for the forwarding headers, and what the tracker
+        # would have read for the rest.
+        proto = ssl = None
+        headers = LowercaseHeaders()
+        for name, value in scope.get("headers") or ():
+            if name == _FORWARDED_PROTO:
+                if proto is None:
+                    proto = value.decode("latin-1")
+            elif name == _FORWARDED_SSL:
+                if ssl is None:
+                    ssl = value.decode("latin-1")
+            if tracked and name in _WANTED:
+                headers.setdefault(name.decode("latin-1"), value.decode("latin-1"))
+
+        if self.fix_scheme:
+            scheme = proxy.forwarded_scheme(proto, ssl)
+            if scheme and scheme != scope.get("scheme"):
+                scope = dict(scope)
+                scope["scheme"] = scheme
+
+        if tracked:
             # Headers carry the real client IP/country behind a proxy or CDN;
-            # request.client is the last hop (the proxy) in production.
-            tracker.track_visit(
-                request.url.path,
-                request.headers.get("user-agent", ""),
-                ip,
-                headers=dict(request.headers),
-            )
-        except Exception:
-            pass
-        return await call_next(request)
-
-
-def register_asgi_middleware(app) -> None:
-    """Attach all ASGI middleware to ``app.server`` (a FastAPI instance)."""
-    app.server.add_middleware(AnalyticsMiddleware)
+            # the scope's client is the last hop (the proxy) in production.
+            # Queued, never written here: a flush on the loop would stall
+            # every connection this worker holds (AsyncTrackerFront).
+            try:
+                client = scope.get("client")
+                async_front.submit(
+                    path,
+                    headers.get("user-agent", ""),
+                    client[0] if client else None,
+                    headers=headers,
+                )
+            except Exception:
+                pass
+        return scope
+
+
+def register_asgi_middleware(app, fix_scheme: bool = False) -> None:
+    """Attach the edge middleware to ``app.server`` (FastAPI or Quart).
+
+    ``fix_scheme`` carries lib/proxy's decision (``proxy.enabled()``); the
+    scheme fix is installed here, fused, rather than by ``proxy.apply``.
+    """
+    server = app.server
+    if hasattr(server, "add_middleware"):
+        server.add_middleware(EdgeMiddleware, fix_scheme=fix_scheme)
+    else:
+        server.asgi_app = EdgeMiddleware(server.asgi_app, fix_scheme=fix_scheme)
@@ -8,31 +8,58 @@ This module only carries the **showcase** surfaces that demonstrate
 first-class OpenAPI integration under Dash 4.1+'s FastAPI backend:
 
 - ``/healthz``       — liveness probe
-- ``/api/backend``   — active backend info
-- ``/api/pages``     — registered Dash pages, sortable list
+- ``/api/backend``   — active backend info, and the server lib.serve chose
+- ``/api/pages``     — registered Dash pages, sorted by path, with
+  ``limit``/``offset``/``category`` and an ``ETag``
 
 These show up in Swagger UI at ``/docs`` and ReDoc at ``/redoc`` because
 each route declares a Pydantic ``response_model``.
+
+``/api/pages`` is what the showcase's stress test points browsers at, so it
+is built like a hot path: the models are constructed, validated and sorted
+once per registry state (:class:`_PageIndex`), and each distinct query's
+body is serialized once, with the ETag that a repeat caller sends back for a
+304. The declared models still drive the schema; they no longer run per
+request.
 """
 from __future__ import annotations
 
-from typing import List, Optional
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
 
 import dash
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, Header, Query, Response
 from pydantic import BaseModel, Field
 
+from lib.health import health_body
+from lib.serve import backend_payload
+
 
 # ---------------------------------------------------------------------------
 # Pydantic models — these power the OpenAPI schema at /docs
 # ---------------------------------------------------------------------------
 
 
+class ServerPlanModel(BaseModel):
+    backend: str
+    server: str = Field(..., description="gunicorn, uvicorn or hypercorn")
+    worker_class: str
+    workers: int
+    threads: int
+    bind: str
+    cpus: float = Field(..., description="CPUs available when sized (cgroup-aware)")
+    memory_mb: Optional[int] = None
+
+
 class BackendInfoModel(BaseModel):
     name: str = Field(..., description="Active backend identifier")
     label: str = Field(..., description="Human-readable backend label")
     is_async: bool = Field(..., description="True for ASGI backends (fastapi, quart)")
     description: str
+    server: Optional[ServerPlanModel] = Field(
+        None, description="How lib.serve started this process; null otherwise")
 
 
 class PageSummary(BaseModel):
@@ -41,11 +68,15 @@ class PageSummary(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     icon: Optional[str] = None
+    category: Optional[str] = None
 
 
 class PageListResponse(BaseModel):
     backend: str
-    count: int
+    count: int = Field(..., description="Pages in this response")
+    total: int = Field(..., description="Pages matching the filter, before paging")
+    offset: int = 0
+    limit: Optional[int] = None
     pages: List[PageSummary]
 
 
@@ -53,6 +84,88 @@ class HealthResponse(BaseModel):
     ok: bool = True
     backend: str
     dash_version: str
+    build: Optional[str] = Field(
+        None, description="Commit the running instance was built from, when known")
+
+
+# ---------------------------------------------------------------------------
+# /api/pages — built once per registry state
+# ---------------------------------------------------------------------------
+
+# Distinct (category, limit, offset) bodies kept per registry state. The
+# query is client-chosen, so the memo is bounded; real callers use a few.
+_BODY_MEMO_MAX = 256
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class _PageIndex:
+    """The sorted page summaries, rebuilt only when the registry changes.
+
+    The registry is keyed by page module and only grows during registration,
+    so its key tuple is the change signal: comparing a dozen strings per call
+    instead of constructing and validating a dozen models.
+    """
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._key: Optional[tuple] = None
+        self._pages: List[dict] = []
+        self._bodies: Dict[tuple, Tuple[bytes, str]] = {}
+
+    def _current(self) -> Tuple[List[dict], Dict[tuple, Tuple[bytes, str]]]:
+        key = tuple(dash.page_registry)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    summaries = sorted(
+                        (PageSummary(
+                            name=p.get("name"),
+                            path=p.get("path"),
+                            title=p.get("title"),
+                            description=p.get("description"),
+                            icon=p.get("icon"),
+                            category=p.get("category"),
+                        ) for p in dash.page_registry.values()),
+                        key=lambda x: x.path,
+                    )
+                    self._pages = [page.model_dump() for page in summaries]
+                    self._bodies = {}
+                    self._key = key
+        return self._pages, self._bodies
+
+    def body(self, category: Optional[str], limit: Optional[int],
+             offset: int) -> Tuple[bytes, str]:
+        """``(json bytes, quoted ETag)`` for one query."""
+        pages, bodies = self._current()
+        query = (category, limit, offset)
+        hit = bodies.get(query)
+        if hit is not None:
+            return hit
+        matching = (pages if category is None
+                    else [p for p in pages if p["category"] == category])
+        window = matching[offset:None if limit is None else offset + limit]
+        body = json.dumps({
+            "backend": self.backend, "count": len(window),
+            "total": len(matching), "offset": offset, "limit": limit,
+            "pages": window,
+        }, separators=(",", ":")).encode()
+        hit = (body, '"%s"' % hashlib.sha1(body).hexdigest()[:20])
+        if len(bodies) >= _BODY_MEMO_MAX:
+            bodies.clear()
+        bodies[query] = hit
+        return hit
 
 
 # ---------------------------------------------------------------------------
@@ -66,33 +179,29 @@ def build_api_router(app, backend_info) -> APIRouter:
 
     @router.get("/backend", response_model=BackendInfoModel, summary="Active backend")
     def get_backend() -> BackendInfoModel:
-        return BackendInfoModel(
-            name=backend_info.name,
-            label=backend_info.label,
-            is_async=backend_info.is_async,
-            description=backend_info.description,
-        )
+        return BackendInfoModel(**backend_payload(backend_info))
+
+    index = _PageIndex(backend_info.name)
 
     @router.get(
         "/pages",
         response_model=PageListResponse,
         summary="Registered Dash pages",
+        responses={304: {"description": "Unchanged since the ETag sent"}},
     )
-    def list_pages() -> PageListResponse:
-        pages: List[PageSummary] = []
-        for p in dash.page_registry.values():
-            pages.append(PageSummary(
-                name=p.get("name"),
-                path=p.get("path"),
-                title=p.get("title"),
-                description=p.get("description"),
-                icon=p.get("icon"),
-            ))
-        return PageListResponse(
-            backend=backend_info.name,
-            count=len(pages),
-            pages=sorted(pages, key=lambda x: x.path),
-        )
+    def list_pages(
+        limit: Optional[int] = Query(None, ge=1, le=500),
+        offset: int = Query(0, ge=0),
+        category: Optional[str] = Query(None, description="Exact category match"),
+        if_none_match: Optional[str] = Header(None),
+    ) -> Response:
+        body, etag = index.body(category, limit, offset)
+        # no-cache, not no-store: keep it, but ask — the 304 is the cheap path.
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json",
+                        headers=headers)
 
     return router
 
@@ -100,13 +209,15 @@ def build_api_router(app, backend_info) -> APIRouter:
 def build_health_router() -> APIRouter:
     router = APIRouter(tags=["health"])
 
+    # Declared for the schema at /docs; the body is lib/health's bytes,
+    # serialized once, not a model validated per probe. In a running app
+    # lib.health.install_health_front answers before this route is reached.
+    body = health_body("fastapi")
+
     @router.get("/healthz", response_model=HealthResponse, summary="Liveness probe")
-    def healthz() -> HealthResponse:
-        return HealthResponse(
-            ok=True,
-            backend="fastapi",
-            dash_version=dash.__version__,
-        )
+    def healthz() -> Response:
+        return Response(content=body, media_type="application/json",
+                        headers={"Cache-Control": "no-store"})
 
     return router
 
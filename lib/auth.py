@@ -51,7 +51,16 @@ must have run first, and the tests blank env vars per process.
 
 from __future__ import annotations
 
+import base64
+import hashlib
+import json
 import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import lru_cache
 from urllib.parse import urlparse
 
 from lib.constants import BASE_URL
@@ -95,16 +104,507 @@ def clerk_enabled() -> bool:
         return False
 
 
+# ---------------------------------------------------------------------------
+# Request-scoped identity
+# ---------------------------------------------------------------------------
+# One request asks who its viewer is several times over — access.check,
+# resolve_page_access, viewer_identity, the control board's layout and its
+# callback — and every ask used to re-read and re-validate the session. The
+# answer is memoized for the rest of the request in whatever scope the
+# backend gives a request: Flask's and Quart's ``g``, and under FastAPI a
+# context variable that install_request_scope's middleware opens per
+# request. Outside any of those (a boot-time call, a background thread)
+# nothing is memoized, so an identity can never outlive its request. A
+# request's viewer is fixed at its first lookup.
+
+_REQUEST_MEMO: ContextVar[dict | None] = ContextVar("auth_request_memo", default=None)
+_MISSING = object()
+
+
+def _request_memo() -> dict | None:
+    memo = _REQUEST_MEMO.get()
+    if memo is not None:
+        return memo
+    # sys.modules, not an import: whichever of the two is serving is already
+    # loaded, and an ImportError per lookup would cost more than it saves.
+    for name in ("flask", "quart"):
+        framework = sys.modules.get(name)
+        if framework is not None and framework.has_request_context():
+            return framework.g.setdefault("_auth_memo", {})
+    return None
+
+
+def _lookup_user():
+    try:
+        from dash_clerk_auth import current_user as _current_user
+
+        user = _current_user()
+    except Exception:
+        user = None
+    if user is None and local_verify_enabled():
+        # dash-clerk-auth found nobody — on the ASGI backends that includes
+        # "Clerk did not answer in time". A session token that verifies
+        # against the cached keys is still a signed-in reader.
+        token = _request_session_token()
+        if token:
+            user = session_user(token)
+    return user
+
+
 def current_user():
-    """The signed-in Clerk user, or None. Never raises."""
+    """The signed-in Clerk user, or None. Never raises. Resolved once per
+    request (see above)."""
     if not clerk_enabled():
         return None
+    memo = _request_memo()
+    if memo is None:
+        return _lookup_user()
+    user = memo.get("user", _MISSING)
+    if user is _MISSING:
+        user = memo["user"] = _lookup_user()
+    return user
+
+
+class _RequestScope:
+    """Pure-ASGI middleware opening one identity memo per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # The headers ride along for the local verifier, which has no
+        # framework request object to read the session cookie from here.
+        token = _REQUEST_MEMO.set({"headers": scope.get("headers") or []})
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            _REQUEST_MEMO.reset(token)
+
+
+# Cookies any of which may carry an identity: Clerk's session JWT (and its
+# per-instance `__session_<suffix>` twins), dash-clerk-auth's signed identity
+# cookie, and the framework session the legacy v0.5 reader falls back to.
+_CREDENTIAL_COOKIES = ("__session", "__dca_identity", "session")
+
+
+def carries_credentials(headers) -> bool:
+    """Could this request resolve to a signed-in user? (lowercased headers)
+
+    Not whether the credentials verify — for code that must decide before,
+    or without, the lookup: the page snapshot front, and the ASGI key check
+    that runs outside every request scope. Errs towards yes: any
+    Authorization header counts, which only ever sends the request down
+    the ordinary path.
+    """
+    if headers.get("authorization"):
+        return True
+    for part in (headers.get("cookie") or "").split(";"):
+        name = part.strip().partition("=")[0]
+        if name in _CREDENTIAL_COOKIES or name.startswith("__session_"):
+            return True
+    return False
+
+
+def install_request_scope(app, backend: str) -> bool:
+    """Give FastAPI requests an identity memo; True when one was installed.
+
+    Flask and Quart need nothing — their ``g`` is already per request.
+    """
+    if backend != "fastapi":
+        return False
+    app.server.add_middleware(_RequestScope)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Local session verification (CLERK_LOCAL_VERIFY=1)
+# ---------------------------------------------------------------------------
+# A request without a __dca_identity cookie is verified by dash-clerk-auth
+# asking Clerk — a backend-API round trip on the request path, repeated
+# whenever the ~60-second session token rotates. A session token is an RS256
+# JWT signed by keys Clerk publishes at <frontend API>/.well-known/jwks.json,
+# so the same answer is available locally: check the signature against a
+# cached copy of that document and the claims against the clock. Gated pages
+# then keep rendering for signed-in readers while Clerk is slow or down.
+#
+# The key set is fetched when each worker starts and refreshed in the
+# background past 80% of JWKS_MAX_AGE_S; until a refresh lands the old keys
+# keep verifying. No fetch ever runs on the request path — under FastAPI and
+# Quart that path is the event loop. A kid the cache has never seen (Clerk
+# rotated its keys, or the first fetch has not landed) starts a background
+# fetch, at most one per _JWKS_MISS_BACKOFF_S so a forged kid cannot turn
+# every request into one, and the token goes to the package meanwhile.
+# Verified users are cached by token fingerprint until the token's own `exp`.
+# Anything the local check cannot settle — no keys yet, a bad signature, an
+# expired token — falls through to dash-clerk-auth unchanged, so turning this
+# on can only add signed-in readers the package would also have admitted,
+# never remove one.
+#
+# The trade is revocation: a session ended at Clerk stays valid here until
+# its token expires, about a minute. Opt-in for that reason.
+#
+# The claims are held to what the package's Clerk verify checks: `iss` must
+# be this instance's frontend API whenever one can be derived (the env var,
+# else the host the publishable key encodes), and `azp` must be one of the
+# package's `authorized_parties` when it has any. Session tokens carry no
+# email, and the allowlists key on it; the profile is fetched once per user
+# in the background, and until it lands the token is left to the package
+# rather than admitted email-less or waited on here.
+
+JWKS_MAX_AGE_S = 3600.0
+JWKS_REFRESH_AHEAD = 0.8
+_JWKS_MISS_BACKOFF_S = 30.0
+_JWKS_TIMEOUT_S = 2.0
+# Clerk's own SDK allows the same skew between its clock and ours.
+_CLOCK_SKEW_S = 5
+_VERIFIED_MAX = 4096
+# The identity fields a users-API profile fills in, as dash-clerk-auth does.
+_PROFILE_FIELDS = ("email", "first_name", "last_name", "image_url")
+# dash-clerk-auth's Flask hook answers these paths with "nobody" before any
+# verify; its list is local to that hook, so it is repeated here.
+_SKIP_PREFIXES = ("/_dash-component-suites/", "/_favicon.ico", "/_reload-hash",
+                  "/assets/", "/static/", "/health", "/api/health")
+_IDENTITY_COOKIE = "__dca_identity"
+
+# (kid -> RSA public key, fetched_at)
+_JWKS: tuple[dict, float] = ({}, 0.0)
+# One fetch at a time: held by the background refresh for its duration.
+_jwks_lock = threading.Lock()
+_jwks_retry_at = 0.0
+# sha256(token) -> (ClerkUser, exp), least recently used first.
+_SESSIONS: OrderedDict[str, tuple] = OrderedDict()
+_sessions_lock = threading.Lock()
+# user id -> profile fields, and user id -> when a failed fetch may retry.
+# Both guarded by _sessions_lock.
+_PROFILES: dict[str, dict] = {}
+_profile_retry_at: dict[str, float] = {}
+
+
+def jwks_url() -> str | None:
+    """``CLERK_JWKS_URL``, else the frontend API's well-known key set."""
+    explicit = (os.getenv("CLERK_JWKS_URL") or "").strip()
+    if explicit:
+        return explicit
+    frontend = (os.getenv("CLERK_FRONTEND_API") or "").strip().rstrip("/")
+    return f"{frontend}/.well-known/jwks.json" if frontend else None
+
+
+def _issuer() -> str | None:
+    """The ``iss`` this instance's tokens carry: ``CLERK_FRONTEND_API``, else
+    the frontend API host the publishable key encodes."""
+    frontend = (os.getenv("CLERK_FRONTEND_API") or "").strip().rstrip("/")
+    if not frontend:
+        encoded = (clerk_keys()[1] or "").split("_", 2)[-1]
+        try:
+            frontend = base64.b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+        except (ValueError, UnicodeDecodeError):
+            return None
+        frontend = frontend.rstrip("$").rstrip("/")
+        if not frontend or not all(c.isalnum() or c in ".-:" for c in frontend):
+            return None
+    return frontend if "://" in frontend else f"https://{frontend}"
+
+
+def _clerk_config() -> dict:
     try:
-        from dash_clerk_auth import current_user as _current_user
+        import dash_clerk_auth
 
-        return _current_user()
+        return getattr(dash_clerk_auth, "_clerk_config", None) or {}
+    except Exception:
+        return {}
+
+
+def local_verify_enabled() -> bool:
+    return ((os.getenv("CLERK_LOCAL_VERIFY") or "").strip() == "1"
+            and bool(jwks_url()))
+
+
+def _b64decode(part: str) -> bytes:
+    return base64.urlsafe_b64decode(part + "=" * (-len(part) % 4))
+
+
+def _b64int(part: str) -> int:
+    return int.from_bytes(_b64decode(part), "big")
+
+
+def _fetch_jwks() -> dict | None:
+    """kid -> public key from the published key set, or None on any failure."""
+    import requests
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+
+    from lib.constants import internal_ua
+
+    try:
+        response = requests.get(
+            jwks_url(), timeout=_JWKS_TIMEOUT_S,
+            headers={"User-Agent": internal_ua("clerk-jwks")},
+        )
+        response.raise_for_status()
+        keys = {}
+        for jwk in response.json().get("keys", []):
+            if jwk.get("kty") == "RSA" and jwk.get("kid"):
+                keys[jwk["kid"]] = RSAPublicNumbers(
+                    _b64int(jwk["e"]), _b64int(jwk["n"])).public_key()
     except Exception:
         return None
+    return keys or None
+
+
+def _load_jwks() -> None:
+    """Fetch and install the key set. Caller holds ``_jwks_lock``."""
+    global _JWKS, _jwks_retry_at
+    keys = _fetch_jwks()
+    now = time.time()
+    if keys:
+        _JWKS = (keys, now)
+    _jwks_retry_at = now + _JWKS_MISS_BACKOFF_S
+
+
+def _refresh_jwks() -> None:
+    try:
+        _load_jwks()
+    finally:
+        _jwks_lock.release()
+
+
+def _refresh_jwks_in_background() -> None:
+    if time.time() < _jwks_retry_at or not _jwks_lock.acquire(blocking=False):
+        return
+    try:
+        threading.Thread(target=_refresh_jwks, name="clerk-jwks-refresh",
+                         daemon=True).start()
+    except Exception:
+        _jwks_lock.release()
+
+
+def _signing_key(kid):
+    keys, fetched_at = _JWKS
+    key = keys.get(kid)
+    if key is not None:
+        if time.time() - fetched_at > JWKS_MAX_AGE_S * JWKS_REFRESH_AHEAD:
+            _refresh_jwks_in_background()
+        return key
+    # The package verifies this one; the next finds the key if Clerk has it.
+    _refresh_jwks_in_background()
+    return None
+
+
+def verify_session_token(token: str) -> dict | None:
+    """The claims of a session token that verifies locally, else None."""
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    try:
+        head, body, signature = token.split(".")
+        header = json.loads(_b64decode(head))
+        claims = json.loads(_b64decode(body))
+        signature = _b64decode(signature)
+    except (ValueError, TypeError):
+        return None
+    if not (isinstance(header, dict) and isinstance(claims, dict)):
+        return None
+    kid = header.get("kid")
+    if header.get("alg") != "RS256" or not isinstance(kid, str):
+        return None
+    key = _signing_key(kid)
+    if key is None:
+        return None
+    try:
+        key.verify(signature, f"{head}.{body}".encode("ascii"),
+                   padding.PKCS1v15(), hashes.SHA256())
+    except (InvalidSignature, ValueError):
+        return None
+
+    now = time.time()
+    exp, nbf = claims.get("exp"), claims.get("nbf", 0)
+    if not isinstance(exp, (int, float)) or exp + _CLOCK_SKEW_S <= now:
+        return None
+    if not isinstance(nbf, (int, float)) or nbf - _CLOCK_SKEW_S > now:
+        return None
+    issuer = _issuer()
+    if issuer and str(claims.get("iss") or "").rstrip("/") != issuer:
+        return None
+    parties = _clerk_config().get("authorized_parties")
+    # Stricter than Clerk, which lets a token without `azp` through: such a
+    # token is simply left to the package's own verify.
+    if parties and claims.get("azp") not in parties:
+        return None
+    return claims if claims.get("sub") else None
+
+
+def session_user(token: str):
+    """The ClerkUser behind a locally verified session token, or None.
+
+    Cached by the token's fingerprint until it expires, so a reader's
+    requests between two rotations cost one hash each. None, too, for a
+    reader whose profile has not been fetched yet (see above).
+    """
+    fingerprint = hashlib.sha256(token.encode()).hexdigest()
+    with _sessions_lock:
+        hit = _SESSIONS.get(fingerprint)
+        if hit is not None:
+            if hit[1] > time.time():
+                _SESSIONS.move_to_end(fingerprint)
+                return hit[0]
+            del _SESSIONS[fingerprint]
+
+    claims = verify_session_token(token)
+    if claims is None:
+        return None
+    try:
+        from dash_clerk_auth import ClerkUser
+
+        billing = bool(_clerk_config().get("billing_enabled"))
+        user = _with_profile(ClerkUser.from_jwt_payload(claims, billing_enabled=billing))
+    except Exception:
+        return None
+    if user is None:
+        return None
+    with _sessions_lock:
+        _SESSIONS[fingerprint] = (user, claims["exp"])
+        if len(_SESSIONS) > _VERIFIED_MAX:
+            _SESSIONS.popitem(last=False)
+    return user
+
+
+def _with_profile(user):
+    """``user`` with its profile's fields, or None while none is known.
+
+    Never calls Clerk: a missing profile is fetched on a thread, and the
+    reader's next request finds it.
+    """
+    if user.email or not user.user_id:
+        return user
+    with _sessions_lock:
+        fields = _PROFILES.get(user.user_id)
+    if fields is None:
+        _fetch_profile_in_background(user.user_id)
+        return None
+    import dataclasses
+
+    updates = {f: fields[f] for f in _PROFILE_FIELDS
+               if getattr(user, f) is None and fields.get(f)}
+    return dataclasses.replace(user, **updates) if updates else user
+
+
+def _fetch_profile_in_background(user_id: str) -> None:
+    now = time.time()
+    with _sessions_lock:
+        # One fetch per user at a time, and one per backoff after a failure.
+        if _profile_retry_at.get(user_id, 0.0) > now:
+            return
+        if len(_profile_retry_at) >= _VERIFIED_MAX:
+            _profile_retry_at.clear()
+        _profile_retry_at[user_id] = now + _JWKS_MISS_BACKOFF_S
+    try:
+        threading.Thread(target=_fetch_profile, args=(user_id,),
+                         name="clerk-profile", daemon=True).start()
+    except Exception:
+        pass
+
+
+def _fetch_profile(user_id: str) -> None:
+    try:
+        from dash_clerk_auth import get_user_by_id_sync
+
+        data = get_user_by_id_sync(user_id)
+    except Exception:
+        data = None
+    if data is None:
+        return  # retried after the backoff
+    with _sessions_lock:
+        if len(_PROFILES) >= _VERIFIED_MAX:
+            _PROFILES.clear()
+        # "Clerk has no email for this user" is remembered too, so a
+        # phone-only reader is fetched once, not on every request.
+        _PROFILES[user_id] = {f: data.get(f) for f in _PROFILE_FIELDS}
+        _profile_retry_at.pop(user_id, None)
+
+
+def _request_session_token() -> str | None:
+    """The bearer token, else the ``__session`` cookie, of this request."""
+    memo = _REQUEST_MEMO.get()
+    if memo is not None:
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1")
+                   for k, v in memo.get("headers", ())}
+        authorization, cookies = headers.get("authorization", ""), {}
+        for part in headers.get("cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            cookies.setdefault(name, value)
+    else:
+        request = None
+        for name in ("flask", "quart"):
+            framework = sys.modules.get(name)
+            if framework is not None and framework.has_request_context():
+                request = framework.request
+                break
+        if request is None:
+            return None
+        authorization, cookies = request.headers.get("Authorization", ""), request.cookies
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip() or None
+    return cookies.get("__session") or None
+
+
+def clear_session_cache() -> None:
+    """Forget the key set and every verified session (tests, key rotation)."""
+    global _JWKS, _jwks_retry_at
+    with _jwks_lock:
+        _JWKS, _jwks_retry_at = ({}, 0.0), 0.0
+    with _sessions_lock:
+        _SESSIONS.clear()
+        _PROFILES.clear()
+        _profile_retry_at.clear()
+
+
+def _reset_after_fork() -> None:
+    # A refresh thread does not survive fork; its lock would stay held.
+    global _jwks_lock, _sessions_lock
+    _jwks_lock = threading.Lock()
+    _sessions_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _install_local_verify(app) -> bool:
+    """Put the local verifier in front of dash-clerk-auth's Flask hook.
+
+    The package's ``before_request`` would otherwise reach its Clerk slow
+    path before anything here runs. A token that verifies locally answers
+    for it; anything else is handed to the original hook untouched, and so
+    is every request the hook settles without Clerk — the paths it skips,
+    and a browser holding its ``__dca_identity`` cookie. The ASGI backends
+    are covered by :func:`_lookup_user` instead.
+    """
+    hooks = (getattr(app.server, "before_request_funcs", None) or {}).get(None) or []
+    for index, hook in enumerate(hooks):
+        if getattr(hook, "__name__", "") == "_populate_clerk_user":
+            hooks[index] = _local_first(hook)
+            return True
+    return False
+
+
+def _local_first(package_hook):
+    def _populate_clerk_user():
+        from flask import g, request
+
+        if ((request.path or "").startswith(_SKIP_PREFIXES)
+                or (request.cookies.get(_IDENTITY_COOKIE)
+                    and _clerk_config().get("session_secret"))):
+            return package_hook()
+        token = _request_session_token()
+        user = session_user(token) if token else None
+        if user is None:
+            return package_hook()
+        g.clerk_user = user
+        return None
+
+    return _populate_clerk_user
 
 
 def current_user_email() -> str | None:
@@ -116,6 +616,15 @@ def _split_csv(raw: str | None) -> set[str]:
     return {item.strip().lower() for item in (raw or "").split(",") if item.strip()}
 
 
+@lru_cache(maxsize=8)
+def _admin_allowlist(emails: str | None, user_ids: str | None,
+                     owner: str) -> tuple[frozenset, frozenset]:
+    """The parsed allowlists, keyed by the raw env values so an edit to
+    either still applies on the next call."""
+    return (frozenset(_split_csv(emails) | {owner.lower()}),
+            frozenset(_split_csv(user_ids)))
+
+
 def admin_access_open() -> bool:
     """May admin surfaces render while Clerk is unavailable? Default **False**.
 
@@ -140,8 +649,8 @@ def is_admin_user(user=None) -> bool:
         user = current_user()
     if not user:
         return False
-    admin_emails = _split_csv(os.getenv("ADMIN_EMAILS")) | {OWNER_EMAIL.lower()}
-    admin_ids = _split_csv(os.getenv("ADMIN_USER_IDS"))
+    admin_emails, admin_ids = _admin_allowlist(
+        os.getenv("ADMIN_EMAILS"), os.getenv("ADMIN_USER_IDS"), OWNER_EMAIL)
     email = (getattr(user, "email", None) or "").lower()
     if email and email in admin_emails:
         return True
@@ -425,6 +934,14 @@ def configure_app(app) -> None:
         from dash_clerk_auth import configure_app as _configure
 
         _configure(app)
+        if local_verify_enabled():
+            _install_local_verify(app)
+            # Fetched as each worker starts, so the first signed-in request
+            # finds the keys; never in a preloading master (lib/prefork).
+            from lib import prefork
+
+            prefork.in_each_worker(_refresh_jwks_in_background)
+            print(f"[auth] Local session verification ON (keys: {jwks_url()}).")
     except ImportError:
         pass
     except Exception as exc:  # noqa: BLE001 — never break the boot on auth wiring
@@ -1,7 +1,61 @@
+"""The ``.. kwargs::`` directive — a component's props table, from its docstring.
+
+Extraction is an import plus a docstring parse, and satellites documenting a
+component library repeat the same component on page after page, so tables
+are memoized by :func:`props_table` under ``(package, component, installed
+version)`` and persisted to ``KWARGS_CACHE_FILE`` (default
+``kwargs_props.json`` in the user cache directory — ``$XDG_CACHE_HOME``, else
+``~/.cache``, else the temp dir — never the checkout, which is read-only in
+many images; ``0`` turns persistence off). A restart with nothing upgraded
+parses nothing and, for a library the app does not import anyway, never
+imports it either — the version comes from package metadata. Every caller
+gets its own copy of the rows, so a page that edits its table edits only
+its own.
+
+The key also carries a digest of this file, so editing a parser below
+invalidates every persisted table without anyone remembering to.
+:func:`warm_up` runs once before the page loop (pages/markdown.py) so each
+distinct component is resolved once and the cache file written once.
+"""
+
+from __future__ import annotations
+
+import hashlib
 import importlib
 import inspect
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from importlib.metadata import PackageNotFoundError, packages_distributions, version
+from pathlib import Path
+
 from markdown2dash.src.directives.kwargs import Kwargs as KwargsBase
 
+logger = logging.getLogger(__name__)
+
+# Common package name mappings
+PACKAGE_MAP = {
+    "dmc": "dash_mantine_components",
+    "html": "dash.html",
+    "dcc": "dash.dcc",
+    "dash": "dash",
+}
+_DEFAULT_PACKAGE = "dash_mantine_components"
+
+_PARSER_DIGEST = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+_SCHEMA = 1
+
+# "package:component:version:parser" -> props rows
+_TABLES: dict[str, list] = {}
+_loaded = False
+_dirty = False
+_lock = threading.Lock()
+# top-level module -> installed version (None: not a distribution we can name)
+_VERSIONS: dict[str, str | None] = {}
+
 
 def convert_docstring_to_dict(docstring):
     """Convert numpy style parameter docstring to a list of dicts with keys name, type, description"""
@@ -23,6 +77,178 @@ def convert_docstring_to_dict(docstring):
     return params
 
 
+def cache_path() -> Path | None:
+    raw = os.getenv("KWARGS_CACHE_FILE")
+    if raw == "0":
+        return None
+    if raw:
+        return Path(raw)
+    base = os.getenv("XDG_CACHE_HOME")
+    if not base:
+        try:
+            base = str(Path.home() / ".cache")
+        except RuntimeError:             # no home directory to resolve
+            base = tempfile.gettempdir()
+    return Path(base) / "dash_documentation_boilerplate" / "kwargs_props.json"
+
+
+def _package_version(package: str) -> str | None:
+    """The installed version behind ``package``, without importing it."""
+    top = package.split(".")[0]
+    with _lock:
+        if top in _VERSIONS:
+            return _VERSIONS[top]
+    # Import name and distribution name agree for nearly every Dash library
+    # (metadata lookup normalises `_` / `-`). The full mapping walks every
+    # installed distribution — ~150ms, more than the parse it would save.
+    try:
+        found = version(top)
+    except PackageNotFoundError:
+        found = None
+        for dist in packages_distributions().get(top, []):
+            try:
+                found = version(dist)
+                break
+            except PackageNotFoundError:
+                continue
+    with _lock:
+        _VERSIONS[top] = found
+    return found
+
+
+def _load() -> None:
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        _loaded = True
+    path = cache_path()
+    if path is None or not path.exists():
+        return
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("schema") != _SCHEMA:
+            return
+        tables = {k: v for k, v in data.get("tables", {}).items()
+                  if k.endswith(":" + _PARSER_DIGEST)}
+    except (OSError, ValueError, AttributeError) as exc:
+        logger.debug("kwargs cache unreadable (%s) — rebuilding", exc)
+        return
+    with _lock:
+        for key, table in tables.items():
+            _TABLES.setdefault(key, table)
+
+
+def save() -> None:
+    """Write the cache if anything new was parsed. Never raises: a read-only
+    deploy disk costs the next boot its head start, nothing more."""
+    global _dirty
+    path = cache_path()
+    with _lock:
+        if not _dirty or path is None:
+            return
+        snapshot = dict(_TABLES)
+        _dirty = False
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Per process: the cache dir may be shared by other checkouts.
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"schema": _SCHEMA, "tables": snapshot}),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.debug("kwargs cache not written (%s)", exc)
+
+
+def _extract(package: str, component_name: str) -> list:
+    try:
+        imported = importlib.import_module(package)
+        component = getattr(imported, component_name)
+        docstring = inspect.getdoc(component)
+
+        if docstring and "----------" in docstring:
+            # numpy-style (dash-mantine-components hand-written docs)
+            docstring = docstring.split("----------\n")[-1]
+            return convert_docstring_to_dict(docstring)
+        elif docstring and "Keyword arguments:" in docstring:
+            # dash-generate-components style — every component a
+            # library satellite documents. The base markdown2dash
+            # Kwargs ships a parser for exactly this format; this
+            # numpy override used to SHADOW it, so dash-built
+            # components rendered silently EMPTY props tables
+            # (found on muicharts' /api; pannellum's /api likely
+            # affected too). Fall back to the base parser.
+            from markdown2dash.src.utils import (
+                convert_docstring_to_dict as dash_convert,
+            )
+
+            return dash_convert(docstring.split("Keyword arguments:")[-1])
+        return []
+    except Exception:
+        # Import failed or the component has no usable docstring;
+        # a props table is a nice-to-have, not worth failing a page for.
+        return []
+
+
+def props_table(package: str, component_name: str) -> list:
+    """The props rows for ``package.component_name``, parsed once per version.
+
+    An uninstalled package is never persisted (there is no version to key
+    it by) — it is retried next boot, when it may have been installed. The
+    rows returned are a copy; the memoized ones are never handed out.
+    """
+    global _dirty
+    _load()
+    pkg_version = _package_version(package)
+    key = f"{package}:{component_name}:{pkg_version}:{_PARSER_DIGEST}"
+    with _lock:
+        cached = _TABLES.get(key)
+    if cached is not None:
+        return [dict(row) for row in cached]
+
+    table = _extract(package, component_name)
+    with _lock:
+        _TABLES[key] = table
+        if pkg_version is not None:
+            _dirty = True
+    return [dict(row) for row in table]
+
+
+def resolve_spec(spec: str, library: str | None = None) -> tuple[str, str]:
+    """``"dmc.Button"`` -> ``("dash_mantine_components", "Button")``."""
+    if "." in spec:
+        package_abbr, component_name = spec.rsplit(".", 1)
+        return PACKAGE_MAP.get(package_abbr, package_abbr), component_name
+    # If no package specified, use default or library attribute
+    return library or _DEFAULT_PACKAGE, spec
+
+
+_DIRECTIVE = re.compile(r"^\.\. kwargs::\s*(\S+)[ \t]*\n((?:[ \t]*:\w+:.*\n)*)", re.M)
+_LIBRARY = re.compile(r":library:\s*(\S+)")
+
+
+def warm_up(files) -> int:
+    """Resolve every ``.. kwargs::`` referenced in ``files``, then save once.
+
+    Returns how many distinct components were referenced. A spec the scan
+    gets wrong costs nothing but a cache entry; the hook resolves its own.
+    """
+    specs = set()
+    for file in files:
+        try:
+            text = Path(file).read_text(encoding="utf-8")
+        except OSError:
+            continue
+        for match in _DIRECTIVE.finditer(text):
+            library = _LIBRARY.search(match.group(2))
+            specs.add(resolve_spec(match.group(1),
+                                   library.group(1) if library else None))
+    for package, component_name in sorted(specs):
+        props_table(package, component_name)
+    save()
+    return len(specs)
+
+
 class Kwargs(KwargsBase):
 
     def hook(self, md, state):
@@ -36,52 +262,10 @@ class Kwargs(KwargsBase):
             attrs = section["attrs"]
 
             # Parse the component specification (e.g., "dmc.Button" or "html.Div")
-            component_spec = attrs["title"]
-
-            # Common package name mappings
-            package_map = {
-                "dmc": "dash_mantine_components",
-                "html": "dash.html",
-                "dcc": "dash.dcc",
-                "dash": "dash"
-            }
-
-            # Try to parse package.Component format
-            if "." in component_spec:
-                package_abbr, component_name = component_spec.rsplit(".", 1)
-                package = package_map.get(package_abbr, package_abbr)
-            else:
-                # If no package specified, use default or library attribute
-                package = attrs.pop("library", "dash_mantine_components")
-                component_name = component_spec
+            package, component_name = resolve_spec(
+                attrs["title"], attrs.pop("library", None)
+            )
+            attrs["kwargs"] = props_table(package, component_name)
 
-            try:
-                imported = importlib.import_module(package)
-                component = getattr(imported, component_name)
-                docstring = inspect.getdoc(component)
-
-                if docstring and "----------" in docstring:
-                    # numpy-style (dash-mantine-components hand-written docs)
-                    docstring = docstring.split("----------\n")[-1]
-                    attrs["kwargs"] = convert_docstring_to_dict(docstring)
-                elif docstring and "Keyword arguments:" in docstring:
-                    # dash-generate-components style — every component a
-                    # library satellite documents. The base markdown2dash
-                    # Kwargs ships a parser for exactly this format; this
-                    # numpy override used to SHADOW it, so dash-built
-                    # components rendered silently EMPTY props tables
-                    # (found on muicharts' /api; pannellum's /api likely
-                    # affected too). Fall back to the base parser.
-                    from markdown2dash.src.utils import (
-                        convert_docstring_to_dict as dash_convert,
-                    )
-
-                    attrs["kwargs"] = dash_convert(
-                        docstring.split("Keyword arguments:")[-1]
-                    )
-                else:
-                    attrs["kwargs"] = []
-            except Exception:
-                # Import failed or the component has no usable docstring;
-                # a props table is a nice-to-have, not worth failing a page for.
-                attrs["kwargs"] = []
+        if sections:
+            save()
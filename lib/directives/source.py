@@ -1,10 +1,116 @@
+"""The ``.. source::`` directive, and the one reader every consumer shares.
+
+A referenced file is needed twice per page — once for the code tabs the
+browser renders (:class:`SC`) and once for the directive-expanded prose
+``pages/markdown.py`` registers as ``/<page>/llms.txt`` — and shared example
+files are referenced from several pages. :func:`read_source` reads each file
+once per process and hands every caller the same entry until the file's
+mtime moves, so a dev-server edit still shows up on the next load.
+
+Language detection lives here too, in one table. It used to be two: a
+two-entry ``mapping`` inside ``SC.render`` (which raised ``KeyError`` on any
+extension it did not know) and a fuller ``_LANG_MAP`` in the page loader, so
+the browser and the llms.txt copy could disagree about the same file.
+"""
+
+from __future__ import annotations
+
+import hashlib
 import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
 
 import dash_mantine_components as dmc
 from dash.development.base_component import Component
 from dash_iconify import DashIconify
 from markdown2dash import SourceCode
 
+# extension -> highlighter language. The llms.txt fence and the code tabs both
+# read this; anything unlisted uses its bare extension.
+LANG_MAP = {
+    'py': 'python', 'pyi': 'python',
+    'js': 'javascript', 'jsx': 'jsx',
+    'ts': 'typescript', 'tsx': 'tsx',
+    'css': 'css', 'scss': 'scss', 'sass': 'sass', 'less': 'less',
+    'html': 'html', 'htm': 'html', 'xml': 'xml',
+    'json': 'json',
+    'yaml': 'yaml', 'yml': 'yaml',
+    'md': 'markdown', 'rst': 'rst', 'txt': 'text',
+    'sh': 'bash', 'bash': 'bash',
+    'sql': 'sql', 'r': 'r',
+    'toml': 'toml', 'ini': 'ini', 'conf': 'conf',
+}
+
+# language -> tab icon. Keyed by language, not extension, so `.pyi` and `.py`
+# cannot end up with different icons.
+_ICONS = {
+    'python': 'devicon:python',
+    'css': 'devicon:css3',
+    'scss': 'devicon:sass', 'sass': 'devicon:sass',
+    'javascript': 'devicon:javascript',
+    'typescript': 'devicon:typescript',
+    'html': 'devicon:html5',
+    'json': 'tabler:braces',
+    'markdown': 'devicon:markdown',
+    'bash': 'devicon:bash',
+}
+_DEFAULT_ICON = 'tabler:file-code'
+
+
+def language_for(path: str) -> str:
+    """The highlighter language for ``path``, from its extension."""
+    ext = Path(path).suffix.lstrip('.').lower()
+    return LANG_MAP.get(ext, ext or 'text')
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    path: str
+    text: str
+    language: str
+    # sha256 of the bytes read — a stable handle for anything that wants to
+    # cache work derived from this file's content rather than its name.
+    digest: str
+
+
+# resolved path -> (mtime_ns, size, entry)
+_CACHE: dict[str, tuple[int, int, SourceFile]] = {}
+_lock = threading.Lock()
+
+
+def read_source(path: str) -> SourceFile:
+    """``path``'s content and language, read once per mtime.
+
+    Raises what ``open`` raises (``FileNotFoundError`` for a bad directive),
+    so callers keep their own error reporting.
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    with _lock:
+        cached = _CACHE.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(key, 'rb') as f:
+        raw = f.read()
+    entry = SourceFile(
+        path=path,
+        # Universal newlines, as text mode reads them: a CRLF checkout must
+        # not put \r into the code tabs or /<page>/llms.txt.
+        text=raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n'),
+        language=language_for(path),
+        digest=hashlib.sha256(raw).hexdigest(),
+    )
+    with _lock:
+        _CACHE[key] = (stat.st_mtime_ns, stat.st_size, entry)
+    return entry
+
+
+def clear_cache() -> None:
+    with _lock:
+        _CACHE.clear()
+
 
 class SC(SourceCode):
     NAME = "source"
@@ -13,20 +119,18 @@ class SC(SourceCode):
         defaultExpanded = options.pop("defaultExpanded", "false")
         withExpandedButton = options.pop("withExpandedButton", "true")
 
-        mapping = {
-            "py": {"language": "python", "icon": DashIconify(icon="devicon:python")},
-            "css": {"language": "css", "icon": DashIconify(icon="devicon:css3")},
-        }
         files = title.split(", ")
         code = []
         for file in files:
-            extension = file.split(".")[-1]
+            source = read_source(file)
             code.append(
                 {
                     "fileName": os.path.basename(file),
-                    "code": open(file, "r").read(),
-                    "language": mapping[extension]["language"],
-                    "icon": mapping[extension]["icon"],
+                    "code": source.text,
+                    "language": source.language,
+                    "icon": DashIconify(
+                        icon=_ICONS.get(source.language, _DEFAULT_ICON)
+                    ),
                 }
             )
         return dmc.CodeHighlightTabs(
@@ -17,18 +17,68 @@ handled by ``assets/auth_gate.js`` (satellite mode navigates to the primary
 with a returnTo; local dev opens the Clerk modal). Those selectors are
 deliberately disjoint from ``#clerk-login-button``, which the package's own
 handler and ``lib/auth.py``'s capture-phase fixup already own.
+
+Cards are built once. A card depends only on the page, the verdict and the
+sign-in destination, never on the visitor, so each (page, verdict) is built
+on first use and the same tree is returned after — under
+``PAGE_DEFAULT_TIER=auth`` every anonymous render used to build a fresh one.
+The destination is resolved once and again only when the network bulletin
+it prefers is replaced. The serialized bytes of a card are cached one layer
+out, by ``lib/page_snapshots.py``, which keys the sign-in card on the same
+resolved destination — a replaced bulletin moves both layers to the new URL.
 """
 from __future__ import annotations
 
 import logging
 
+from lib import request_timing
+
 logger = logging.getLogger(__name__)
 
 
+# (verdict, page name, path, destination) -> card. Bounded by the page count:
+# at most three verdicts per page, and destinations change about never.
+_CARDS: dict[tuple, object] = {}
+# (the bulletin it was read from, url). get_bulletin returns the same object
+# until a refresh lands, so identity says whether to look again.
+_DESTINATION: tuple | None = None
+
+
+def _bulletin():
+    try:
+        from dash_improve_my_llms.bulletin import get_bulletin
+
+        return get_bulletin()
+    except Exception:
+        return None
+
+
 def _sign_in_destination() -> str:
+    global _DESTINATION
+    bulletin = _bulletin()
+    cached = _DESTINATION
+    if cached is not None and cached[0] is bulletin:
+        return cached[1]
     from lib import access
 
-    return access.sign_in_url() or "https://2plot.ai"
+    url = access.sign_in_url() or "https://2plot.ai"
+    _DESTINATION = (bulletin, url)
+    return url
+
+
+def clear_cache() -> None:
+    """Forget every built card and the resolved destination (tests)."""
+    global _DESTINATION
+    _CARDS.clear()
+    _DESTINATION = None
+
+
+def _cached(key: tuple, build):
+    card = _CARDS.get(key)
+    if card is None:
+        # Two first renders may both build; setdefault keeps one for good.
+        card = _CARDS.setdefault(key, build())
+    return card
 
 
 def _card(icon: str, color: str, title: str, body: str, extra=None):
@@ -56,6 +106,12 @@ def sign_in_layout(page_name: str, path: str | None = None):
     With a registered teaser demo (lib.auth_demos) a live example renders at
     the top — no code, no docs — so the visitor sees what an account unlocks.
     """
+    destination = _sign_in_destination()
+    return _cached(("sign_in", page_name, path, destination),
+                   lambda: _build_sign_in(page_name, path, destination))
+
+
+def _build_sign_in(page_name: str, path: str | None, destination: str):
     import dash_mantine_components as dmc
     from dash_iconify import DashIconify
 
@@ -112,7 +168,7 @@ def sign_in_layout(page_name: str, path: str | None = None):
             ),
             dmc.Text(
                 "Free forever — you'll be redirected straight back to this "
-                f"page. Accounts live at {_sign_in_destination()}.",
+                f"page. Accounts live at {destination}.",
                 size="xs", c="dimmed", ta="center",
             ),
         ],
@@ -141,17 +197,17 @@ def sign_in_layout(page_name: str, path: str | None = None):
 
 
 def forbidden_layout(page_name: str):
-    return _card(
+    return _cached(("forbidden", page_name), lambda: _card(
         "tabler:shield-lock", "red", "Restricted documentation",
         f"“{page_name}” is limited to administrator accounts.",
-    )
+    ))
 
 
 def hidden_layout():
-    return _card(
+    return _cached(("hidden",), lambda: _card(
         "tabler:eye-off", "gray", "404 — Page not available",
         "This page is not currently published.",
-    )
+    ))
 
 
 def gated_layout(path: str, page_name: str, build_layout):
@@ -167,13 +223,14 @@ def gated_layout(path: str, page_name: str, build_layout):
     def layout(**kwargs):
         from lib import access
 
-        verdict = access.resolve_page_access(path)
-        if verdict == "hidden":
-            return hidden_layout()
-        if verdict == "sign_in":
-            return sign_in_layout(page_name, path)
-        if verdict == "forbidden":
-            return forbidden_layout(page_name)
-        return build_layout() if callable(build_layout) else build_layout
+        with request_timing.timed("page-layout"):
+            verdict = access.resolve_page_access(path)
+            if verdict == "hidden":
+                return hidden_layout()
+            if verdict == "sign_in":
+                return sign_in_layout(page_name, path)
+            if verdict == "forbidden":
+                return forbidden_layout(page_name)
+            return build_layout() if callable(build_layout) else build_layout
 
     return layout
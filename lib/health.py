@@ -9,14 +9,46 @@ Swagger; this module gives the other two backends the same endpoint, so the
 probe result doesn't depend on which backend a deployment happens to run.
 
 Keep it cheap: the hub measures the round trip, so any work done here is
-reported back as this app being slow.
+reported back as this app being slow. That is taken literally: the body is
+serialized to bytes once per process (:func:`health_body`), and
+:func:`install_health_front` answers ``GET``/``HEAD /healthz`` from the
+outermost ``wsgi_app``/``asgi_app`` layer on all three backends — ahead of
+the snapshot front, the analytics and timing edge, and Dash's routing — so
+the probe measures how fast this worker picks up a request, not ``jsonify``
+or a Pydantic model. The routes stay registered (and typed, on FastAPI, for
+Swagger) and return the same bytes, for an app that skips the front.
+
+Liveness is not readiness
+-------------------------
+``/healthz`` says "this process answers". ``/readyz`` (front only) says
+"this worker is worth sending a reader to": it stays 503 until every
+readiness check passes — the page registry and llms docs registered
+(``run.py`` adds those), and Dash's one-off first-request setup done. The
+last one is the cold-worker cost, and the front pays it itself: a ``/readyz``
+that finds Dash cold first passes one internal ``GET /`` through the stack,
+so a load balancer that holds traffic until ready does not wait for a reader
+to warm the worker. Once every check has passed the answer latches — a
+worker does not go cold again.
+
+``/healthz?detail=1`` from a caller carrying the network's internal
+User-Agent token adds the readiness checks, the analytics queue counters and
+this worker's latency histograms (lib/request_timing). Anyone else gets the
+plain body: the numbers are not secret, but they are not a public surface.
 """
 from __future__ import annotations
 
+import io
+import json
 import os
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
 
 import dash
 
+HEALTH_PATH = "/healthz"
+READY_PATH = "/readyz"
+
 
 def health_payload(backend: str) -> dict:
     payload = {"ok": True, "backend": backend, "dash_version": dash.__version__}
@@ -35,26 +67,272 @@ def health_payload(backend: str) -> dict:
     return payload
 
 
+@lru_cache(maxsize=None)
+def health_body(backend: str) -> bytes:
+    """:func:`health_payload` as the exact bytes every probe receives."""
+    return json.dumps(health_payload(backend), separators=(",", ":")).encode()
+
+
+def _header_pairs(body: bytes) -> list:
+    return [("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            # A cached "ok" is a probe that stopped measuring anything.
+            ("Cache-Control", "no-store")]
+
+
+# ----------------------------------------------------------------- ready --
+
+_CHECKS: Dict[str, Callable[[], bool]] = {}
+_ready = False
+_warm_lock = threading.Lock()
+
+
+def add_readiness_check(name: str, check: Callable[[], bool]) -> None:
+    """Hold ``/readyz`` at 503 until ``check()`` is true (a raise is false)."""
+    _CHECKS[name] = check
+
+
+def readiness() -> Tuple[bool, Dict[str, bool]]:
+    """``(ready, {check: passed})``; ``{}`` once latched ready."""
+    global _ready
+    if _ready:
+        return True, {}
+    results = {}
+    for name, check in list(_CHECKS.items()):
+        try:
+            results[name] = bool(check())
+        except Exception:
+            results[name] = False
+    if all(results.values()):
+        _ready = True
+    return _ready, results
+
+
+def llms_docs_registered() -> bool:
+    """Every page dash-improve-my-llms knows has its llms.txt prose."""
+    try:
+        from dash_improve_my_llms import _state
+        from dash_improve_my_llms.handlers import list_pages_missing_llms_doc
+    except ImportError:  # a package without the registry: nothing to wait on
+        return True
+    return bool(_state.page_metadata) and not list_pages_missing_llms_doc(
+        _state.page_metadata, _state.hidden_pages)
+
+
+def _dash_is_warm(app) -> bool:
+    return bool(getattr(app, "_got_first_request", {}).get("setup_server"))
+
+
+def _ready_answer() -> Tuple[int, bytes]:
+    ready, checks = readiness()
+    if ready:
+        return 200, b'{"ready":true}'
+    waiting = sorted(name for name, passed in checks.items() if not passed)
+    return 503, json.dumps({"ready": False, "waiting": waiting},
+                           separators=(",", ":")).encode()
+
+
+def _is_internal(user_agent: str) -> bool:
+    from lib.constants import INTERNAL_UA_TOKEN
+
+    return INTERNAL_UA_TOKEN in (user_agent or "").lower()
+
+
+def _wants_detail(query: str) -> bool:
+    return "detail=1" in query.split("&")
+
+
+def detail_body(backend: str) -> bytes:
+    """The internal ``/healthz?detail=1`` body — built per call, on purpose."""
+    from lib import request_timing
+    from lib.analytics_tracker import async_front
+
+    ready, checks = readiness()
+    payload = health_payload(backend)
+    payload.update(ready=ready, checks=checks,
+                   analytics_queue=async_front.stats(),
+                   latency=request_timing.snapshot())
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _wsgi_health(wsgi_app, body: bytes, app=None, backend: str = "flask"):
+    headers = _header_pairs(body)
+
+    def warm(environ) -> None:
+        # One internal GET / through everything behind this layer. Built from
+        # the probe's own environ, so server and scheme keys are real.
+        from lib import request_timing
+        from lib.constants import INTERNAL_UA
+
+        if not _warm_lock.acquire(blocking=False):
+            return                       # another probe is already warming
+        try:
+            probe = dict(environ, REQUEST_METHOD="GET", PATH_INFO="/",
+                         QUERY_STRING="", HTTP_USER_AGENT=INTERNAL_UA,
+                         CONTENT_LENGTH="0")
+            probe["wsgi.input"] = io.BytesIO()
+            probe.pop("HTTP_COOKIE", None)
+            probe.pop("HTTP_AUTHORIZATION", None)
+            with request_timing.untimed():
+                result = wsgi_app(probe, lambda *args, **kwargs: None)
+                try:
+                    for _ in result:
+                        pass
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+        except Exception:
+            pass
+        finally:
+            _warm_lock.release()
+
+    def answer(start_response, method, status, payload):
+        start_response(status, _header_pairs(payload))
+        return [payload if method == "GET" else b""]
+
+    def middleware(environ, start_response):
+        path = environ.get("PATH_INFO")
+        if path == HEALTH_PATH or path == READY_PATH:
+            method = environ.get("REQUEST_METHOD")
+            if method in ("GET", "HEAD"):
+                if path == READY_PATH:
+                    if app is not None and not _ready and not _dash_is_warm(app):
+                        warm(environ)
+                    code, payload = _ready_answer()
+                    status = "200 OK" if code == 200 else "503 Service Unavailable"
+                    return answer(start_response, method, status, payload)
+                if (_wants_detail(environ.get("QUERY_STRING", ""))
+                        and _is_internal(environ.get("HTTP_USER_AGENT", ""))):
+                    return answer(start_response, method, "200 OK",
+                                  detail_body(backend))
+                start_response("200 OK", list(headers))
+                return [body if method == "GET" else b""]
+        return wsgi_app(environ, start_response)
+
+    return middleware
+
+
+class _AsgiHealth:
+    """``/healthz`` and ``/readyz`` answered before anything behind them sees
+    the request."""
+
+    def __init__(self, app, body: bytes = b"", dash_app=None,
+                 backend: str = "fastapi"):
+        self.app = app
+        self.body = body
+        self.dash_app = dash_app
+        self.backend = backend
+        self.headers = self._headers(body)
+        self._warming = False
+
+    @staticmethod
+    def _headers(body: bytes) -> list:
+        return [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                for k, v in _header_pairs(body)]
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path")
+        if (scope["type"] == "http" and (path == HEALTH_PATH or path == READY_PATH)
+                and scope.get("method") in ("GET", "HEAD")):
+            if path == READY_PATH:
+                if (self.dash_app is not None and not _ready
+                        and not _dash_is_warm(self.dash_app)):
+                    await self._warm(scope)
+                status, payload = _ready_answer()
+                return await self._answer(send, scope, status, payload)
+            query = (scope.get("query_string") or b"").decode("latin-1")
+            if _wants_detail(query) and _is_internal(self._user_agent(scope)):
+                return await self._answer(send, scope, 200,
+                                          detail_body(self.backend))
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": self.headers})
+            await send({"type": "http.response.body",
+                        "body": self.body if scope["method"] == "GET" else b""})
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _user_agent(scope) -> str:
+        for name, value in scope.get("headers") or ():
+            if name == b"user-agent":
+                return value.decode("latin-1")
+        return ""
+
+    @classmethod
+    async def _answer(cls, send, scope, status: int, payload: bytes):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": cls._headers(payload)})
+        await send({"type": "http.response.body",
+                    "body": payload if scope["method"] == "GET" else b""})
+
+    async def _warm(self, scope) -> None:
+        from lib import request_timing
+        from lib.constants import INTERNAL_UA
+
+        if self._warming:
+            return
+        self._warming = True
+        try:
+            host = [(n, v) for n, v in scope.get("headers") or () if n == b"host"]
+            probe = dict(scope, method="GET", path="/", raw_path=b"/",
+                         query_string=b"",
+                         headers=host + [(b"user-agent", INTERNAL_UA.encode())])
+            done = False
+
+            async def receive():
+                nonlocal done
+                if done:
+                    return {"type": "http.disconnect"}
+                done = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def discard(message):
+                pass
+
+            with request_timing.untimed():
+                await self.app(probe, receive, discard)
+        except Exception:
+            pass
+        finally:
+            self._warming = False
+
+
+def install_health_front(app, backend: str) -> None:
+    """Answer ``/healthz`` and ``/readyz`` from the outermost layer. Call it
+    LAST: the most recently wrapped layer is the first to see a request."""
+    server = app.server
+    body = health_body(backend)
+    add_readiness_check("dash", lambda: _dash_is_warm(app))
+    if backend == "fastapi":
+        server.add_middleware(_AsgiHealth, body=body, dash_app=app,
+                              backend=backend)
+    elif backend == "quart":
+        server.asgi_app = _AsgiHealth(server.asgi_app, body, app, backend)
+    else:
+        # Wrap `wsgi_app`, never `app.server` (see lib/proxy.apply).
+        server.wsgi_app = _wsgi_health(server.wsgi_app, body, app, backend)
+
+
 def register_health_route(app, backend: str) -> None:
     """Mount ``/healthz`` on Flask/Quart. No-op on FastAPI (already typed)."""
     if backend == "fastapi":
         return
 
     server = app.server
-    payload = health_payload(backend)
+    body = health_body(backend)
 
     if backend == "quart":
-        from quart import jsonify
+        from quart import Response
 
-        @server.get("/healthz")
+        @server.get(HEALTH_PATH)
         async def _healthz():  # pragma: no cover — quart runtime
-            return jsonify(payload)
+            return Response(body, headers=dict(_header_pairs(body)))
     else:
-        from flask import jsonify
+        from flask import Response
 
-        @server.get("/healthz")
+        @server.get(HEALTH_PATH)
         def _healthz():
-            return jsonify(payload)
+            return Response(body, headers=dict(_header_pairs(body)))
 
     print(f"[boilerplate] /healthz registered ({backend}) — "
           "the 2plot.ai hourly health sweep probes this path.")
@@ -1,9 +1,10 @@
 """Client for the network hub's agent-key and page-tier endpoints.
 
-Three calls, all satellite → hub, never browser → hub::
+Four calls, all satellite → hub, never browser → hub::
 
     POST {hub}/api/agent-key/current   -> {"key": "k2p_..."}   for the copy button
     POST {hub}/api/agent-key/verify    -> {"verdict": ..., "ttl": ...}
+    POST {hub}/api/agent-key/verify-many -> {"verdicts": {path: ...}, "ttl": ...}
     POST {hub}/api/page-tiers          -> {"tiers": {path: tier}, "ttl": ...}
 
 Why a hub call exists at all
@@ -37,19 +38,43 @@ prose. Never ``deny``: an outage must not black-hole every document. ``gated``
 leaks nothing and keeps the surface answering, which is the same fail-safe the
 package applies when an app's own check raises.
 
+Event loops
+-----------
+``verify_async``, ``verify_many_async`` and ``hub_tiers_async`` are the same
+calls over ``httpx`` for the ASGI backends, sharing every cache and the
+single flight with their blocking twins, so an agent's key being verified
+parks no worker thread (``lib.access.install_async``). Nothing on a loop's
+thread ever waits on a threading lock: the sync ``hub_tiers`` called there
+(Dash runs sync callbacks on the loop under FastAPI) answers from what it
+has and fetches in the background.
+
 Nothing here logs a key, or anything derived from one.
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import hmac
 import json
 import logging
 import os
+import sqlite3
+import threading
 import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
 from typing import Dict, Optional, Tuple
 
+try:  # POSIX only — elsewhere each worker simply refreshes on its own
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from lib import request_timing
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_HUB_URL = "https://2plot.dev"
@@ -61,9 +86,75 @@ DEFAULT_HUB_URL = "https://2plot.dev"
 ALLOW_TTL_S = 900.0
 DENY_TTL_S = 60.0
 
-# key-hash + path -> (verdict, expires_at)
-_VERDICT_CACHE: Dict[Tuple[str, str], Tuple[str, float]] = {}
+# key-hash + path -> (verdict, expires_at), least recently used first. An
+# LRU rather than a dict cleared when full: one agent crawling a big corpus
+# used to flush every other agent's verdicts with it.
+_VERDICT_CACHE: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
 _CACHE_MAX = 4096
+_verdict_lock = threading.Lock()
+# (key-hash, path) -> the verify in flight for it. Concurrent misses for the
+# same pair wait for the one POST instead of each sending their own.
+_IN_FLIGHT: Dict[Tuple[str, str], "_Flight"] = {}
+# key-hash -> the verify-many in flight for it: an agent's first fetches
+# arrive together, and each would otherwise send the same batch.
+_BATCH_IN_FLIGHT: Dict[str, "_Flight"] = {}
+
+
+class _Flight:
+    """One verify in flight, awaited by threads and event loops alike."""
+
+    __slots__ = ("done", "verdict", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.verdict: Optional[str] = None
+        # (loop, future) for each coroutine waiting on this flight.
+        self.waiters: list = []
+
+    def finish(self, verdict: Optional[str]) -> None:
+        with _verdict_lock:
+            self.verdict = verdict
+            waiters, self.waiters = self.waiters, []
+            self.done.set()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_settle, future, verdict)
+            except RuntimeError:  # that loop has closed; nobody is waiting
+                pass
+
+    async def wait_async(self, timeout: float) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with _verdict_lock:
+            if self.done.is_set():
+                return self.verdict
+            self.waiters.append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _settle(future, verdict: Optional[str]) -> None:
+    if not future.done():
+        future.set_result(verdict)
+
+
+def _join_flight(pair, table: dict = _IN_FLIGHT) -> Tuple[_Flight, bool]:
+    """The flight for ``pair``, and whether the caller must fly it."""
+    with _verdict_lock:
+        flight = table.get(pair)
+        if flight is not None:
+            return flight, False
+        flight = table[pair] = _Flight()
+        return flight, True
+
+
+def _land(pair, flight: _Flight, verdict: Optional[str],
+          table: dict = _IN_FLIGHT) -> None:
+    with _verdict_lock:
+        table.pop(pair, None)
+    flight.finish(verdict)
 
 
 def hub_url() -> str:
@@ -100,64 +191,168 @@ def _fingerprint(key: str) -> str:
 
 
 def _cache_get(fingerprint: str, path: str) -> Optional[str]:
-    entry = _VERDICT_CACHE.get((fingerprint, path))
-    if not entry:
-        return None
-    verdict, expires_at = entry
-    if expires_at < time.time():
-        _VERDICT_CACHE.pop((fingerprint, path), None)
-        return None
-    return verdict
+    with _verdict_lock:
+        entry = _VERDICT_CACHE.get((fingerprint, path))
+        if not entry:
+            return None
+        verdict, expires_at = entry
+        if expires_at < time.time():
+            del _VERDICT_CACHE[(fingerprint, path)]
+            return None
+        _VERDICT_CACHE.move_to_end((fingerprint, path))
+        return verdict
+
+
+def cached_verdict(key: str, path: str) -> Optional[str]:
+    """The verdict this process already holds for ``key`` on ``path``, if any."""
+    return _cache_get(_fingerprint(key), path) if key else None
 
 
 def _cache_put(fingerprint: str, path: str, verdict: str, ttl: float) -> None:
-    if len(_VERDICT_CACHE) >= _CACHE_MAX:
-        _VERDICT_CACHE.clear()
-    _VERDICT_CACHE[(fingerprint, path)] = (verdict, time.time() + max(0.0, ttl))
+    with _verdict_lock:
+        _VERDICT_CACHE[(fingerprint, path)] = (verdict, time.time() + max(0.0, ttl))
+        _VERDICT_CACHE.move_to_end((fingerprint, path))
+        while len(_VERDICT_CACHE) > _CACHE_MAX:
+            _VERDICT_CACHE.popitem(last=False)
 
 
 def clear_cache() -> None:
-    _VERDICT_CACHE.clear()
+    global _batch_retry_at
+    _batch_retry_at = 0.0
+    with _verdict_lock:
+        _VERDICT_CACHE.clear()
+    db = _shared_db()
+    if db is not None:
+        try:
+            db.execute("DELETE FROM verdicts")
+        except sqlite3.Error:
+            pass
     clear_tiers_cache()
 
 
-def _post(route: str, payload: dict, timeout: float) -> Optional[dict]:
-    """Signed POST to the hub. Returns the decoded body, or None on any failure."""
-    secret = _secret()
-    if not secret:
+# ---------------------------------------------------------------------------
+# The cross-worker verdict cache (opt-in: HUB_VERDICT_CACHE_FILE)
+# ---------------------------------------------------------------------------
+#
+# Each gunicorn worker holds its own LRU, so an agent whose requests are
+# spread over four workers is verified four times per path. Pointing
+# HUB_VERDICT_CACHE_FILE at a SQLite file lets the workers on one host share
+# verdicts — allow and deny alike, so a revoked key is refused once for the
+# whole host. Rows hold the key FINGERPRINT, never the key (see
+# _fingerprint), and carry their own expiry, so a verdict read from here is
+# exactly as fresh as it would have been in memory.
+#
+# Strictly best-effort: a locked, missing or corrupt database degrades to the
+# per-process cache, and never to a verdict.
+
+_SHARED_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS verdicts ("
+    " fingerprint TEXT NOT NULL, path TEXT NOT NULL, verdict TEXT NOT NULL,"
+    " expires_at REAL NOT NULL, PRIMARY KEY (fingerprint, path))"
+)
+# Expired rows are swept on every Nth write rather than on read.
+_SHARED_SWEEP_EVERY = 256
+_shared_local = threading.local()
+# Request threads write concurrently; the count is read-modify-write.
+_shared_writes_lock = threading.Lock()
+_shared_writes = 0
+
+
+def _shared_enabled() -> bool:
+    path = os.getenv("HUB_VERDICT_CACHE_FILE")
+    return bool(path) and path != "0"
+
+
+async def _off_loop(func, *args):
+    """``func(*args)``, on a thread when it may touch the shared cache: SQLite
+    waits on disk and on other workers' locks, and an event loop must not."""
+    if not _shared_enabled():
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+def _shared_db() -> Optional[sqlite3.Connection]:
+    """This thread's connection to the shared cache, or None when it is off."""
+    if not _shared_enabled():
         return None
+    path = os.getenv("HUB_VERDICT_CACHE_FILE")
+    held = getattr(_shared_local, "db", None)
+    if held is not None and held[0] == path and held[1] == os.getpid():
+        return held[2]
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, timeout=0.5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(_SHARED_SCHEMA)
+    except (OSError, sqlite3.Error) as exc:
+        logger.debug("hub verdict cache unavailable (%s)", exc)
+        return None
+    # Keyed by pid too: a connection must not cross a fork.
+    _shared_local.db = (path, os.getpid(), db)
+    return db
 
-    import requests
 
+def _shared_get(fingerprint: str, path: str) -> Optional[Tuple[str, float]]:
+    db = _shared_db()
+    if db is None:
+        return None
+    try:
+        row = db.execute(
+            "SELECT verdict, expires_at FROM verdicts"
+            " WHERE fingerprint = ? AND path = ? AND expires_at > ?",
+            (fingerprint, path, time.time()),
+        ).fetchone()
+    except sqlite3.Error as exc:
+        logger.debug("hub verdict cache read failed (%s)", exc)
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def _shared_put(fingerprint: str, path: str, verdict: str, ttl: float) -> None:
+    global _shared_writes
+    db = _shared_db()
+    if db is None:
+        return
+    now = time.time()
+    try:
+        db.execute(
+            "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?)",
+            (fingerprint, path, verdict, now + max(0.0, ttl)),
+        )
+        with _shared_writes_lock:
+            _shared_writes += 1
+            sweep = _shared_writes % _SHARED_SWEEP_EVERY == 0
+        if sweep:
+            db.execute("DELETE FROM verdicts WHERE expires_at <= ?", (now,))
+    except sqlite3.Error as exc:
+        logger.debug("hub verdict cache write failed (%s)", exc)
+
+
+def _signed(payload: dict) -> Tuple[bytes, Dict[str, str]]:
+    """The body and headers of a signed hub call."""
     from lib.constants import internal_ua
 
     # Sign the exact bytes sent — serialise once, sign that.
     body = json.dumps(payload).encode()
     ts = str(int(time.time()))
     signature = hmac.new(
-        secret.encode(), f"{ts}.".encode() + body, hashlib.sha256
+        _secret().encode(), f"{ts}.".encode() + body, hashlib.sha256
     ).hexdigest()
+    return body, {
+        "Content-Type": "application/json",
+        "X-AI-Canvas-Timestamp": ts,
+        "X-AI-Canvas-Signature": signature,
+        "X-Satellite-App": app_id(),
+        # Internal-traffic contract (lib/constants.INTERNAL_UA): these
+        # are satellite→hub machine calls, and a key verification is
+        # not a reader of 2plot.dev's documentation.
+        "User-Agent": internal_ua("hub-client"),
+    }
 
-    try:
-        response = requests.post(
-            f"{hub_url()}{route}",
-            data=body,
-            timeout=timeout,
-            headers={
-                "Content-Type": "application/json",
-                "X-AI-Canvas-Timestamp": ts,
-                "X-AI-Canvas-Signature": signature,
-                "X-Satellite-App": app_id(),
-                # Internal-traffic contract (lib/constants.INTERNAL_UA): these
-                # are satellite→hub machine calls, and a key verification is
-                # not a reader of 2plot.dev's documentation.
-                "User-Agent": internal_ua("hub-client"),
-            },
-        )
-    except Exception as exc:  # noqa: BLE001 — DNS, TLS, timeouts all land here
-        logger.debug("hub %s unreachable: %r", route, exc)
-        return None
 
+def _decoded(route: str, response) -> Optional[dict]:
+    """The JSON object a hub response carries, or None. Either client's
+    response works: both spell ``status_code`` and ``json()`` the same."""
     if response.status_code != 200:
         logger.debug("hub %s returned HTTP %s", route, response.status_code)
         return None
@@ -173,10 +368,65 @@ def _post(route: str, payload: dict, timeout: float) -> Optional[dict]:
     return decoded if isinstance(decoded, dict) else None
 
 
+def _post(route: str, payload: dict, timeout: float) -> Optional[dict]:
+    """Signed POST to the hub. Returns the decoded body, or None on any failure."""
+    if not _secret():
+        return None
+
+    import requests
+
+    body, headers = _signed(payload)
+    try:
+        with request_timing.timed("hub"):
+            response = requests.post(
+                f"{hub_url()}{route}", data=body, timeout=timeout, headers=headers,
+            )
+    except Exception as exc:  # noqa: BLE001 — DNS, TLS, timeouts all land here
+        logger.debug("hub %s unreachable: %r", route, exc)
+        return None
+    return _decoded(route, response)
+
+
+# One pooled client per event loop: an httpx.AsyncClient's connections belong
+# to the loop that opened them. Weak, so a loop that goes away takes its
+# client with it.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _async_client():
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient()
+    return client
+
+
+async def _post_async(route: str, payload: dict, timeout: float) -> Optional[dict]:
+    """:func:`_post` on the running event loop — the same signature, the same
+    failures, and no thread parked while the hub answers."""
+    if not _secret():
+        return None
+
+    body, headers = _signed(payload)
+    try:
+        with request_timing.timed("hub"):
+            response = await _async_client().post(
+                f"{hub_url()}{route}", content=body, timeout=timeout, headers=headers,
+            )
+    except Exception as exc:  # noqa: BLE001 — DNS, TLS, timeouts all land here
+        logger.debug("hub %s unreachable: %r", route, exc)
+        return None
+    return _decoded(route, response)
+
+
 def verify(key: str, path: str, tier: str, timeout: float = 3.0) -> str:
     """``allow`` | ``gated`` | ``deny`` for an agent fetch carrying ``key``.
 
-    Cached on (key fingerprint, path). Anything unexpected is ``gated``.
+    Cached on (key fingerprint, path) — in this process, then in the shared
+    cache when one is configured — and coalesced, so concurrent misses for
+    one pair send one POST. Anything unexpected is ``gated``.
     """
     if not key:
         return "gated"
@@ -190,11 +440,74 @@ def verify(key: str, path: str, tier: str, timeout: float = 3.0) -> str:
         logger.debug("hub verify skipped: no CROSS_APP_WEBHOOK_SECRET")
         return "gated"
 
-    decoded = _post(
-        "/api/agent-key/verify",
-        {"key": key, "path": path, "tier": tier, "app": app_id()},
-        timeout,
-    )
+    pair = (fingerprint, path)
+    flight, leader = _join_flight(pair)
+    if not leader:
+        # Bounded by the leader's own timeout; an abandoned wait fails safe.
+        flight.done.wait(timeout + 1.0)
+        return flight.verdict or "gated"
+
+    verdict = None
+    try:
+        verdict = _shared_verdict(fingerprint, path)
+        if verdict is None:
+            verdict = _record_verdict(fingerprint, path, _post(
+                "/api/agent-key/verify",
+                {"key": key, "path": path, "tier": tier, "app": app_id()},
+                timeout,
+            ))
+        return verdict
+    finally:
+        _land(pair, flight, verdict)
+
+
+async def verify_async(key: str, path: str, tier: str, timeout: float = 3.0) -> str:
+    """:func:`verify` for an event loop: the same caches and the same single
+    flight (a coroutine and a thread missing on one pair still send one
+    POST), with the hub call awaited rather than blocking a thread."""
+    if not key:
+        return "gated"
+
+    fingerprint = _fingerprint(key)
+    cached = _cache_get(fingerprint, path)
+    if cached is not None:
+        return cached
+
+    if not enabled():
+        return "gated"
+
+    pair = (fingerprint, path)
+    flight, leader = _join_flight(pair)
+    if not leader:
+        return (await flight.wait_async(timeout + 1.0)) or "gated"
+
+    verdict = None
+    try:
+        verdict = await _off_loop(_shared_verdict, fingerprint, path)
+        if verdict is None:
+            decoded = await _post_async(
+                "/api/agent-key/verify",
+                {"key": key, "path": path, "tier": tier, "app": app_id()},
+                timeout,
+            )
+            verdict = await _off_loop(_record_verdict, fingerprint, path, decoded)
+        return verdict
+    finally:
+        _land(pair, flight, verdict)
+
+
+def _shared_verdict(fingerprint: str, path: str) -> Optional[str]:
+    """A verdict another worker already obtained, promoted into this one."""
+    shared = _shared_get(fingerprint, path)
+    if shared is None:
+        return None
+    verdict, expires_at = shared
+    _cache_put(fingerprint, path, verdict, expires_at - time.time())
+    return verdict
+
+
+def _record_verdict(fingerprint: str, path: str, decoded: Optional[dict]) -> str:
+    """Cache and return the verdict a verify response carries."""
     if decoded is None:
         return "gated"
 
@@ -204,15 +517,139 @@ def verify(key: str, path: str, tier: str, timeout: float = 3.0) -> str:
         return "gated"
 
     # The hub may set the TTL; fall back to ours. allow outlives deny.
-    default_ttl = ALLOW_TTL_S if verdict == "allow" else DENY_TTL_S
-    try:
-        ttl = float(decoded.get("ttl", default_ttl))
-    except (TypeError, ValueError):
-        ttl = default_ttl
+    ttl = _verdict_ttl(verdict, decoded.get("ttl"))
     _cache_put(fingerprint, path, verdict, ttl)
+    _shared_put(fingerprint, path, verdict, ttl)
     return verdict
 
 
+# A hub that predates verify-many answers it 404, which _post reports like an
+# outage. Either way, stop batching for a while rather than paying a failed
+# batch before every single verify.
+BATCH_FAILURE_BACKOFF_S = 60.0
+# Paths per batch POST; a corpus larger than this takes a few round trips.
+_BATCH_MAX = 256
+_batch_retry_at = 0.0
+
+
+def _verdict_ttl(verdict: str, raw) -> float:
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return ALLOW_TTL_S if verdict == "allow" else DENY_TTL_S
+
+
+def batch_ready() -> bool:
+    """Whether a verify-many could be sent now: the hub is configured and not
+    in batch backoff. Checked before anyone assembles a batch, so a keyed
+    miss with the hub off or backing off costs nothing but the verify."""
+    return enabled() and _batch_retry_at <= time.time()
+
+
+def verify_many(key: str, paths: Dict[str, str], timeout: float = 3.0) -> Dict[str, str]:
+    """Verdicts for one ``key`` on many ``{path: tier}`` pairs, in one POST.
+
+    Each verdict obtained — from this process's cache, the shared cache, or
+    the hub — is cached exactly as :func:`verify` would have cached it, so
+    the crawl that follows is all hits. Paths the hub did not answer (or the
+    whole batch, when the hub is down or predates the endpoint) are simply
+    absent from the result: the caller falls back to :func:`verify`, which
+    owns the fail-safe. A batch never manufactures a verdict.
+
+    Coalesced per key like :func:`verify` is per pair: concurrent first
+    fetches with one key send one batch, and the others read its verdicts
+    from the cache once it lands.
+    """
+    if not key or not paths or not batch_ready():
+        return {}
+    fingerprint = _fingerprint(key)
+    flight, leader = _join_flight(fingerprint, _BATCH_IN_FLIGHT)
+    if not leader:
+        flight.done.wait(timeout + 1.0)
+        return _cached_subset(fingerprint, paths)
+    try:
+        verdicts, chunks = _batch_plan(fingerprint, paths)
+        for chunk in chunks:
+            decoded = _post("/api/agent-key/verify-many",
+                            {"key": key, "paths": chunk, "app": app_id()}, timeout)
+            if not _record_batch(fingerprint, chunk, decoded, verdicts):
+                break
+        return verdicts
+    finally:
+        _land(fingerprint, flight, None, _BATCH_IN_FLIGHT)
+
+
+async def verify_many_async(key: str, paths: Dict[str, str],
+                            timeout: float = 3.0) -> Dict[str, str]:
+    """:func:`verify_many` with the POSTs awaited, in the same single flight."""
+    if not key or not paths or not batch_ready():
+        return {}
+    fingerprint = _fingerprint(key)
+    flight, leader = _join_flight(fingerprint, _BATCH_IN_FLIGHT)
+    if not leader:
+        await flight.wait_async(timeout + 1.0)
+        return _cached_subset(fingerprint, paths)
+    try:
+        verdicts, chunks = await _off_loop(_batch_plan, fingerprint, paths)
+        for chunk in chunks:
+            decoded = await _post_async("/api/agent-key/verify-many",
+                                        {"key": key, "paths": chunk, "app": app_id()},
+                                        timeout)
+            if not await _off_loop(_record_batch, fingerprint, chunk, decoded, verdicts):
+                break
+        return verdicts
+    finally:
+        _land(fingerprint, flight, None, _BATCH_IN_FLIGHT)
+
+
+def _cached_subset(fingerprint: str, paths: Dict[str, str]) -> Dict[str, str]:
+    """What another caller's batch left in this process's cache for ``paths``."""
+    verdicts = {}
+    for path in paths:
+        cached = _cache_get(fingerprint, path)
+        if cached is not None:
+            verdicts[path] = cached
+    return verdicts
+
+
+def _batch_plan(fingerprint: str, paths: Dict[str, str]):
+    """(verdicts already known, chunks still to ask the hub)."""
+    verdicts: Dict[str, str] = {}
+    missing: Dict[str, str] = {}
+    for path, tier in paths.items():
+        cached = _cache_get(fingerprint, path)
+        if cached is None:
+            cached = _shared_verdict(fingerprint, path)
+        if cached is not None:
+            verdicts[path] = cached
+        else:
+            missing[path] = tier
+
+    pending = list(missing.items())
+    return verdicts, [dict(pending[start:start + _BATCH_MAX])
+                      for start in range(0, len(pending), _BATCH_MAX)]
+
+
+def _record_batch(fingerprint: str, chunk: Dict[str, str], decoded: Optional[dict],
+                  verdicts: Dict[str, str]) -> bool:
+    """Cache one batch answer into ``verdicts``; False (and back off) when
+    the hub gave none."""
+    global _batch_retry_at
+    answered = decoded.get("verdicts") if isinstance(decoded, dict) else None
+    if not isinstance(answered, dict):
+        _batch_retry_at = time.time() + BATCH_FAILURE_BACKOFF_S
+        return False
+    for path, verdict in answered.items():
+        verdict = str(verdict or "").strip().lower()
+        if path not in chunk or verdict not in ("allow", "gated", "deny"):
+            continue
+        ttl = _verdict_ttl(verdict, decoded.get("ttl"))
+        _cache_put(fingerprint, path, verdict, ttl)
+        _shared_put(fingerprint, path, verdict, ttl)
+        verdicts[path] = verdict
+    return True
+
+
 def current_key(token: str, timeout: float = 3.0) -> Optional[str]:
     """This user's current agent key, minted by the hub if needed.
 
@@ -247,59 +684,351 @@ def current_key(token: str, timeout: float = 3.0) -> Optional[str]:
     return key if isinstance(key, str) and key else None
 
 
-# hub_tiers cache: (tiers, expires_at). One entry — the feed is per-app, and
-# this process is one app. A failed fetch caches {} briefly so an outage costs
-# one timeout per FAILURE_TTL_S, not one per request (access.check calls this
-# on every non-public resolution).
+# ---------------------------------------------------------------------------
+# The tier feed: stale-while-revalidate
+# ---------------------------------------------------------------------------
+#
+# access._raw_tier asks for the hub's tiers on every gated render and every
+# check, so the feed must never be fetched ON a request once a snapshot
+# exists. A snapshot is served until REFRESH_AHEAD of its TTL has passed;
+# after that it is STILL served while one background thread fetches its
+# successor. A request waits on the hub only when this process has never
+# seen a good snapshot — not in memory, not in the shared file — and never
+# on an event loop's thread: there the answer is "hub unknown" until the
+# background fetch lands.
+#
+# Serving a stale ceiling is a bounded lag, not a fail-safe: it lags the hub
+# in both directions. A ceiling the hub loosened keeps a page gated a little
+# longer than the admin asked; one the hub TIGHTENED keeps the page open
+# longer than asked — up to a TTL plus one refresh. That window is the price
+# of never fetching on a request; a ceiling that must bite at once needs the
+# hub to reach every satellite another way. A failed refresh keeps the last good
+# tiers and retries after TIERS_FAILURE_TTL_S; with no good tiers ever
+# fetched it caches {} ("hub unknown" -> the local tier), as it always has.
+#
+# Workers share the last good snapshot through a small JSON file next to the
+# page-visibility store (HUB_TIERS_FILE overrides; 0 turns sharing off), and
+# a non-blocking flock lease lets one worker at a time refresh it — the
+# others adopt what it wrote instead of each paying their own round trip.
 TIERS_TTL_S = 900.0
 TIERS_FAILURE_TTL_S = 60.0
-_TIERS_CACHE: Tuple[Dict[str, str], float] = ({}, 0.0)
+TIERS_REFRESH_AHEAD = 0.8
+# How long a worker that lost the lease waits before looking again.
+_LEASE_BUSY_RETRY_S = 1.0
+
+# (tiers, refresh_at, fetched_at). fetched_at == 0: no good snapshot held.
+_TIERS_CACHE: Tuple[Dict[str, str], float, float] = ({}, 0.0, 0.0)
+# Held for the duration of a fetch — the single flight. Never taken by a
+# request that has a snapshot to serve, nor by anything on an event loop.
+_fetch_lock = threading.Lock()
+# (loop, future) of the cold fetch a coroutine is awaiting: the async single
+# flight. A threading lock cannot be it — held across an await, a sync caller
+# on that loop's own thread would wait for a holder that can never resume.
+_TIERS_FLIGHT: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = None
+# Bumped by clear_tiers_cache so a refresh already in flight cannot write
+# back tiers from before the clear.
+_generation = 0
+# mtime_ns of the shared file as last read, so adoption is a stat, not a parse.
+_shared_seen = 0
+
+
+def _reset_after_fork() -> None:
+    # A fork taken mid-refresh (gunicorn --preload) copies a held lock whose
+    # owning thread does not exist in the child.
+    global _fetch_lock, _shared_writes_lock, _verdict_lock, _TIERS_FLIGHT
+    _fetch_lock = threading.Lock()
+    _TIERS_FLIGHT = None
+    _shared_writes_lock = threading.Lock()
+    # Likewise a flight the parent was flying: nobody in the child lands it.
+    _verdict_lock = threading.Lock()
+    _IN_FLIGHT.clear()
+    _BATCH_IN_FLIGHT.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _shared_path() -> Optional[Path]:
+    raw = os.getenv("HUB_TIERS_FILE")
+    if raw == "0":
+        return None
+    if raw:
+        return Path(raw)
+    # Beside lib.page_visibility's store, resolved the same way.
+    store = Path(os.getenv("PAGE_VISIBILITY_FILE") or "page_visibility.json")
+    return store.parent / "hub_tiers.json"
 
 
 def clear_tiers_cache() -> None:
+    global _TIERS_CACHE, _generation, _shared_seen
+    _TIERS_CACHE = ({}, 0.0, 0.0)
+    _generation += 1
+    _shared_seen = 0
+    path = _shared_path()
+    if path is not None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _refresh_at(fetched_at: float, ttl: float) -> float:
+    return fetched_at + max(0.0, ttl) * TIERS_REFRESH_AHEAD
+
+
+def _adopt_shared() -> None:
+    """Take the shared snapshot when another worker fetched a newer one."""
+    global _TIERS_CACHE, _shared_seen
+    path = _shared_path()
+    if path is None:
+        return
+    try:
+        mtime = path.stat().st_mtime_ns
+        if mtime == _shared_seen:
+            return
+        data = json.loads(path.read_text(encoding="utf-8"))
+        _shared_seen = mtime
+        # The file sits in a directory other deployments may share; a
+        # snapshot from another app or another hub is not ours to serve.
+        if data.get("app") != app_id() or data.get("hub") != hub_url():
+            return
+        tiers = {str(p): str(t) for p, t in data["tiers"].items()}
+        fetched_at, ttl = float(data["fetched_at"]), float(data["ttl"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return
+    if fetched_at > _TIERS_CACHE[2]:
+        _TIERS_CACHE = (tiers, _refresh_at(fetched_at, ttl), fetched_at)
+
+
+def _publish(tiers: Dict[str, str], fetched_at: float, ttl: float) -> None:
+    global _shared_seen
+    path = _shared_path()
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "app": app_id(), "hub": hub_url(), "tiers": tiers,
+            "fetched_at": fetched_at, "ttl": ttl,
+        }), encoding="utf-8")
+        os.replace(tmp, path)
+        _shared_seen = path.stat().st_mtime_ns
+    except OSError as exc:
+        # Sharing is an optimisation; this worker keeps its own snapshot.
+        logger.debug("hub tiers not shared (%s)", exc)
+
+
+@contextmanager
+def _lease(blocking: bool):
+    """Yield True when this process holds the cross-worker refresh lease."""
+    path = _shared_path()
+    if fcntl is None or path is None:
+        yield True
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(path.with_name(path.name + ".lock"), "a+")
+    except OSError:
+        yield True
+        return
+    try:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+    finally:
+        fh.close()
+
+
+def _fetch_tiers(timeout: float, generation: int) -> None:
+    """One signed POST to /api/page-tiers; the result lands in _TIERS_CACHE.
+
+    The caller holds _fetch_lock.
+    """
+    _install_tiers(_post("/api/page-tiers", {"app": app_id()}, timeout), generation)
+
+
+def _install_tiers(decoded: Optional[dict], generation: int) -> None:
+    """Land a /api/page-tiers answer (None for a failed call) in the cache."""
     global _TIERS_CACHE
-    _TIERS_CACHE = ({}, 0.0)
+    raw = decoded.get("tiers") if isinstance(decoded, dict) else None
+    if generation != _generation:
+        return
+    now = time.time()
+    if not isinstance(raw, dict):
+        # Keep serving the last good tiers, if any; retry after the window.
+        tiers, _, fetched_at = _TIERS_CACHE
+        _TIERS_CACHE = (tiers, now + TIERS_FAILURE_TTL_S, fetched_at)
+        return
+
+    # Keep only well-formed entries; a junk value must not become a tier.
+    tiers = {
+        str(path): str(tier).strip().lower()
+        for path, tier in raw.items()
+        if isinstance(path, str) and isinstance(tier, str)
+    }
+
+    try:
+        ttl = float(decoded.get("ttl", TIERS_TTL_S))
+    except (TypeError, ValueError):
+        ttl = TIERS_TTL_S
+    _TIERS_CACHE = (tiers, _refresh_at(now, ttl), now)
+    _publish(tiers, now, ttl)
+
+
+def _refresh(timeout: float, generation: int) -> None:
+    """Background body: refresh unless another worker is already doing it."""
+    global _TIERS_CACHE
+    try:
+        with _lease(blocking=False) as held:
+            if not held:
+                tiers, _, fetched_at = _TIERS_CACHE
+                _TIERS_CACHE = (tiers, time.time() + _LEASE_BUSY_RETRY_S,
+                                fetched_at)
+                return
+            # The lease holder before us may have just written a fresh one.
+            _adopt_shared()
+            if _TIERS_CACHE[1] > time.time():
+                return
+            _fetch_tiers(timeout, generation)
+    except Exception:  # noqa: BLE001 — a refresh must never kill its thread noisily
+        logger.debug("hub tiers refresh failed", exc_info=True)
+    finally:
+        _fetch_lock.release()
+
+
+def _on_event_loop() -> bool:
+    """Whether this thread is running an event loop right now."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _refresh_in_background(timeout: float) -> bool:
+    """Start the one refresh; False when one is already in flight."""
+    if not _fetch_lock.acquire(blocking=False):
+        return False
+    try:
+        threading.Thread(
+            target=_refresh, args=(timeout, _generation),
+            name="hub-tiers-refresh", daemon=True,
+        ).start()
+    except Exception:
+        _fetch_lock.release()
+        raise
+    return True
+
+
+def prime_tiers(timeout: float = 3.0) -> None:
+    """Fetch the feed in the background now, so no request has to.
+
+    Called when access control switches on (lib.access.configure). A worker
+    that finds a snapshot in the shared file adopts it instead.
+    """
+    if not enabled():
+        return
+    _adopt_shared()
+    if _TIERS_CACHE[1] <= time.time():
+        _refresh_in_background(timeout)
 
 
 def hub_tiers(timeout: float = 3.0) -> Dict[str, str]:
     """Tiers published by the hub — the ceiling for this site's pages.
 
     Signed POST ``/api/page-tiers`` with ``{"app": app_id()}`` →
-    ``{"tiers": {path: tier}, "ttl": seconds}``, cached for the returned TTL.
-    Each fetch is recorded hub-side — the hub admin's "last pulled" indicator
-    is how a published ceiling is confirmed to have landed on this satellite.
-
-    Every failure returns ``{}``, meaning "hub unknown", which
-    `page_tiers.effective_tier` resolves to the local value. The ceiling only
-    ever restricts, so an outage loosens nothing — and an outage that served
-    a ceiling a moment ago degrades to the local tier, never below it.
+    ``{"tiers": {path: tier}, "ttl": seconds}``, refreshed in the background
+    ahead of the returned TTL (see the section comment above). Each fetch is
+    recorded hub-side — the hub admin's "last pulled" indicator is how a
+    published ceiling is confirmed to have landed on this satellite.
+
+    Every failure with no good snapshot to fall back on returns ``{}``,
+    meaning "hub unknown", which `page_tiers.effective_tier` resolves to the
+    local value. The ceiling only ever restricts, so an outage loosens
+    nothing that was not already loose locally. A stale snapshot, though,
+    lags the hub both ways: a loosened ceiling keeps a page gated longer,
+    and a tightened one leaves it open longer than the admin asked — up to
+    a TTL plus one refresh (see the section comment above).
     """
     global _TIERS_CACHE
-    tiers, expires_at = _TIERS_CACHE
-    if expires_at > time.time():
+    tiers, refresh_at, fetched_at = _TIERS_CACHE
+    if refresh_at > time.time():
         return tiers
 
     if not enabled():
         # No secret -> nobody to authenticate as; don't re-check every request.
-        _TIERS_CACHE = ({}, time.time() + TIERS_FAILURE_TTL_S)
+        _TIERS_CACHE = ({}, time.time() + TIERS_FAILURE_TTL_S, 0.0)
         return {}
 
-    decoded = _post("/api/page-tiers", {"app": app_id()}, timeout)
-    raw = decoded.get("tiers") if isinstance(decoded, dict) else None
-    if not isinstance(raw, dict):
-        _TIERS_CACHE = ({}, time.time() + TIERS_FAILURE_TTL_S)
-        return {}
+    _adopt_shared()
+    tiers, refresh_at, fetched_at = _TIERS_CACHE
+    if refresh_at > time.time():
+        return tiers
+    if fetched_at:
+        # Stale but good: serve it, and let one thread fetch the next.
+        _refresh_in_background(timeout)
+        return tiers
 
-    # Keep only well-formed entries; a junk value must not become a tier.
-    tiers = {
-        str(path): str(tier).strip().lower()
-        for path, tier in raw.items()
-        if isinstance(path, str) and isinstance(tier, str)
-    }
+    if _on_event_loop():
+        # Dash runs sync callbacks on the loop's thread under FastAPI; a wait
+        # here stalls every request, and the fetch it would wait on may be a
+        # coroutine of this same loop. "Hub unknown" now, the tiers shortly.
+        if _TIERS_FLIGHT is None:
+            _refresh_in_background(timeout)
+        return tiers
 
+    # Nothing to serve yet. One request fetches; concurrent ones wait for it
+    # (the same wait they would each have paid) and share its answer.
+    with _fetch_lock:
+        if _TIERS_CACHE[1] <= time.time():
+            with _lease(blocking=True):
+                _adopt_shared()
+                if _TIERS_CACHE[1] <= time.time():
+                    _fetch_tiers(timeout, _generation)
+    return _TIERS_CACHE[0]
+
+
+async def hub_tiers_async(timeout: float = 3.0) -> Dict[str, str]:
+    """:func:`hub_tiers` without blocking an event loop.
+
+    Every warm answer is :func:`hub_tiers`' own — it never waits when it has
+    something to serve. The one call that would, the first fetch of a cold
+    process, is awaited here instead, and coroutines that arrive while it is
+    in flight await the same future. A fetch a thread already has in flight
+    is not waited on: the loop answers "hub unknown" until it lands.
+    """
+    global _TIERS_FLIGHT
+    tiers, refresh_at, fetched_at = _TIERS_CACHE
+    if fetched_at or refresh_at > time.time() or not enabled():
+        return hub_tiers(timeout)
+    _adopt_shared()
+    if _TIERS_CACHE[1] > time.time():
+        return _TIERS_CACHE[0]
+
+    loop = asyncio.get_running_loop()
+    flight = _TIERS_FLIGHT
+    if flight is not None and flight[0] is loop:
+        await asyncio.shield(flight[1])
+        return _TIERS_CACHE[0]
+    if _fetch_lock.locked():
+        return _TIERS_CACHE[0]
+
+    future = loop.create_future()
+    _TIERS_FLIGHT = (loop, future)
     try:
-        ttl = float(decoded.get("ttl", TIERS_TTL_S))
-    except (TypeError, ValueError):
-        ttl = TIERS_TTL_S
-    _TIERS_CACHE = (tiers, time.time() + max(0.0, ttl))
-    return tiers
+        generation = _generation
+        decoded = await _post_async("/api/page-tiers", {"app": app_id()}, timeout)
+        _install_tiers(decoded, generation)
+    finally:
+        if _TIERS_FLIGHT is not None and _TIERS_FLIGHT[1] is future:
+            _TIERS_FLIGHT = None
+        future.set_result(None)
+    return _TIERS_CACHE[0]
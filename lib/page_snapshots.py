@@ -0,0 +1,563 @@
+"""Pre-serialized docs pages — page navigation without re-serializing the tree.
+
+Every client-side navigation is one POST to ``/_dash-update-component`` for
+Dash Pages' router callback. Dash answers it by calling the page's layout
+(``lib/gate_layouts.gated_layout``), then JSON-encoding the whole component
+tree — on /backends that is ~31KB of code tabs, tables and headings walked
+and encoded afresh, ~9ms per navigation, for content that cannot change
+until the process restarts. The tree is built once in ``pages/markdown.py``;
+this module makes its encoding a one-off too.
+
+With ``PAGE_SNAPSHOTS=1`` a navigation to a recorded docs page is answered
+here, in front of the framework, with the response body Dash would have
+produced — same encoder (``dash._utils.to_json``), same envelope — encoded
+on the first request for that (page, verdict) and replayed byte for byte
+after, with a gzip twin served to clients whose ``Accept-Encoding`` allows
+it. (gzip only: it is stdlib, and brotli would be a new entry in
+requirements.txt for a few percent on already-small bodies.) The same snapshot is published
+as its layout JSON and as a static HTML fragment at
+``/_dash-page-snapshot?path=/<page>&format=json|html``, with a strong
+``ETag`` per representation so a repeat GET with ``If-None-Match`` is a 304.
+
+KEYED BY VERDICT. A snapshot is the page as one verdict renders it — the
+docs tree for ``allow``, the card ``gated_layout`` would have returned for
+``hidden`` / ``forbidden`` / ``sign_in``. Which verdict applies is decided
+per request, without identity, because at this layer identity has not been
+resolved yet (the wrapper runs outside Flask's request context and outside
+the Clerk ASGI middleware):
+
+* :func:`lib.access.identity_free_verdict` answers for public and hidden
+  pages, and for every page while Clerk is unconfigured;
+* a request carrying no credential at all — no ``Authorization`` header, no
+  Clerk or session cookie (:func:`lib.auth.carries_credentials`) — is
+  anonymous, so a gated page's answer is ``sign_in``, exactly what
+  ``resolve_page_access`` says for ``current_user() is None``;
+* anything else (a signed-in visitor on a gated page) falls through to Dash
+  and ``gated_layout`` as before.
+
+The verdict is re-read on every request, so a control-board toggle still
+applies on the next navigation; only its rendering is cached.
+
+Off by default. With the flag unset the wrapper is one env read per request
+on two paths and nothing is ever encoded; ``run.py`` installs it either way
+so the flag applies without a code change.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import html as _html
+import json
+import os
+import threading
+from dataclasses import dataclass
+from urllib.parse import parse_qs
+
+ROUTE = "_dash-page-snapshot"
+
+# Dash's id for the pages router callback — the `output` field of its POST.
+_ROUTER_OUTPUT = ".._pages_content.children..._pages_store.data.."
+
+# A router request is a few hundred bytes. Anything bigger is some other
+# callback's payload and is left in the stream untouched.
+_MAX_PEEK = 16 * 1024
+
+
+def enabled() -> bool:
+    return os.environ.get("PAGE_SNAPSHOTS", "0") == "1"
+
+
+@dataclass(frozen=True)
+class Payload:
+    # content-coding ("identity", "gzip") -> bytes
+    bodies: dict
+    # content-coding -> strong ETag of that representation
+    etags: dict
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    path: str
+    verdict: str
+    # The router callback's complete response body.
+    navigation: Payload
+    # The page tree alone, as Dash would encode it.
+    layout: Payload
+    # A static rendering of the same tree, for consumers without React.
+    html: Payload
+
+
+# stripped path -> (endpoint, name, title, tree), recorded at page registration
+_PAGES: dict[str, tuple[str, str, str, object]] = {}
+# (stripped path, verdict, sign-in destination or None) -> Snapshot, filled
+# on first use. The sign-in card links to a destination that follows the
+# network bulletin, so it is part of that card's key: a new destination is a
+# new snapshot, and the one it replaces is dropped.
+_SNAPSHOTS: dict[tuple[str, str, str | None], Snapshot] = {}
+_lock = threading.Lock()
+
+# The Dash app, for its pathname prefix handling. Set by apply().
+_app = None
+
+
+def record(path: str, name: str, title: str, tree) -> None:
+    """Remember a page's prebuilt tree. Cheap: stores a reference only."""
+    key = path.strip("/")
+    with _lock:
+        _PAGES[key] = (path, name, title, tree)
+        for cached in [k for k in _SNAPSHOTS if k[0] == key]:
+            del _SNAPSHOTS[cached]
+
+
+def page_count() -> int:
+    with _lock:
+        return len(_PAGES)
+
+
+def clear_cache() -> None:
+    with _lock:
+        _SNAPSHOTS.clear()
+
+
+def _payload(body: bytes) -> Payload:
+    """``body`` with its compressed twins, each under its own strong ETag.
+
+    A compressed variant is kept only when it is actually smaller. ``mtime=0``
+    keeps the gzip bytes — and so the ETag — identical across workers.
+    """
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    bodies = {"identity": body}
+    packed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(packed) < len(body):
+        bodies["gzip"] = packed
+    etags = {coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+             for coding in bodies}
+    return Payload(bodies=bodies, etags=etags)
+
+
+def _tree_for(verdict: str, endpoint: str, name: str, tree):
+    """What ``gated_layout`` returns for this verdict."""
+    from lib import gate_layouts
+
+    if verdict == "hidden":
+        return gate_layouts.hidden_layout()
+    if verdict == "sign_in":
+        return gate_layouts.sign_in_layout(name, endpoint)
+    if verdict == "forbidden":
+        return gate_layouts.forbidden_layout(name)
+    return tree
+
+
+def _build(key: str, verdict: str) -> Snapshot | None:
+    from dash._utils import to_json
+
+    with _lock:
+        page = _PAGES.get(key)
+    if page is None:
+        return None
+    endpoint, name, title, tree = page
+    tree = _tree_for(verdict, endpoint, name, tree)
+
+    navigation = to_json({
+        "multi": True,
+        "response": {
+            "_pages_content": {"children": tree},
+            "_pages_store": {"data": {"title": title}},
+        },
+    }).encode("utf-8")
+    return Snapshot(
+        path=endpoint,
+        verdict=verdict,
+        navigation=_payload(navigation),
+        layout=_payload(to_json(tree).encode("utf-8")),
+        html=_payload(render_html(tree).encode("utf-8")),
+    )
+
+
+def _destination(verdict: str) -> str | None:
+    if verdict != "sign_in":
+        return None
+    from lib import gate_layouts
+
+    return gate_layouts._sign_in_destination()
+
+
+def snapshot(path: str, verdict: str = "allow") -> Snapshot | None:
+    """The page at ``path`` as ``verdict`` renders it (built on first use)."""
+    key = (path.strip("/"), verdict, _destination(verdict))
+    with _lock:
+        cached = _SNAPSHOTS.get(key)
+    if cached is not None:
+        return cached
+    built = _build(key[0], verdict)
+    if built is None:
+        return None
+    with _lock:
+        for stale in [k for k in _SNAPSHOTS if k[:2] == key[:2] and k != key]:
+            del _SNAPSHOTS[stale]
+        # Two first requests may both build; the encodings are identical.
+        return _SNAPSHOTS.setdefault(key, built)
+
+
+def _servable(pathname, headers: dict) -> Snapshot | None:
+    """The snapshot this request should get for ``pathname``, or None."""
+    if not isinstance(pathname, str):
+        return None
+    if _app is not None:
+        key = _app.strip_relative_path(pathname) or ""
+    else:
+        key = pathname.strip("/")
+    with _lock:
+        page = _PAGES.get(key)
+    if page is None:
+        return None
+
+    from lib import access, auth
+
+    try:
+        verdict = access.identity_free_verdict(page[0])
+        if verdict is None and not auth.carries_credentials(headers):
+            verdict = "sign_in"
+    except Exception:  # never answer when unsure — Dash will
+        return None
+    if verdict is None:
+        return None
+    return snapshot(key, verdict)
+
+
+def _coding(headers: dict, payload: Payload) -> str:
+    """gzip when we have it and the client's q-values allow it."""
+    accepted = {}
+    for part in (headers.get("accept-encoding") or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token.lower()] = q
+    if "gzip" in payload.bodies and accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return "identity"
+
+
+def _send(payload: Payload, headers: dict, content_type: str, status: int = 200):
+    coding = _coding(headers, payload)
+    out = [("Content-Type", content_type), ("ETag", payload.etags[coding]),
+           ("Vary", "Accept-Encoding, Cookie, Authorization")]
+    if coding != "identity":
+        out.append(("Content-Encoding", coding))
+    return status, out, payload.bodies[coding]
+
+
+def _not_modified(headers: dict, payload: Payload) -> bool:
+    """Does ``If-None-Match`` name any representation of this payload?
+
+    Weak comparison, as RFC 9110 asks of If-None-Match: a tag a client got
+    for the gzip body still matches if it next asks without gzip.
+    """
+    tags = {tag.strip().removeprefix("W/")
+            for tag in (headers.get("if-none-match") or "").split(",")}
+    return "*" in tags or not tags.isdisjoint(payload.etags.values())
+
+
+# An answer is (status, headers, body), shared by both adapters below.
+
+
+def _json_answer(status: int, payload: dict):
+    return status, [("Content-Type", "application/json")], json.dumps(payload).encode()
+
+
+def navigation_answer(body: bytes, headers: dict | None = None):
+    """The answer to a router POST with this body, or None to pass it on.
+
+    No 304 here even when ``If-None-Match`` matches: a conditional POST is a
+    412 under RFC 9110, and dash-renderer treats anything but 200/204 as a
+    failed callback. Revalidation lives on the GET route.
+    """
+    if not enabled() or _ROUTER_OUTPUT.encode() not in body:
+        return None
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if payload.get("output") != _ROUTER_OUTPUT or payload.get("state"):
+        return None
+    pathname = None
+    for item in payload.get("inputs") or []:
+        if item.get("id") == "_pages_location" and item.get("property") == "pathname":
+            pathname = item.get("value")
+    headers = headers or {}
+    snap = _servable(pathname, headers)
+    if snap is None:
+        return None
+    return _send(snap.navigation, headers, "application/json")
+
+
+def snapshot_answer(query_string: str, headers: dict | None = None):
+    """The answer to ``GET /_dash-page-snapshot?<query_string>``."""
+    if not enabled():
+        return _json_answer(404, {"error": "page snapshots are off"})
+    headers = headers or {}
+    params = parse_qs(query_string or "")
+    path = (params.get("path") or [""])[0]
+    fmt = (params.get("format") or ["json"])[0]
+    if fmt not in ("json", "html"):
+        return _json_answer(400, {"error": "format must be json or html"})
+    snap = _servable(path, headers)
+    if snap is None:
+        return _json_answer(404, {"error": "no snapshot for this path"})
+
+    payload = snap.html if fmt == "html" else snap.layout
+    content_type = "text/html; charset=utf-8" if fmt == "html" else "application/json"
+    status, out, body = _send(payload, headers, content_type)
+    out.append(("Cache-Control", "no-cache"))
+    if _not_modified(headers, payload):
+        return 304, [h for h in out if h[0] not in ("Content-Type", "Content-Encoding")], b""
+    return status, out, body
+
+
+# ------------------------------------------------------------------- HTML --
+
+_VOID = {"img", "hr", "br", "input"}
+_SKIP = {"DashIconify", "Store", "Interval", "Graph", "Tooltip"}
+_MANTINE_TAGS = {
+    "Text": "p", "Anchor": "a", "Code": "code", "Blockquote": "blockquote",
+    "List": "ul", "ListItem": "li", "Divider": "hr", "Image": "img",
+    "Table": "table", "TableThead": "thead", "TableTbody": "tbody",
+    "TableTr": "tr", "TableTh": "th", "TableTd": "td",
+    "AppShellAside": "aside", "Button": "button", "Badge": "span",
+}
+
+
+def _attrs(node, tag: str) -> str:
+    pairs = []
+    for prop in ("id", "className"):
+        value = getattr(node, prop, None)
+        if isinstance(value, str):
+            pairs.append(("class" if prop == "className" else prop, value))
+    if tag == "a" and isinstance(getattr(node, "href", None), str):
+        pairs.append(("href", node.href))
+    if tag == "img":
+        for prop in ("src", "alt"):
+            if isinstance(getattr(node, prop, None), str):
+                pairs.append((prop, getattr(node, prop)))
+    return "".join(f' {k}="{_html.escape(v)}"' for k, v in pairs)
+
+
+def _code_block(code: str, language) -> str:
+    cls = f' class="language-{_html.escape(language)}"' if isinstance(language, str) else ""
+    return f"<pre><code{cls}>{_html.escape(code)}</code></pre>"
+
+
+def _render(node, out: list) -> None:
+    from dash.development.base_component import Component
+
+    if node is None or isinstance(node, bool):
+        return
+    if isinstance(node, (str, int, float)):
+        out.append(_html.escape(str(node)))
+        return
+    if isinstance(node, (list, tuple)):
+        for child in node:
+            _render(child, out)
+        return
+    if not isinstance(node, Component):
+        return
+
+    kind = node._type
+    if kind in _SKIP:
+        return
+    if kind == "CodeHighlight":
+        out.append(_code_block(getattr(node, "code", "") or "", getattr(node, "language", None)))
+        return
+    if kind == "CodeHighlightTabs":
+        for tab in getattr(node, "code", None) or []:
+            if isinstance(tab, dict):
+                out.append(_code_block(tab.get("code", ""), tab.get("language")))
+        return
+
+    if node._namespace == "dash_html_components":
+        tag = kind.lower()
+    elif kind == "Title":
+        order = getattr(node, "order", 1)
+        tag = f"h{order if order in (1, 2, 3, 4, 5, 6) else 1}"
+    elif kind == "List" and getattr(node, "type", None) == "ordered":
+        tag = "ol"
+    else:
+        tag = _MANTINE_TAGS.get(kind, "div")
+
+    out.append(f"<{tag}{_attrs(node, tag)}>")
+    if tag in _VOID:
+        return
+    _render(getattr(node, "children", None), out)
+    out.append(f"</{tag}>")
+
+
+def render_html(tree) -> str:
+    """A static HTML rendering of a docs page tree.
+
+    Structure and text only — headings, prose, lists, tables, links and code
+    blocks. Interactive widgets, icons and charts are dropped; this is the
+    page for consumers that do not run React, not a replacement for it.
+    """
+    out: list = []
+    _render(tree, out)
+    return "".join(out)
+
+
+# ------------------------------------------------------------------- WSGI --
+
+
+def _wsgi_headers(environ) -> dict:
+    """The request headers this module reads, lowercased like ASGI's."""
+    return {name: environ.get("HTTP_" + name.upper().replace("-", "_"), "")
+            for name in ("accept-encoding", "authorization", "cookie", "if-none-match")}
+
+
+def _wsgi_snapshots(wsgi_app, prefix: str):
+    update_path = prefix + "_dash-update-component"
+    snapshot_path = prefix + ROUTE
+
+    def respond(start_response, answer, head=False):
+        status, headers, body = answer
+        reason = {200: "OK", 304: "Not Modified", 400: "Bad Request",
+                  404: "Not Found"}.get(status, "")
+        start_response(f"{status} {reason}",
+                       headers + [("Content-Length", str(len(body)))])
+        return [b"" if head else body]
+
+    def middleware(environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        method = environ.get("REQUEST_METHOD", "")
+
+        if path == snapshot_path and method in ("GET", "HEAD"):
+            return respond(start_response, snapshot_answer(
+                environ.get("QUERY_STRING", ""), _wsgi_headers(environ)),
+                head=method == "HEAD")
+
+        if path == update_path and method == "POST" and enabled():
+            try:
+                length = int(environ.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                length = 0
+            if 0 < length <= _MAX_PEEK and not environ.get("HTTP_CONTENT_ENCODING"):
+                import io
+
+                body = environ["wsgi.input"].read(length)
+                # Put the bytes back for Dash whether or not we answer.
+                environ["wsgi.input"] = io.BytesIO(body)
+                answer = navigation_answer(body, _wsgi_headers(environ))
+                if answer is not None:
+                    return respond(start_response, answer)
+
+        return wsgi_app(environ, start_response)
+
+    return middleware
+
+
+# ------------------------------------------------------------------- ASGI --
+
+
+def _asgi_headers(scope) -> dict:
+    return {k.decode("latin-1").lower(): v.decode("latin-1")
+            for k, v in scope.get("headers") or []}
+
+
+def _asgi_snapshots(asgi_app, prefix: str):
+    update_path = prefix + "_dash-update-component"
+    snapshot_path = prefix + ROUTE
+
+    async def respond(send, answer, head=False):
+        status, headers, body = answer
+        raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        raw.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        await send({"type": "http.response.body", "body": b"" if head else body})
+
+    async def middleware(scope, receive, send):
+        if scope.get("type") != "http":
+            return await asgi_app(scope, receive, send)
+        path = scope.get("path", "")
+        method = scope.get("method", "")
+
+        if path == snapshot_path and method in ("GET", "HEAD"):
+            return await respond(send, snapshot_answer(
+                scope.get("query_string", b"").decode("latin-1"), _asgi_headers(scope)),
+                head=method == "HEAD")
+
+        if path == update_path and method == "POST" and enabled():
+            headers = _asgi_headers(scope)
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = 0
+            if 0 < length <= _MAX_PEEK and "content-encoding" not in headers:
+                messages, chunks = [], []
+                while True:
+                    message = await receive()
+                    messages.append(message)
+                    if message.get("type") != "http.request":
+                        break
+                    chunks.append(message.get("body", b""))
+                    if not message.get("more_body"):
+                        break
+                answer = navigation_answer(b"".join(chunks), headers)
+                if answer is not None:
+                    return await respond(send, answer)
+
+                # Replay what was read, then hand the stream back.
+                pending = iter(messages)
+
+                async def replay():
+                    for message in pending:
+                        return message
+                    return await receive()
+
+                return await asgi_app(scope, replay, send)
+
+        return await asgi_app(scope, receive, send)
+
+    return middleware
+
+
+class _StarletteSnapshots:
+    """`_asgi_snapshots` in the shape Starlette's `add_middleware` expects."""
+
+    def __init__(self, app, prefix: str = "/"):
+        self._inner = _asgi_snapshots(app, prefix)
+
+    async def __call__(self, scope, receive, send):
+        return await self._inner(scope, receive, send)
+
+
+# ------------------------------------------------------------------ apply --
+
+
+def apply(app, backend: str) -> bool:
+    """Install the snapshot front on ``app.server``; True once installed.
+
+    Installed whether or not ``PAGE_SNAPSHOTS`` is set — :func:`enabled` is
+    read per request — and wrapped the way ``lib/proxy.py`` wraps, for the
+    same reasons: never rebind ``app.server``, and sit in front of anything
+    that could answer first.
+    """
+    global _app
+    _app = app
+    prefix = app.config.routes_pathname_prefix or "/"
+
+    if backend == "fastapi":
+        app.server.add_middleware(_StarletteSnapshots, prefix=prefix)
+        return True
+
+    if backend == "quart":
+        if not hasattr(app.server, "asgi_app"):  # pragma: no cover - old Quart
+            return False
+        app.server.asgi_app = _asgi_snapshots(app.server.asgi_app, prefix)
+        return True
+
+    app.server.wsgi_app = _wsgi_snapshots(app.server.wsgi_app, prefix)
+    return True
@@ -29,19 +29,32 @@ to ``public``. A component library's documentation must never brick because a
 deploy forgot a credential. ``hidden`` still holds, because it means "there is
 nothing here", not "you may not read this yet".
 
+**Sections, not only pages.** A site with thousands of generated pages gates
+them by rule rather than by frontmatter: :func:`register_rule` takes a
+path pattern — ``*`` matches one path segment, a trailing ``**`` matches
+everything below (``/internal/**`` is the ``/internal`` section, index
+included). ``PAGE_TIER_RULES`` does the same from the environment
+(``/internal/**=admin,/api/*/private=auth``). A page's own frontmatter tier
+beats any rule, and between rules the most specific pattern wins. The rules
+are compiled into a segment trie and each path's match is memoized, so a
+lookup never scans the rule list.
+
 **The hub sets the ceiling.** Once ``2plot.dev`` publishes tiers, the effective
 tier is the *more restrictive* of the hub's and this site's. A satellite can
 lock its own page down further; it can never loosen what the hub restricted.
 That direction is deliberate: a satellite misconfiguration then cannot expose
 something the network gated, and "loosen this page" stays a hub action, which
-is where that authority belongs.
+is where that authority belongs. The hub may publish patterns too; every
+ceiling that matches a path applies, the strictest winning
+(:func:`ceiling_for`).
 """
 
 from __future__ import annotations
 
 import logging
 import os
-from typing import Dict, Optional
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -57,8 +70,63 @@ def _default_tier() -> str:
     return tier
 
 
+class VersionedDict(dict):
+    """A dict that counts its own mutations.
+
+    lib.access compiles every page's decision once and rebuilds only when an
+    input moved; the ledgers it reads from are plain module-level dicts that
+    registration, the control board and the tests all write to directly. A
+    counter bumped by every mutating method is what lets "did anything
+    change?" be one integer comparison. Nested values are not watched — no
+    ledger here mutates one in place without also going through a method on
+    this dict.
+    """
+
+    version = 0
+
+    def _bump(self) -> None:
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._bump()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._bump()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._bump()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._bump()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._bump()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._bump()
+        return result
+
+    def setdefault(self, key, default=None):
+        # Bumps even on a hit: the caller usually mutates what it got back.
+        result = super().setdefault(key, default)
+        self._bump()
+        return result
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._bump()
+
+
 # endpoint -> tier, populated from frontmatter as pages/markdown.py loads docs.
-_LOCAL_TIERS: Dict[str, str] = {}
+_LOCAL_TIERS: Dict[str, str] = VersionedDict()
 
 # endpoint -> machine-surface openness, the SECOND axis. `tier` answers "who
 # may use the page in a browser"; `llms_public` answers "does the machine
@@ -68,7 +136,11 @@ _LOCAL_TIERS: Dict[str, str] = {}
 # so the later agent flip is one env change (`LLMS_PUBLIC_DEFAULT=0`), not a
 # code change. Only meaningful on `auth` pages: `public` needs no exemption,
 # and `admin`/`hidden` must never leak through a machine surface.
-_LOCAL_LLMS_PUBLIC: Dict[str, bool] = {}
+_LOCAL_LLMS_PUBLIC: Dict[str, bool] = VersionedDict()
+
+# Registered paths whose tier was not declared: they carry the default they
+# were registered under, and a section rule, when one matches, beats it.
+_INHERITED: set = set()
 
 _FALSE_VALUES = ("0", "false", "no", "off")
 
@@ -101,6 +173,10 @@ def register(path: str, tier: Optional[str],
             path, tier, TIERS, _default_tier(),
         )
         resolved = _default_tier()
+    if tier is None:
+        _INHERITED.add(normalize(path))
+    else:
+        _INHERITED.discard(normalize(path))
     _LOCAL_TIERS[normalize(path)] = resolved
     # Declarative: a registration fully describes the page, so None does not
     # mean "keep whatever was pinned before" — it clears the pin and defers
@@ -116,18 +192,212 @@ def get_llms_public(path: str) -> bool:
     """Whether ``path``'s machine twin stays open to anonymous fetches.
 
     Read at verdict time, not registration time, so `LLMS_PUBLIC_DEFAULT`
-    governs every page that did not pin the axis in frontmatter.
+    governs every page that did not pin the axis in frontmatter (or under a
+    rule that pins it).
     """
-    return _LOCAL_LLMS_PUBLIC.get(normalize(path), _default_llms_public())
+    path = normalize(path)
+    pinned = _LOCAL_LLMS_PUBLIC.get(path)
+    if pinned is None:
+        rule = _rule_for(path)
+        pinned = _RULE_LLMS_PUBLIC.get(rule) if rule else None
+    return _default_llms_public() if pinned is None else pinned
+
+
+def declares_tier(path: str) -> bool:
+    """True when ``path``'s tier reads no env: registered, or under a rule."""
+    path = normalize(path)
+    return path in _LOCAL_TIERS or _rule_for(path) is not None
+
+
+def pins_llms_public(path: str) -> bool:
+    """True when ``path`` pinned the machine axis instead of deferring to
+    ``LLMS_PUBLIC_DEFAULT``."""
+    path = normalize(path)
+    if path in _LOCAL_LLMS_PUBLIC:
+        return True
+    rule = _rule_for(path)
+    return rule is not None and rule in _RULE_LLMS_PUBLIC
 
 
 def local_tier(path: str) -> str:
-    return _LOCAL_TIERS.get(normalize(path), _default_tier())
+    path = normalize(path)
+    tier = _LOCAL_TIERS.get(path)
+    if tier is not None and path not in _INHERITED:
+        return tier
+    rule = _rule_for(path)
+    if rule is not None:
+        return _RULES[rule]
+    return _default_tier() if tier is None else tier
+
+
+def version() -> tuple:
+    """Changes whenever a registration or a rule does (see
+    :class:`VersionedDict`)."""
+    return (_LOCAL_TIERS.version, _LOCAL_LLMS_PUBLIC.version,
+            _RULES.version, _RULE_LLMS_PUBLIC.version)
 
 
 def registered() -> Dict[str, str]:
-    """Every locally declared tier. For tests and for a future control board."""
-    return dict(_LOCAL_TIERS)
+    """Every registered page and its local tier, rules applied."""
+    return {path: local_tier(path) for path in list(_LOCAL_TIERS)}
+
+
+# ---------------------------------------------------------------------------
+# Section rules
+# ---------------------------------------------------------------------------
+# pattern -> tier, and pattern -> pinned llms_public, as registered.
+_RULES: Dict[str, str] = VersionedDict()
+_RULE_LLMS_PUBLIC: Dict[str, bool] = VersionedDict()
+
+_DEEP = "**"
+_ANY = "*"
+# A trie node's key for "a pattern ends here" — no path segment is empty.
+_END = ""
+
+
+def _segments(path: str) -> List[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+def _specificity(pattern: str) -> tuple:
+    """Sort key: more literal segments, then more segments, then no ``**``."""
+    segments = _segments(pattern)
+    deep = bool(segments) and segments[-1] == _DEEP
+    literal = sum(1 for segment in segments if segment not in (_ANY, _DEEP))
+    return (literal, len(segments) - deep, not deep)
+
+
+class RuleTrie:
+    """Path patterns compiled into a trie over path segments.
+
+    :meth:`matches` walks one branch per literal segment plus the ``*`` and
+    ``**`` branches, so its cost follows the path's depth, not the number
+    of patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.root: dict = {}
+        for pattern in patterns:
+            node = self.root
+            for segment in _segments(pattern):
+                node = node.setdefault(segment, {})
+            node[_END] = pattern
+
+    def matches(self, path: str) -> List[str]:
+        """Every pattern that matches ``path``."""
+        segments = _segments(path)
+        found: List[str] = []
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            deep = node.get(_DEEP)
+            if deep is not None and _END in deep:
+                found.append(deep[_END])
+            if depth == len(segments):
+                if _END in node:
+                    found.append(node[_END])
+                continue
+            for key in (segments[depth], _ANY):
+                child = node.get(key)
+                if child is not None:
+                    stack.append((child, depth + 1))
+        return found
+
+
+def valid_pattern(pattern: str) -> bool:
+    """``**`` only as the last segment; anything else is a literal or ``*``."""
+    segments = _segments(pattern)
+    return _DEEP not in segments[:-1]
+
+
+def register_rule(pattern: str, tier: str,
+                  llms_public: Optional[bool] = None) -> Optional[str]:
+    """Gate every path ``pattern`` matches. Returns the tier applied, or
+    None when the rule was refused (it is logged)."""
+    resolved = (tier or "").strip().lower()
+    pattern = normalize(pattern)
+    if resolved not in TIERS or not valid_pattern(pattern):
+        logger.warning("Tier rule %r=%r refused: tiers are %s, and ** may "
+                       "only end a pattern", pattern, tier, TIERS)
+        return None
+    _RULES[pattern] = resolved
+    if llms_public is None:
+        _RULE_LLMS_PUBLIC.pop(pattern, None)
+    else:
+        _RULE_LLMS_PUBLIC[pattern] = bool(llms_public)
+    return resolved
+
+
+def parse_rules(raw: Optional[str]) -> List[Tuple[str, str]]:
+    """``"/a/**=auth, /b/*=admin"`` -> ``[("/a/**", "auth"), ("/b/*", "admin")]``."""
+    rules = []
+    for item in (raw or "").split(","):
+        pattern, _, tier = item.strip().rpartition("=")
+        if pattern and tier:
+            rules.append((pattern.strip(), tier.strip()))
+    return rules
+
+
+def rules() -> Dict[str, str]:
+    return dict(_RULES)
+
+
+# The compiled rules and each path's winning pattern, for one rules version.
+_compiled: Tuple[tuple, Optional[RuleTrie], Dict[str, Optional[str]]] = ((), None, {})
+_RULE_MEMO_MAX = 8192
+_compile_lock = threading.Lock()
+
+
+def _rule_for(path: str) -> Optional[str]:
+    """The most specific rule matching normalized ``path``, memoized."""
+    global _compiled
+    if not _RULES:
+        return None
+    stamp = (_RULES.version,)
+    built_for, trie, memo = _compiled
+    if built_for != stamp:
+        with _compile_lock:
+            if _compiled[0] != stamp:
+                _compiled = (stamp, RuleTrie(list(_RULES)), {})
+            built_for, trie, memo = _compiled
+    try:
+        return memo[path]
+    except KeyError:
+        pass
+    found = trie.matches(path)
+    winner = max(found, key=_specificity) if found else None
+    if len(memo) >= _RULE_MEMO_MAX:
+        memo.clear()
+    memo[path] = winner
+    return winner
+
+
+# The hub's ceiling, compiled once per snapshot: hub_client hands back the
+# same dict until it fetches a new one.
+_ceiling_compiled: Tuple[Optional[dict], Optional[RuleTrie]] = (None, None)
+
+
+def ceiling_for(path: str, ceiling: Dict[str, str]) -> Optional[str]:
+    """The hub's ceiling for ``path``: the strictest of its exact entry and
+    every pattern entry that matches, or None when nothing does."""
+    global _ceiling_compiled
+    exact = ceiling.get(path)
+    held, trie = _ceiling_compiled
+    if held is not ceiling:
+        patterns = [key for key in ceiling if _ANY in key and valid_pattern(key)]
+        trie = RuleTrie(patterns) if patterns else None
+        _ceiling_compiled = (ceiling, trie)
+    if trie is None:
+        return exact
+    found = [ceiling[pattern] for pattern in trie.matches(path)]
+    if exact:
+        found.append(exact)
+    if not found:
+        return None
+    strictest = found[0]
+    for tier in found[1:]:
+        strictest = more_restrictive(strictest, tier)
+    return strictest
 
 
 def more_restrictive(first: str, second: str) -> str:
@@ -24,10 +24,13 @@ hoped for:
 
 * **Cross-worker reconciliation.** gunicorn runs more than one worker; a
   board toggle mutates ``_overrides`` only in the worker that served the
-  POST. Every reader re-checks the store file's mtime (throttled to one
-  ``os.stat``/second) so a toggle lands on all workers within ~1s — without
-  this, an anonymous refresh of a just-published page was a coin flip
-  decided by which worker answered (the leaflet pilot's live defect).
+  POST. On Linux each worker watches the store with inotify and reloads the
+  moment another worker's write closes, so a read does no syscall at all;
+  elsewhere (or with ``PAGE_VISIBILITY_WATCH=0``, or when inotify is out of
+  watches) every reader re-checks the store file's mtime, throttled to one
+  ``os.stat``/second, so a toggle lands within ~1s. Without either, an
+  anonymous refresh of a just-published page was a coin flip decided by
+  which worker answered (the leaflet pilot's live defect).
 * **Loud persistence failure.** The store path env rode render.yaml without
   reaching the live service twice on the pilot host, silently resetting
   every toggle per deploy. Boot prints a warning when the env is unset OR
@@ -38,9 +41,12 @@ hoped for:
 """
 from __future__ import annotations
 
+import ctypes
+import ctypes.util
 import json
 import logging
 import os
+import struct
 import threading
 import time
 from pathlib import Path
@@ -58,7 +64,7 @@ _lock = threading.Lock()
 # _defaults is registered at startup from frontmatter; _overrides is what the
 # control board wrote and always wins.
 _defaults: dict[str, dict] = {}
-_overrides: dict[str, dict] = {}
+_overrides: dict[str, dict] = page_tiers.VersionedDict()
 
 _store_mtime_ns: int | None = None
 _next_stat_at = 0.0
@@ -66,18 +72,30 @@ _STAT_INTERVAL_S = 1.0
 
 
 def _load_overrides() -> None:
-    global _overrides, _store_mtime_ns
+    global _store_mtime_ns
     try:
         if _STORE_PATH.exists():
             # stat BEFORE read: a write landing between the two is picked up
             # by the next mtime check instead of being masked forever.
             stamp = _STORE_PATH.stat().st_mtime_ns
             loaded = json.loads(_STORE_PATH.read_text())
-            _overrides = loaded if isinstance(loaded, dict) else {}
+            _replace_overrides(loaded if isinstance(loaded, dict) else {})
             _store_mtime_ns = stamp
     except Exception as exc:  # a corrupt file must not kill the app
         logger.error("%s unreadable (%s) — ignoring overrides", _STORE_PATH, exc)
-        _overrides = {}
+        _replace_overrides({})
+
+
+def _replace_overrides(loaded: dict) -> None:
+    # One rebind, so no reader ever sees a half-loaded table, carrying the
+    # mutation counter forward so version() still moves — and only when the
+    # content did, so a reload of our own write invalidates nothing.
+    global _overrides
+    if loaded == _overrides:
+        return
+    fresh = page_tiers.VersionedDict(loaded)
+    fresh.version = _overrides.version + 1
+    _overrides = fresh
 
 
 def _persist() -> None:
@@ -91,28 +109,133 @@ def _persist() -> None:
         logger.error("Could not persist %s: %s", _STORE_PATH, exc)
 
 
-def _maybe_reload() -> None:
-    """Pick up another worker's board writes; no-op when nothing changed.
+def _reload_if_changed() -> None:
+    """Reload when the store's mtime moved. Call while holding ``_lock``.
 
     Reload triggers ONLY on an observed mtime change of the store file: a
     missing file, a stat error, or an unchanged stamp all leave the
     in-memory dict alone — which is also what keeps tests that inject
-    straight into ``_overrides`` (without touching the file) valid.
+    straight into ``_overrides`` (without touching the file) valid, and
+    what stops a worker re-reading its own write.
     """
+    try:
+        stamp = _STORE_PATH.stat().st_mtime_ns
+    except OSError:
+        return
+    if stamp == _store_mtime_ns:
+        return
+    _load_overrides()
+
+
+def _maybe_reload() -> None:
+    """Pick up another worker's board writes; no-op when nothing changed."""
     global _next_stat_at
+    if _watching:
+        return  # the watcher thread pushes changes; nothing to check here
+    if not _watch_tried:
+        _start_watcher()
+        if _watching:
+            return
     if time.monotonic() < _next_stat_at:
         return
     with _lock:
         if time.monotonic() < _next_stat_at:  # another thread just checked
             return
         _next_stat_at = time.monotonic() + _STAT_INTERVAL_S
-        try:
-            stamp = _STORE_PATH.stat().st_mtime_ns
-        except OSError:
+        _reload_if_changed()
+
+
+# ---------------------------------------------------------------------------
+# The inotify watcher
+# ---------------------------------------------------------------------------
+# Started lazily by the first read in each process — never at import, because
+# a gunicorn --preload master would hand one descriptor (and a thread that
+# does not survive the fork) to every worker. Any failure along the way, from
+# a non-Linux libc to an exhausted max_user_watches, leaves _watching False
+# and the throttled poll above in charge.
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len — then len name bytes
+
+_watching = False
+_watch_tried = False
+_watch_fd: int | None = None
+
+
+def _watch_mode() -> str:
+    raw = (os.environ.get("PAGE_VISIBILITY_WATCH") or "").strip().lower()
+    return "poll" if raw in ("0", "poll", "off", "false") else "inotify"
+
+
+def _start_watcher() -> None:
+    global _watching, _watch_tried, _watch_fd
+    with _lock:
+        if _watch_tried:
             return
-        if stamp == _store_mtime_ns:
+        _watch_tried = True
+        if _watch_mode() == "poll":
             return
-        _load_overrides()
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                               use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1")
+            # The directory, not the file: a write by rename replaces the
+            # inode a file watch would be attached to.
+            directory = os.fsencode(str(_STORE_PATH.parent.resolve()))
+            if libc.inotify_add_watch(fd, directory,
+                                      _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch")
+        except (OSError, AttributeError) as exc:
+            logger.info("page visibility: polling the store (%s)", exc)
+            return
+        _watch_fd = fd
+        # Anything written between the last read and the watch going live.
+        _reload_if_changed()
+        _watching = True
+    threading.Thread(target=_watch, args=(fd,), name="page-visibility-watch",
+                     daemon=True).start()
+
+
+def _watch(fd: int) -> None:
+    global _watching
+    name = os.fsencode(_STORE_PATH.name)
+    try:
+        while True:
+            buf = os.read(fd, 64 * 1024)
+            offset, hit = 0, False
+            while offset < len(buf):
+                _, _, _, length = _EVENT.unpack_from(buf, offset)
+                start = offset + _EVENT.size
+                hit = hit or buf[start:start + length].rstrip(b"\0") == name
+                offset = start + length
+            if hit:
+                with _lock:
+                    _reload_if_changed()
+    except Exception as exc:  # noqa: BLE001 — fall back, never take reads down
+        logger.warning("page visibility watcher stopped (%s) — polling", exc)
+    finally:
+        _watching = False
+
+
+def _reset_after_fork() -> None:
+    # The child re-arms its own watcher on its first read.
+    global _watching, _watch_tried, _watch_fd, _lock
+    _lock = threading.Lock()
+    _watching = _watch_tried = False
+    if _watch_fd is not None:
+        try:
+            os.close(_watch_fd)
+        except OSError:
+            pass
+        _watch_fd = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def _persistence_warning() -> None:
@@ -217,6 +340,14 @@ def controllable_pages() -> dict[str, dict]:
     return {path: get_settings(path) for path in sorted(_defaults)}
 
 
+def version() -> int:
+    """Changes whenever the override table does — a board write here, or
+    another worker's write picked up by the reload. Derived caches
+    (lib.access's decision table) compare it instead of re-reading."""
+    _maybe_reload()
+    return _overrides.version
+
+
 def override_count() -> int:
     """How many pages carry at least one board override (boot diagnostics)."""
     return len(_overrides)
@@ -251,11 +382,13 @@ def set_visibility(path: str, tier: str) -> None:
     if tier not in TIERS:
         raise ValueError(f"unknown tier {tier!r}")
     with _lock:
-        _overrides.setdefault(path, {})["visibility"] = tier
+        # Copy-on-write: the assignment is what bumps version(), so it must
+        # come after the value is in place.
+        _overrides[path] = {**_overrides.get(path, {}), "visibility": tier}
         _persist()
 
 
 def set_llms_public(path: str, value: bool) -> None:
     with _lock:
-        _overrides.setdefault(path, {})["llms_public"] = bool(value)
+        _overrides[path] = {**_overrides.get(path, {}), "llms_public": bool(value)}
         _persist()
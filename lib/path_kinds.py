@@ -0,0 +1,95 @@
+"""What a request path IS, decided once for every reader of the ledger.
+
+The tracker decides at write time which hits reach the ledger; the rollup
+decides at read time which of them are page visits and which are machine
+surfaces. Those used to be three hand-kept substring lists
+(``track_visit``'s ``skip_paths``, ``traffic_rollup._SKIP`` and
+``is_agent_surface``'s tuples), scanned in full for every hit, and they had
+drifted: ``'.js'`` matched ``page.json`` at write time, so the per-page JSON
+twin the rollup reports as a machine surface never reached the ledger at
+all, and ``'/health'`` dropped any docs page whose path merely contained it.
+
+:func:`classify` labels a path by its structure instead — a table of
+leading segments, a Dash-internal segment prefix, and a set of leaf names
+and extensions — so each rule matches a whole segment or suffix, and the
+answer is memoized for the handful of paths that carry nearly all traffic.
+
+Labels
+------
+- ``page`` — a docs page; counted as a visit.
+- ``agent-surface`` — llms.txt tiers, per-page twins, robots, sitemap;
+  recorded, and reported as machine-surface rows (mirrors the hub's
+  ``traffic_insights.is_agent_surface``).
+- ``api`` — the JSON API under ``/api/`` (``/api/backend``, ``/api/pages``):
+  tooling and monitoring curls, never a reader.
+- ``asset``, ``dash-internal``, ``health`` — never a visit. ``/healthz``
+  (and ``/readyz``) is here because the hub sweeps it hourly and Render's own probe far more
+  often; storing it turns the ledger into a record of monitoring.
+- ``junk`` — not a path a browser asks for (no leading slash, ``//``
+  scheme-relative probes, ``[]`` from a broken client).
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+PAGE = "page"
+AGENT_SURFACE = "agent-surface"
+API = "api"
+ASSET = "asset"
+DASH_INTERNAL = "dash-internal"
+HEALTH = "health"
+JUNK = "junk"
+
+# First path segment -> label.
+_LEADING = {
+    "api": API,
+    "assets": ASSET,
+    "health": HEALTH,
+    "healthz": HEALTH,
+    "readyz": HEALTH,
+}
+# Whole paths that are machine surfaces only at the root.
+_EXACT = {
+    "/robots.txt": AGENT_SURFACE,
+    "/sitemap.xml": AGENT_SURFACE,
+}
+# Any segment starting with one of these is Dash machinery, wherever a
+# pathname prefix puts it (/_dash-layout, /_dash-component-suites/...).
+_INTERNAL_PREFIXES = ("_dash", "_reload-hash")
+# Leaf names of the machine surfaces, at the root or under any page.
+_AGENT_LEAVES = frozenset({"llms.txt", "llms-small.txt", "llms-full.txt",
+                           "page.json"})
+# `.json` stays an asset (openapi.json and friends are machinery); page.json
+# is claimed by _AGENT_LEAVES first.
+_ASSET_SUFFIXES = frozenset({".css", ".js", ".json", ".png", ".jpg", ".ico",
+                             ".svg", ".woff", ".woff2", ".ttf", ".eot"})
+
+# Paths are client-chosen, so the memo is bounded; the hot ones stay in it.
+_MEMO_MAX = 4096
+
+
+@lru_cache(maxsize=_MEMO_MAX)
+def classify(path) -> str:
+    """The label for ``path`` (see the module docstring)."""
+    if not path or path[0] != "/" or path.startswith("//") or "[]" in path:
+        return JUNK
+    exact = _EXACT.get(path)
+    if exact is not None:
+        return exact
+    segments = path.split("/")
+    for segment in segments:
+        if segment.startswith(_INTERNAL_PREFIXES):
+            return DASH_INTERNAL
+    leading = _LEADING.get(segments[1])
+    if leading is not None:
+        return leading
+    leaf = segments[-1]
+    if leaf in _AGENT_LEAVES:
+        return AGENT_SURFACE
+    if leaf.startswith("favicon"):
+        return ASSET
+    dot = leaf.rfind(".")
+    if dot > 0 and leaf[dot:].lower() in _ASSET_SUFFIXES:
+        return ASSET
+    return PAGE
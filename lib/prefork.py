@@ -0,0 +1,87 @@
+"""Build the app once in the gunicorn master, share it with every worker.
+
+Without ``preload_app`` each gunicorn worker imports ``run`` itself: every
+worker re-reads and compiles all the docs, re-imports the example modules
+and re-registers the pages, and holds its own copy of all of it. With it,
+the master does that once and forks; the workers share those pages
+copy-on-write until one of them writes to them — which for most of the
+heap is never, as long as the garbage collector is kept from touching
+it (:func:`freeze_shared_heap`).
+
+What a fork does NOT carry over is threads. Modules that hold locks or
+start threads already reset themselves with ``os.register_at_fork``
+(analytics tracker and its async front, geolocation, hub client, auth,
+page visibility, request timing, ad client). What is left is work that
+has to *start* in every worker — the satellite reporter's threads — and
+that goes through :func:`in_each_worker`: run now in a plain process,
+queued until :func:`worker_started` (gunicorn's ``post_fork``) in a
+preloaded master. The master itself never runs it: it serves nothing, and a
+thread running there at fork time is a lock some worker inherits held.
+
+gunicorn.conf.py is the only caller of the hooks here; it sets
+``PRELOAD_ENV`` before it imports the app, so ``run.py`` can tell.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+from typing import Callable, List
+
+PRELOAD_ENV = "BOILERPLATE_PRELOADED"
+
+_deferred: List[Callable[[], object]] = []
+
+
+def preloading() -> bool:
+    """True while importing into a gunicorn master that will fork workers."""
+    return os.getenv(PRELOAD_ENV) == "1"
+
+
+def in_each_worker(start: Callable[[], object]) -> None:
+    """Run ``start`` in every process that serves requests, once."""
+    if preloading():
+        _deferred.append(start)
+    else:
+        start()
+
+
+def worker_started() -> None:
+    """gunicorn ``post_fork``: run what :func:`in_each_worker` deferred."""
+    # The worker inherited the master's environment; it is not preloading.
+    os.environ.pop(PRELOAD_ENV, None)
+    for start in _deferred:
+        start()
+
+
+def warm(server) -> bool:
+    """Pay Dash's first-request setup in the master, before the fork.
+
+    Flask only: the test client drives the full ``wsgi_app`` stack in-process.
+    An ASGI app would need an event loop the master does not have; its
+    workers warm on their first ``/readyz`` (lib/health). The User-Agent is
+    the internal one, so analytics drops the hit, and it runs untimed.
+    """
+    if not hasattr(server, "test_client"):
+        return False
+    from lib import request_timing
+    from lib.constants import INTERNAL_UA
+
+    try:
+        with request_timing.untimed():
+            response = server.test_client().get("/", headers={"User-Agent": INTERNAL_UA})
+    except Exception:
+        return False
+    return response.status_code == 200
+
+
+def freeze_shared_heap() -> None:
+    """Move everything built so far out of the collector's reach.
+
+    A collection writes to every object header it visits, and each write
+    copies a page into the worker that made it — a preloaded heap touched by
+    one full collection is no longer shared. Collect once, then freeze.
+    """
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
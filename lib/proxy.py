@@ -77,14 +77,22 @@ def _scheme_from(value: str) -> str | None:
     return "http" if first == "http" else None
 
 
+def forwarded_scheme(proto: str | None, ssl: str | None) -> str | None:
+    """The client's scheme from ``X-Forwarded-Proto``, else the older
+    ``X-Forwarded-SSL: on``; None when neither claims anything."""
+    scheme = _scheme_from(proto or "")
+    if scheme is None and (ssl or "").lower() == "on":
+        scheme = "https"
+    return scheme
+
+
 # ------------------------------------------------------------------- WSGI --
 
 
 def _wsgi_proxy_fix(wsgi_app):
     def middleware(environ, start_response):
-        scheme = _scheme_from(environ.get("HTTP_X_FORWARDED_PROTO", ""))
-        if scheme is None and environ.get("HTTP_X_FORWARDED_SSL", "").lower() == "on":
-            scheme = "https"
+        scheme = forwarded_scheme(environ.get("HTTP_X_FORWARDED_PROTO"),
+                                  environ.get("HTTP_X_FORWARDED_SSL"))
         if scheme:
             environ["wsgi.url_scheme"] = scheme
         return wsgi_app(environ, start_response)
@@ -95,17 +103,32 @@ def _wsgi_proxy_fix(wsgi_app):
 # ------------------------------------------------------------------- ASGI --
 
 
+def asgi_forwarding(headers) -> tuple[str | None, str | None]:
+    """``(X-Forwarded-Proto, X-Forwarded-SSL)`` from a raw ASGI header list.
+
+    Read straight off the bytes: ASGI names arrive lowercased, and only the
+    two values wanted are ever decoded. A repeated header keeps its FIRST
+    value — the client's hop, for the same reason ``_scheme_from`` reads a
+    comma-separated list from the front.
+    """
+    proto = ssl = None
+    for name, value in headers or ():
+        if name == b"x-forwarded-proto":
+            if proto is None:
+                proto = value.decode("latin-1")
+        elif name == b"x-forwarded-ssl":
+            if ssl is None:
+                ssl = value.decode("latin-1")
+    return proto, ssl
+
+
 def _asgi_proxy_fix(asgi_app):
     async def middleware(scope, receive, send):
         # Lifespan and websocket scopes carry no forwarding headers worth
         # rewriting; touching them risks breaking startup for no gain.
         if scope.get("type") == "http":
-            headers = {k.decode("latin-1").lower(): v.decode("latin-1")
-                       for k, v in scope.get("headers") or []}
-            scheme = _scheme_from(headers.get("x-forwarded-proto", ""))
-            if scheme is None and headers.get("x-forwarded-ssl", "").lower() == "on":
-                scheme = "https"
-            if scheme:
+            scheme = forwarded_scheme(*asgi_forwarding(scope.get("headers")))
+            if scheme and scheme != scope.get("scheme"):
                 scope = dict(scope)
                 scope["scheme"] = scheme
         return await asgi_app(scope, receive, send)
@@ -0,0 +1,127 @@
+"""How long this worker takes, per kind of work — a small latency histogram.
+
+Two kinds of series land here:
+
+- every request, from the edge middlewares (lib/wsgi_middleware on Flask,
+  lib/asgi_middleware on FastAPI/Quart), filed under the request's
+  :func:`lib.path_kinds.classify` label — so a slow page and a flood of fast
+  asset hits are never averaged into one meaningless number; ``agent-surface``
+  is the llms.txt family;
+- the work behind them: ``page-layout`` (lib/gate_layouts — the verdict and
+  the choice of tree; Dash serializes it afterwards, on the request's own
+  clock), ``analytics-flush`` (lib/analytics_tracker), ``hub``
+  (lib/hub_client) and ``ad-fetch`` (lib/ad_client).
+
+Requests a worker sends itself to warm up (lib/health, lib/prefork) run
+under :func:`untimed` and land in no series: a cold first ``GET /`` is the
+boot's cost, and filed under ``page`` it would sit in that series' max for
+the life of the worker.
+
+Each series is a count, a sum, a max and fixed log-spaced buckets, so
+recording is a lock, a bisect and three additions, and percentiles come out
+of the buckets (the upper bound of the bucket the rank falls in, never above
+the observed max). ``/healthz?detail=1`` reports :func:`snapshot` to internal
+callers (lib/health).
+
+Per process and since boot (or since the fork that made this worker): a
+figure for *this* worker, not the deployment.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Bucket upper bounds, in seconds; the last bucket is everything slower.
+BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+          1.0, 2.5, 5.0, 10.0)
+PERCENTILES = (50, 90, 99)
+
+_lock = threading.Lock()
+# series -> [count, total seconds, max seconds, [bucket counts]]
+_STATS: dict[str, list] = {}
+_untimed: ContextVar[bool] = ContextVar("request_timing_untimed", default=False)
+
+
+def record(series: str, seconds: float) -> None:
+    if _untimed.get():
+        return
+    bucket = bisect_left(BOUNDS, seconds)
+    with _lock:
+        row = _STATS.get(series)
+        if row is None:
+            row = _STATS[series] = [0, 0.0, 0.0, [0] * (len(BOUNDS) + 1)]
+        row[0] += 1
+        row[1] += seconds
+        if seconds > row[2]:
+            row[2] = seconds
+        row[3][bucket] += 1
+
+
+@contextmanager
+def timed(series: str):
+    """Record the wall time of a ``with`` block under ``series``, even when
+    it raises."""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        record(series, perf_counter() - started)
+
+
+@contextmanager
+def untimed():
+    """Record nothing from inside this block, in this thread or task."""
+    token = _untimed.set(True)
+    try:
+        yield
+    finally:
+        _untimed.reset(token)
+
+
+def _percentile(buckets: list, count: int, peak: float, pct: int) -> float:
+    rank = max(1, -(-count * pct // 100))        # ceil, at least the first
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if seen >= rank:
+            return min(BOUNDS[i], peak) if i < len(BOUNDS) else peak
+    return peak
+
+
+def snapshot() -> dict:
+    """``{series: {"count", "mean_ms", "max_ms", "p50_ms", "p90_ms",
+    "p99_ms"}}`` for every series seen."""
+    with _lock:
+        rows = {series: (row[0], row[1], row[2], list(row[3]))
+                for series, row in _STATS.items()}
+    out = {}
+    for series, (count, total, peak, buckets) in sorted(rows.items()):
+        entry = {"count": count,
+                 "mean_ms": round(total / count * 1000, 3),
+                 "max_ms": round(peak * 1000, 3)}
+        for pct in PERCENTILES:
+            entry[f"p{pct}_ms"] = round(
+                _percentile(buckets, count, peak, pct) * 1000, 3)
+        out[series] = entry
+    return out
+
+
+def clear() -> None:
+    with _lock:
+        _STATS.clear()
+
+
+def _reset_after_fork() -> None:
+    # A preloaded parent's boot traffic is not this worker's.
+    global _lock
+    _lock = threading.Lock()
+    _STATS.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
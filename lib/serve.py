@@ -0,0 +1,282 @@
+"""Start the right server for the backend: ``python -m lib.serve``.
+
+``DASH_BACKEND`` picks the framework (lib/backend.py), but the server that
+runs it used to be whatever the start command said — and every start command
+said ``gunicorn run:server`` with sync workers. Switched to FastAPI or Quart,
+the app booted cleanly under gunicorn and then failed every request: a WSGI
+server calling an ASGI app. This launcher derives the server from the
+backend instead:
+
+=========  =============================  ==========================
+backend    server                         workers
+=========  =============================  ==========================
+flask      gunicorn, ``gthread`` workers  2 x CPUs + 1, threaded
+fastapi    uvicorn                        one per CPU
+quart      hypercorn, asyncio/uvloop      one per CPU
+=========  =============================  ==========================
+
+Worker counts are then capped by memory — a worker costs
+``WORKER_MEMORY_MB`` (default 256) whatever the CPU count says — and both
+figures come from the container's cgroup limits when there are any, not the
+host's: a half-CPU, 512 MB instance on a 64-core machine gets 2 workers, not
+129. ``WEB_CONCURRENCY`` and ``WEB_THREADS`` override the arithmetic.
+
+The chosen plan is handed to the app in ``SERVER_PLAN_ENV`` and reported on
+``/api/backend`` (:func:`backend_payload`), so what a deployment actually
+runs is one request away. ``python -m lib.serve --dry-run`` prints the plan
+and the command without starting anything.
+
+A server whose package is missing is a refusal to start, naming the
+``pip install`` that fixes it — never a fallback to a server that cannot run
+the app. run.py also warns (:func:`server_mismatch`) when the app is imported
+by the wrong kind of server some other way.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sys
+from dataclasses import asdict, dataclass
+from importlib.util import find_spec
+from typing import Optional
+
+from lib.backend import BackendInfo, resolve_backend
+
+SERVER_PLAN_ENV = "BOILERPLATE_SERVER_PLAN"
+APP_TARGET = "run:server"
+DEFAULT_PORT = 8550
+WORKER_MEMORY_MB = 256
+DEFAULT_THREADS = 4
+
+# backend -> (server, package to import, pip requirement)
+_SERVERS = {
+    "flask": ("gunicorn", "gunicorn", "gunicorn>=23.0.0"),
+    "fastapi": ("uvicorn", "uvicorn", "uvicorn[standard]"),
+    "quart": ("hypercorn", "hypercorn", "hypercorn"),
+}
+_ASGI_SERVERS = ("uvicorn", "hypercorn")
+
+
+@dataclass(frozen=True)
+class ServerPlan:
+    backend: str
+    server: str
+    worker_class: str
+    workers: int
+    threads: int
+    bind: str
+    cpus: float
+    memory_mb: Optional[int]
+
+    def argv(self) -> list:
+        """The command that runs this plan."""
+        cmd = [sys.executable, "-m", self.server, APP_TARGET]
+        if self.server == "gunicorn":
+            # gunicorn.conf.py carries preload and the per-worker hooks.
+            return cmd + ["-c", "gunicorn.conf.py", "-b", self.bind,
+                          "-k", self.worker_class,
+                          "--workers", str(self.workers),
+                          "--threads", str(self.threads)]
+        host, _, port = self.bind.rpartition(":")
+        if self.server == "uvicorn":
+            return cmd + ["--host", host, "--port", port,
+                          "--workers", str(self.workers)]
+        return cmd + ["--bind", self.bind, "--workers", str(self.workers),
+                      "--worker-class", self.worker_class]
+
+
+# ---------------------------------------------------------------- sizing --
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> float:
+    """CPUs this process may use: affinity, then any cgroup CPU quota."""
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+    quota = _read("/sys/fs/cgroup/cpu.max")                   # cgroup v2
+    if quota:
+        limit, _, period = quota.partition(" ")
+        if limit != "max" and period:
+            cpus = min(cpus, int(limit) / int(period))
+    else:                                                      # cgroup v1
+        limit = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if limit and period and int(limit) > 0:
+            cpus = min(cpus, int(limit) / int(period))
+    return cpus
+
+
+def available_memory_mb() -> Optional[int]:
+    """Memory this process may use: the cgroup limit, else physical RAM."""
+    for path in ("/sys/fs/cgroup/memory.max",
+                 "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        raw = _read(path)
+        # v1 reports "no limit" as a page-rounded 2**63.
+        if raw and raw != "max" and int(raw) < 2 ** 60:
+            return int(raw) // (1024 * 1024)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _env_int(name: str) -> Optional[int]:
+    try:
+        value = int(os.getenv(name, ""))
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def plan(backend: Optional[str] = None, bind: Optional[str] = None,
+         cpus: Optional[float] = None,
+         memory_mb: Optional[int] = None) -> ServerPlan:
+    """The server, worker class and sizing for ``backend`` on this machine."""
+    name = resolve_backend(backend)
+    cpus = available_cpus() if cpus is None else cpus
+    memory_mb = available_memory_mb() if memory_mb is None else memory_mb
+    server = _SERVERS[name][0]
+
+    if server == "gunicorn":
+        # Threads cover the I/O waits (hub, ad server) a sync worker sits in.
+        by_cpu = 2 * math.ceil(cpus) + 1 if cpus >= 1 else 2
+        worker_class = "gthread"
+        threads = _env_int("WEB_THREADS") or DEFAULT_THREADS
+    else:
+        # An event loop per core; more processes than cores only contend.
+        by_cpu = max(1, math.floor(cpus))
+        worker_class = ("uvloop" if server == "hypercorn" and find_spec("uvloop")
+                        else "asyncio")
+        threads = 1
+    per_worker = _env_int("WORKER_MEMORY_MB") or WORKER_MEMORY_MB
+    by_memory = max(1, memory_mb // per_worker) if memory_mb else by_cpu
+    workers = _env_int("WEB_CONCURRENCY") or min(by_cpu, by_memory)
+
+    bind = bind or f"0.0.0.0:{os.getenv('PORT', DEFAULT_PORT)}"
+    return ServerPlan(backend=name, server=server, worker_class=worker_class,
+                      workers=workers, threads=threads, bind=bind,
+                      cpus=round(cpus, 2), memory_mb=memory_mb)
+
+
+# ------------------------------------------------------------ in the app --
+
+
+# ServerPlan's fields and the JSON types each may arrive as. bool is an int
+# subclass, so it is refused explicitly below.
+_PLAN_TYPES = {
+    "backend": (str,), "server": (str,), "worker_class": (str,),
+    "workers": (int,), "threads": (int,), "bind": (str,),
+    "cpus": (int, float), "memory_mb": (int, type(None)),
+}
+
+
+def running_plan() -> Optional[dict]:
+    """The plan this process was started with; None when not launched by
+    this module or gunicorn.conf.py (``python run.py``, a bare server).
+
+    The environment is input like any other: a hand-set or truncated value
+    is dropped, not passed on to a typed response that would fail on it.
+    """
+    raw = os.getenv(SERVER_PLAN_ENV)
+    if not raw:
+        return None
+    try:
+        recorded = json.loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(recorded, dict) or recorded.keys() != _PLAN_TYPES.keys():
+        return None
+    for name, types in _PLAN_TYPES.items():
+        value = recorded[name]
+        if isinstance(value, bool) or not isinstance(value, types):
+            return None
+    return recorded
+
+
+def backend_payload(info: BackendInfo) -> dict:
+    """The ``/api/backend`` body, on every backend."""
+    return {"name": info.name, "label": info.label, "is_async": info.is_async,
+            "description": info.description, "server": running_plan()}
+
+
+def server_mismatch(backend: str) -> Optional[str]:
+    """Why the server importing this app cannot run ``backend``, if it can't."""
+    name = resolve_backend(backend)
+    is_async = name != "flask"
+    asgi_server = next((s for s in _ASGI_SERVERS if s in sys.modules), None)
+    if is_async and asgi_server is None and "gunicorn" in sys.modules:
+        return (f"DASH_BACKEND={name} is an ASGI app, but gunicorn is serving "
+                "it as WSGI: every request will fail. Start it with "
+                "`python -m lib.serve`.")
+    if not is_async and asgi_server is not None:
+        return (f"DASH_BACKEND=flask is a WSGI app, but {asgi_server} is "
+                "serving it as ASGI. Start it with `python -m lib.serve`.")
+    recorded = running_plan()
+    if recorded and recorded.get("backend") != name:
+        return (f"the server was planned for {recorded.get('backend')!r} but "
+                f"the app booted as {name!r}: DASH_BACKEND differs between "
+                "the launcher and the app.")
+    return None
+
+
+def register_backend_route(app, info: BackendInfo) -> None:
+    """Mount ``/api/backend`` on Flask/Quart. No-op on FastAPI (lib/asgi_routes
+    declares it, typed)."""
+    if info.name == "fastapi":
+        return
+    server = app.server
+    if info.name == "quart":
+        @server.get("/api/backend")
+        async def _api_backend():  # pragma: no cover — quart runtime
+            return backend_payload(info)
+    else:
+        from flask import jsonify
+
+        @server.get("/api/backend")
+        def _api_backend():
+            return jsonify(backend_payload(info))
+
+
+# ---------------------------------------------------------------- launch --
+
+
+def main(argv: list) -> int:
+    dry = "--dry-run" in argv
+    bind = None
+    if "--bind" in argv:
+        bind = argv[argv.index("--bind") + 1]
+    chosen = plan(bind=bind)
+    cmd = chosen.argv()
+    print(f"[boilerplate] serving {chosen.backend} with {chosen.server} "
+          f"({chosen.worker_class}, {chosen.workers} worker(s) x "
+          f"{chosen.threads} thread(s)) on {chosen.bind} — "
+          f"{chosen.cpus} CPU(s), {chosen.memory_mb} MB")
+    if dry:
+        print(json.dumps(asdict(chosen), indent=2))
+        print(" ".join(cmd))
+        return 0
+    package, requirement = _SERVERS[chosen.backend][1:]
+    if find_spec(package) is None:
+        print(f"[boilerplate] ERROR: DASH_BACKEND={chosen.backend} needs "
+              f"{chosen.server}, which is not installed: "
+              f"pip install \"{requirement}\"", file=sys.stderr)
+        return 1
+    os.environ[SERVER_PLAN_ENV] = json.dumps(asdict(chosen))
+    sys.stdout.flush()
+    os.execv(sys.executable, cmd)
+    return 0  # pragma: no cover — exec does not return
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -39,22 +39,21 @@ import hashlib
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 
+from lib import path_kinds
 from lib.analytics_tracker import analytics_path
 
 SESSION_GAP_MIN = 30
 
-# Mirror of the hub's lib/traffic_insights._SKIP — keep them in sync.
-# The last three entries are the tiered corpus docs and the per-page JSON
-# twin: every machine surface load_agent_hits() picks up must be skipped
-# here, or its fetches are counted TWICE in human_hits/bot_hits/pages
-# (once as a regular visit, once as a machine-surface row). '/llms.txt'
-# does not substring-match '/llms-small.txt', so each needs its own entry.
-# The hub's tuple is missing these three as of 2026-08-15 — its comment
-# claims the exclusion, its tuple doesn't deliver it; port this fix there.
-_SKIP = ('.css', '.js', '.png', '.jpg', '.ico', '.svg', '.woff', '.ttf', '_dash',
-         '_reload-hash', 'favicon', '/_dash-update-component', '/_dash-layout',
-         '/assets/', '[]', '/healthz', '/llms.txt', '/sitemap', '/robots',
-         '/llms-small.txt', '/llms-full.txt', 'page.json')
+# Which paths are page visits and which are machine surfaces is
+# lib/path_kinds.classify — the same rule the tracker applied when it wrote
+# the hit, so write time and read time cannot drift apart. It mirrors the
+# hub's lib/traffic_insights._SKIP / is_agent_surface; keep them in sync.
+# Every machine surface load_agent_hits() picks up is refused by
+# load_visits(), or its fetches are counted TWICE in human_hits/bot_hits/
+# pages (once as a regular visit, once as a machine-surface row). The hub's
+# tuple is missing the tiered corpus docs and page.json as of 2026-08-15 —
+# its comment claims the exclusion, its tuple doesn't deliver it; port this
+# fix there.
 
 
 def load_visits(path=None):
@@ -69,7 +68,7 @@ def load_visits(path=None):
     out = []
     for v in raw:
         p = v.get("path") or ""
-        if not p.startswith('/') or any(s in p for s in _SKIP):
+        if path_kinds.classify(p) != path_kinds.PAGE:
             continue
         try:
             dt = datetime.fromisoformat(v["timestamp"])
@@ -90,18 +89,10 @@ def visitor_key(v):
     return f"{v.get('ip_address') or '?'}|{ua}"
 
 
-# Machine-readable document surfaces — the complement of _SKIP's llms/
-# robots/sitemap rule (mirrors the hub's traffic_insights.is_agent_surface,
-# including the tiered corpus docs from dash-improve-my-llms ≥ 2.4.0).
-_AGENT_EXACT = ('/robots.txt', '/sitemap.xml')
-_AGENT_SUFFIXES = ('/llms.txt', '/llms-small.txt', '/llms-full.txt',
-                   '/page.json')
-
-
 def is_agent_surface(path: str) -> bool:
-    return (path in _AGENT_EXACT
-            or path in ('/llms.txt', '/llms-small.txt', '/llms-full.txt')
-            or path.endswith(_AGENT_SUFFIXES))
+    """llms.txt tiers, per-page twins, robots and sitemap (dash-improve-my-llms
+    ≥ 2.4.0 tiers included) — the complement of load_visits' pages."""
+    return path_kinds.classify(path) == path_kinds.AGENT_SURFACE
 
 
 def load_agent_hits(path=None):
@@ -118,7 +109,7 @@ def load_agent_hits(path=None):
     out = []
     for v in raw:
         p = v.get("path") or ""
-        if not p.startswith('/') or not is_agent_surface(p):
+        if not is_agent_surface(p):
             continue
         try:
             dt = datetime.fromisoformat(v["timestamp"])
@@ -25,65 +25,86 @@ loud-over-silent choice the identity tests make.
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from importlib.metadata import PackageNotFoundError, version
 
-_PLACEHOLDER = re.compile(r"\{\{VERSION:([A-Za-z0-9._-]+)\}\}")
-
 # The first placeholder, from before the general form existed (the 2026-08-14
 # truth sweep). Satellites forked in that window may still write it.
 _LEGACY = "{{DIMLL_VERSION}}"
 _LEGACY_DIST = "dash-improve-my-llms"
 
-_FENCE = re.compile(r"^\s*(```|~~~)")
-# Inline code spans, shortest match — `code`. CommonMark lets a span cross a
-# soft line break, so newlines are allowed inside. Split with a capture group
-# so the spans survive into the output untouched.
-_CODE_SPAN = re.compile(r"(`[^`]+`)")
+# One scanner for everything the old line loop and span split did in two
+# passes. Alternatives, tried left to right at each position:
+#
+#   fence  — a ``` / ~~~ line opening a fenced block; the caller skips to the
+#            next fence line (any of the two, as before) and copies verbatim;
+#   span   — an inline code span, copied verbatim. CommonMark lets a span
+#            cross a soft line break, so newlines are allowed inside — but
+#            never a fence line, which ends the paragraph the span lives in;
+#   dist   — a placeholder, replaced;
+#   legacy — the pre-generic placeholder, replaced.
+#
+# `[^\S\n]` is "whitespace but not a newline": fences may be indented.
+_FENCE_START = r"^[^\S\n]*(?:```|~~~)"
+_FENCE = re.compile(_FENCE_START, re.M)
+_SCAN = re.compile(
+    rf"(?P<fence>{_FENCE_START})"
+    rf"|(?P<span>`(?:[^`\n]|\n(?!{_FENCE_START[1:]}))+`)"
+    r"|\{\{VERSION:(?P<dist>[A-Za-z0-9._-]+)\}\}"
+    rf"|(?P<legacy>{re.escape(_LEGACY)})",
+    re.M,
+)
 
 
-def _substitute_prose(text: str, source: str) -> str:
-    def replace(match: re.Match) -> str:
-        dist = match.group(1)
-        try:
-            return version(dist)
-        except PackageNotFoundError:
-            raise LookupError(
-                f"{source} claims a version for {dist!r}, but that "
-                "distribution is not installed — the claim cannot be true. "
-                "Fix the {{VERSION:...}} name or install the package."
-            ) from None
+@lru_cache(maxsize=None)
+def installed_version(dist: str) -> str:
+    """``importlib.metadata.version``, once per distribution per process.
 
-    out = []
-    for part in _CODE_SPAN.split(text):
-        if part.startswith("`"):
-            out.append(part)
-            continue
-        part = part.replace(_LEGACY, f"{{{{VERSION:{_LEGACY_DIST}}}}}")
-        out.append(_PLACEHOLDER.sub(replace, part))
-    return "".join(out)
+    Each uncached lookup walks sys.path's metadata directories, and every
+    page repeats the same few names. Misses raise and are not cached.
+    """
+    return version(dist)
+
+
+def _line_end(text: str, index: int) -> int:
+    newline = text.find("\n", index)
+    return len(text) if newline < 0 else newline + 1
 
 
 def substitute_versions(content: str, *, source: str = "<markdown>") -> str:
     """Replace every version placeholder in ``content`` (outside code) with
     the installed distribution's version. ``source`` names the file in the
     error message."""
+    if "{{" not in content:  # most pages: nothing to scan for
+        return content
+
     out = []
-    prose: list[str] = []
-    in_fence = False
-
-    def flush():
-        if prose:
-            out.append(_substitute_prose("".join(prose), source))
-            prose.clear()
-
-    for line in content.splitlines(keepends=True):
-        if _FENCE.match(line):
-            flush()
-            in_fence = not in_fence
-            out.append(line)
-        elif in_fence:
-            out.append(line)
-        else:
-            prose.append(line)
-    flush()
+    pos = 0
+    while (match := _SCAN.search(content, pos)) is not None:
+        kind = match.lastgroup
+        if kind == "span":
+            out.append(content[pos:match.end()])
+            pos = match.end()
+            continue
+
+        out.append(content[pos:match.start()])
+        if kind == "fence":
+            closing = _FENCE.search(content, _line_end(content, match.end()))
+            end = len(content) if closing is None else _line_end(content, closing.end())
+            out.append(content[match.start():end])
+            pos = end
+            continue
+
+        dist = _LEGACY_DIST if kind == "legacy" else match.group("dist")
+        try:
+            out.append(installed_version(dist))
+        except PackageNotFoundError:
+            raise LookupError(
+                f"{source} claims a version for {dist!r}, but that "
+                "distribution is not installed — the claim cannot be true. "
+                "Fix the {{VERSION:...}} name or install the package."
+            ) from None
+        pos = match.end()
+
+    out.append(content[pos:])
     return "".join(out)
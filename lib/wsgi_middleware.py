@@ -0,0 +1,62 @@
+"""
+The Flask edge: analytics and request timing, read straight off the environ.
+
+The WSGI twin of lib/asgi_middleware's ``EdgeMiddleware``, wrapped around
+``app.server.wsgi_app`` next to lib/proxy's scheme fix. It replaces a
+``before_request`` hook that, for every request, had Werkzeug build its
+header view, copied it with ``dict(request.headers)``, and then had the
+tracker lowercase that copy into another dict — to read four values. Here
+each of those is one environ lookup (``analytics_tracker.environ_headers``),
+and a path the ledger never records is passed through after a memoized
+classification, before any header is touched.
+
+Wrapping ``wsgi_app`` also settles the ordering the hook had to be careful
+about: a ``before_request`` registered after dash-improve-my-llms' bot
+middleware never runs for the crawlers that middleware answers itself. This
+sits outside every hook, so they are counted whatever the registration
+order.
+"""
+from __future__ import annotations
+
+from time import perf_counter
+
+from lib import path_kinds, request_timing
+from lib.analytics_tracker import RECORDED_KINDS, environ_headers, tracker
+
+
+def _path(environ) -> str:
+    # PATH_INFO is the raw bytes as latin-1 (PEP 3333); Werkzeug's
+    # request.path, which the ledger has always stored, is those bytes as UTF-8.
+    path = environ.get("PATH_INFO") or "/"
+    if not path.isascii():
+        path = path.encode("latin-1").decode("utf-8", "replace")
+    return path
+
+
+def wsgi_edge(wsgi_app):
+    def middleware(environ, start_response):
+        started = perf_counter()
+        path = _path(environ)
+        kind = path_kinds.classify(path)
+        if kind in RECORDED_KINDS:
+            try:
+                # Headers carry the real client IP and country from the
+                # proxy/CDN (behind Render or Cloudflare, REMOTE_ADDR is the
+                # proxy — every visitor would look like one).
+                headers = environ_headers(environ)
+                tracker.track_visit(path, headers.get("user-agent", ""),
+                                    environ.get("REMOTE_ADDR"), headers=headers)
+            except Exception:
+                pass
+        try:
+            return wsgi_app(environ, start_response)
+        finally:
+            request_timing.record(kind, perf_counter() - started)
+
+    return middleware
+
+
+def register_wsgi_middleware(app) -> None:
+    """Wrap ``app.server.wsgi_app`` — never ``app.server`` itself (gunicorn
+    imports it as ``run:server``; see lib/proxy.apply)."""
+    app.server.wsgi_app = wsgi_edge(app.server.wsgi_app)
@@ -13,11 +13,11 @@ from pydantic import BaseModel, field_validator
 
 from lib.ad_client import inject_ad_into_aside
 from lib.constants import OG_IMAGE_URL, PAGE_TITLE_PREFIX, NAME_CONTENT_MAP
-from lib import gate_layouts, page_tiers, page_visibility
+from lib import gate_layouts, page_snapshots, page_tiers, page_visibility
 from lib.directives.headings import patch_renderer
-from lib.directives.kwargs import Kwargs
+from lib.directives.kwargs import Kwargs, warm_up as warm_kwargs
 from lib.directives.llms_copy import LlmsCopy
-from lib.directives.source import SC
+from lib.directives.source import SC, read_source
 from lib.directives.toc import TOC
 from lib.versions import substitute_versions
 
@@ -26,8 +26,8 @@ logging.basicConfig(level=logging.INFO)
 
 directory = "docs"
 
-# read all markdown files
-files = Path(directory).glob("**/*.md")
+# read all markdown files (a list: the props-table warm-up reads them first)
+files = list(Path(directory).glob("**/*.md"))
 
 
 class Meta(BaseModel):
@@ -68,19 +68,6 @@ class Meta(BaseModel):
 
 
 _SOURCE_DIRECTIVE = re.compile(r'^\.\. source::(.+?)$', re.MULTILINE)
-_LANG_MAP = {
-    'py': 'python', 'pyi': 'python',
-    'js': 'javascript', 'jsx': 'jsx',
-    'ts': 'typescript', 'tsx': 'tsx',
-    'css': 'css', 'scss': 'scss', 'sass': 'sass', 'less': 'less',
-    'html': 'html', 'htm': 'html', 'xml': 'xml',
-    'json': 'json',
-    'yaml': 'yaml', 'yml': 'yaml',
-    'md': 'markdown', 'rst': 'rst', 'txt': 'text',
-    'sh': 'bash', 'bash': 'bash',
-    'sql': 'sql', 'r': 'r',
-    'toml': 'toml', 'ini': 'ini', 'conf': 'conf',
-}
 
 
 def _expand_source_directives(markdown_content: str) -> str:
@@ -89,15 +76,14 @@ def _expand_source_directives(markdown_content: str) -> str:
     This produces the prose that dash-improve-my-llms 2.0 will serve at
     `/<page>/llms.txt`. Replacing the directive with the real file content
     is what makes the LLM output self-contained for the "paste into a chat
-    window" audience.
+    window" audience. The file comes from the same cache the ``SC``
+    directive rendered it from, so each page's sources are read once.
     """
     def replace(match: re.Match) -> str:
         file_path = match.group(1).strip()
         try:
-            full = Path(file_path)
-            content = full.read_text()
-            ext = full.suffix.lstrip('.').lower()
-            lang = _LANG_MAP.get(ext, ext or 'text')
+            source = read_source(file_path)
+            content, lang = source.text, source.language
             tail = '' if content.endswith('\n') else '\n'
             return f'\n```{lang}\n# File: {file_path}\n\n{content}{tail}```\n'
         except FileNotFoundError:
@@ -129,6 +115,10 @@ patch_renderer()
 directives = [Admonition(), BlockExec(), Divider(), Image(), Kwargs(), LlmsCopy(), SC(), TOC()]
 parse = create_parser(directives)
 
+# Resolve every `.. kwargs::` props table once, before any page asks for one —
+# from the persisted cache when nothing was upgraded (lib/directives/kwargs).
+warm_kwargs(files)
+
 for file in files:
     logger.info("Loading %s..", file)
     metadata, content = frontmatter.parse(file.read_text())
@@ -192,6 +182,10 @@ for file in files:
         # the og:image in templates/index.html. See lib.constants.OG_IMAGE_URL.
         image_url=OG_IMAGE_URL,
     )
+    # The same tree, for the PAGE_SNAPSHOTS navigation fast path
+    # (lib/page_snapshots.py). A reference only; nothing is encoded here.
+    page_snapshots.record(metadata.endpoint, metadata.name,
+                          PAGE_TITLE_PREFIX + metadata.name, layout)
 
     # Feed the expanded markdown into dash-improve-my-llms so /<page>/llms.txt
     # serves the directive-expanded prose. This replaces the custom Flask
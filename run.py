@@ -95,9 +95,6 @@ LLMS_PKG_FLOOR = (2, 6, 1)
 # closes the unset gap. FORKS CHANGE THIS ONE STRING.
 os.environ.setdefault("SATELLITE_APP_KEY", "boilerplate")
 
-# Analytics tracking
-from lib.analytics_tracker import tracker
-
 # Site identity, public origin, and the cross-host network directory
 from lib.constants import (
     APP_TITLE,
@@ -280,6 +277,8 @@ if MCP_KWARGS:
 # dash-clerk-auth splits its setup either side of Dash(...): sessions, the
 # /api/auth/* routes and per-request identity are wired here. No-op when off.
 _auth.configure_app(app)
+# One identity lookup per request, whichever backend (lib/auth.py).
+_auth.install_request_scope(app, BACKEND)
 
 # ----------------------------------------------------------------------------
 # Trust the proxy's forwarded scheme. Immediately after the server object
@@ -295,7 +294,13 @@ _auth.configure_app(app)
 # ----------------------------------------------------------------------------
 from lib import proxy as _proxy  # noqa: E402
 
-PROXY_FIX_APPLIED = _proxy.apply(app, BACKEND)
+if BACKEND_INFO.is_async:
+    # FastAPI/Quart: the fix rides lib/asgi_middleware.EdgeMiddleware with
+    # analytics and timing (registered at the bottom of this file), so each
+    # request's headers are scanned once rather than once per layer.
+    PROXY_FIX_APPLIED = _proxy.enabled()
+else:
+    PROXY_FIX_APPLIED = _proxy.apply(app, BACKEND)
 print(
     "[boilerplate] forwarded-scheme trust: "
     + ("on" if PROXY_FIX_APPLIED else "OFF — request.url will report the "
@@ -423,58 +428,40 @@ if BACKEND == "fastapi":
     )
 else:
     # Flask/Quart get the same /healthz the FastAPI build declares — the
-    # 2plot.ai hub's hourly sweep probes it for the network health panel.
+    # 2plot.ai hub's hourly sweep probes it for the network health panel —
+    # and the same /api/backend, which reports the server lib.serve chose.
     from lib.health import register_health_route
+    from lib.serve import register_backend_route
     register_health_route(app, BACKEND)
+    register_backend_route(app, BACKEND_INFO)
+
+# A FastAPI app under gunicorn's WSGI workers boots cleanly and then fails
+# every request; say so at boot instead (lib/serve.py picks the right one).
+from lib.serve import server_mismatch  # noqa: E402
+
+_SERVER_MISMATCH = server_mismatch(BACKEND)
+if _SERVER_MISMATCH:
+    print("[boilerplate] WARNING: " + _SERVER_MISMATCH)
 
 # ============================================================================
-# Analytics tracking (Flask / Quart) — MUST be registered BEFORE
-# add_llms_routes.
+# Analytics tracking (Flask) — a wsgi_app wrapper, not a before_request hook.
 #
-# `before_request` hooks run in registration order, and the package's
-# `_bot_middleware` short-circuits AI-search crawlers (ClaudeBot, ChatGPT-User,
-# PerplexityBot, ...) with its own response. Registered after it, this hook
-# never runs for exactly the bot traffic a docs site most wants counted, and
-# the `bot_hits` we report to 2plot.ai would be quietly too low.
+# The package's `_bot_middleware` short-circuits AI-search crawlers
+# (ClaudeBot, ChatGPT-User, PerplexityBot, ...) with its own response, and a
+# `before_request` hook registered after it never runs for exactly the bot
+# traffic a docs site most wants counted. Around wsgi_app it sits outside
+# every hook, and it reads the few headers it needs straight from the
+# environ (lib/wsgi_middleware).
 #
-# FastAPI is the mirror image and is wired further down: Starlette runs the
-# LAST-added middleware outermost, so ours goes on after add_llms_routes.
+# FastAPI and Quart are the mirror image and are wired further down: the
+# tracker is ASGI middleware there, and the LAST one wrapped is outermost, so
+# ours goes on after add_llms_routes.
 # ============================================================================
 
 if IS_FLASK:
-    from flask import request as _flask_request
-
-    @app.server.before_request
-    def track_visitor():
-        """Track visitor analytics before each request."""
-        try:
-            # Headers are passed so the tracker can read the REAL client IP
-            # and country from the proxy/CDN (behind Render or Cloudflare,
-            # remote_addr is the proxy — every visitor would look like one).
-            tracker.track_visit(
-                _flask_request.path,
-                _flask_request.headers.get('User-Agent', ''),
-                _flask_request.remote_addr,
-                headers=dict(_flask_request.headers),
-            )
-        except Exception:
-            pass
-
-elif BACKEND == "quart":
-    from quart import request as _quart_request
-
-    @app.server.before_request
-    async def track_visitor():
-        """Track visitor analytics before each request (Quart)."""
-        try:
-            tracker.track_visit(
-                _quart_request.path,
-                _quart_request.headers.get('User-Agent', ''),
-                _quart_request.remote_addr,
-                headers=dict(_quart_request.headers),
-            )
-        except Exception:
-            pass
+    from lib.wsgi_middleware import register_wsgi_middleware
+
+    register_wsgi_middleware(app)
 
 # Network bulletin — hub-published tips and announcements rendered in the
 # header of the llms.txt view, so a twenty-site network says "here is what
@@ -525,6 +512,12 @@ _page_tiers.register("/llms-small.txt",
 _page_tiers.register("/llms-full.txt",
                      os.environ.get("LLMS_FULL_TIER") or "public")
 
+# Section rules: gate a whole subtree without touching each page's
+# frontmatter — PAGE_TIER_RULES="/internal/**=admin,/api/*/private=auth". A
+# page's own `tier:` still wins over any rule (lib/page_tiers.py).
+for _pattern, _tier in _page_tiers.parse_rules(os.environ.get("PAGE_TIER_RULES")):
+    _page_tiers.register_rule(_pattern, _tier)
+
 # The home page registers via pages/home.py, not pages/markdown.py, so no
 # frontmatter ever declares its tier — under PAGE_DEFAULT_TIER=auth it would
 # silently inherit the gate. The funnel's front door stays public, always.
@@ -538,6 +531,10 @@ ACCESS_ENABLED = _access.configure(
     force=bool(os.environ.get("PAGE_DEFAULT_TIER")
                or os.environ.get("LLMS_PUBLIC_DEFAULT"))
 )
+# FastAPI / Quart: a keyed fetch is verified on the event loop before the
+# package's synchronous check runs, so no worker thread waits on the hub.
+if ACCESS_ENABLED:
+    _access.install_async(app, BACKEND_INFO)
 
 # Wire up the package: /llms.txt, /<page>/llms.txt, /robots.txt, /sitemap.xml,
 # bot-detection middleware, and (on Dash 4.3+) MCP resource registration.
@@ -549,6 +546,21 @@ ACCESS_ENABLED = _access.configure(
 # send `Vary: Accept` so a CDN cannot hand cached HTML to the next agent.
 add_llms_routes(app, LLMSConfig(warn_missing_llms_doc=True))
 
+# ----------------------------------------------------------------------------
+# Page snapshots: with PAGE_SNAPSHOTS=1 a navigation to a docs page every
+# visitor may read is answered from bytes encoded once per process, instead
+# of Dash re-encoding the whole tree per click (lib/page_snapshots.py).
+# Installed always and read per request, so the flag is one env change.
+# ----------------------------------------------------------------------------
+from lib import page_snapshots as _page_snapshots  # noqa: E402
+
+_page_snapshots.apply(app, BACKEND)
+print(
+    "[boilerplate] page snapshots: "
+    + ("ON" if _page_snapshots.enabled() else "off (PAGE_SNAPSHOTS=1 to enable)")
+    + f", {_page_snapshots.page_count()} page(s) recorded."
+)
+
 # ============================================================================
 
 app.layout = create_appshell(dash.page_registry.values())
@@ -569,7 +581,8 @@ _non_public = sum(1 for t in _page_tiers.registered().values() if t != "public")
 print(
     f"[boilerplate] interactive gate: default tier "
     f"'{os.environ.get('PAGE_DEFAULT_TIER') or 'public'}', "
-    f"{_non_public} non-public page(s), machine surfaces "
+    f"{_non_public} non-public page(s), {len(_page_tiers.rules())} section "
+    f"rule(s), machine surfaces "
     f"{'GATED' if not _page_tiers.get_llms_public('/__probe__') else 'open'} "
     f"by default (LLMS_PUBLIC_DEFAULT), access wiring "
     f"{'ON' if ACCESS_ENABLED else 'off'}, control board at "
@@ -578,28 +591,56 @@ print(
 )
 
 # ============================================================================
-# Analytics Tracking (FastAPI) — added LAST on purpose.
-# Starlette runs the most recently added middleware outermost, so registering
-# here (after add_llms_routes) puts the tracker in front of the package's bot
-# middleware and every request gets counted. The Flask/Quart hooks are the
-# mirror image and live above.
+# Edge middleware (FastAPI / Quart): forwarded scheme, analytics, timing —
+# added LAST on purpose. The most recently added middleware runs outermost,
+# so registering here (after add_llms_routes) puts it in front of the
+# package's bot middleware: every request gets counted, and a crawler the
+# package answers itself still sees the client's scheme. The Flask hook is
+# the mirror image and lives above.
 # ============================================================================
 
-if BACKEND == "fastapi":
+if BACKEND_INFO.is_async:
     from lib.asgi_middleware import register_asgi_middleware
 
-    register_asgi_middleware(app)
+    register_asgi_middleware(app, fix_scheme=PROXY_FIX_APPLIED)
 
 # ============================================================================
 # Network analytics — hourly signed rollup POSTed to 2plot.ai so the hub's
 # owner-only /traffic dashboard can chart this app alongside the network.
 # Contract: 2plotai/docs/network/satellite-analytics.md.
 # No-op unless CROSS_APP_WEBHOOK_SECRET is set.
+#
+# Its threads start in every serving process: here, or — in a gunicorn
+# master that preloads this module (gunicorn.conf.py) — in each worker after
+# the fork, since threads do not survive one (lib/prefork.py).
+# ============================================================================
+
+from lib import prefork as _prefork  # noqa: E402
+from lib.satellite_reporter import start_reporter  # noqa: E402
+
+_prefork.in_each_worker(start_reporter)
+
+# ============================================================================
+# /healthz from the outermost layer, with bytes serialized once at boot — the
+# hub reports this probe's latency as the app's speed, so nothing in front of
+# it may add work (lib/health.py). Installed LAST so it runs FIRST: after
+# this line, nothing may wrap the server callable.
+#
+# The same front answers /readyz: 503 until the checks below pass and Dash's
+# first-request setup has run (the front warms that itself), then 200 for
+# good. Point a load balancer's readiness probe there, not at /healthz.
 # ============================================================================
 
-from lib.satellite_reporter import start_reporter
+from lib.health import (  # noqa: E402
+    add_readiness_check,
+    install_health_front,
+    llms_docs_registered,
+)
 
-start_reporter()
+add_readiness_check("pages", lambda: bool(dash.page_registry))
+add_readiness_check("llms-docs", llms_docs_registered)
+install_health_front(app, BACKEND)
+print("[boilerplate] Readiness at /readyz (pages, llms-docs, dash warm-up)")
 
 # MCP wiring used to live down here, calling `from dash import mcp_enabled`
 # and `mcp_enabled(app)`. Both were wrong: the symbol lives in `dash.mcp`, not
@@ -59,6 +59,12 @@ os.environ["TRAFFIC_ANALYTICS_FILE"] = os.path.join(_TMP_STATE, "visitor_analyti
 # Same reason for the control board's override store — and pointing it at a
 # tmp path also keeps the import-time [visibility] boot warning quiet.
 os.environ["PAGE_VISIBILITY_FILE"] = os.path.join(_TMP_STATE, "page_visibility.json")
+# The suite drives cross-worker reloads through the deterministic stat poll;
+# test_control_board turns the inotify watcher on where it tests it.
+os.environ["PAGE_VISIBILITY_WATCH"] = "0"
+# And the props-table cache, so a run neither reads a developer's stale file
+# nor writes one into the checkout.
+os.environ["KWARGS_CACHE_FILE"] = os.path.join(_TMP_STATE, "kwargs_props.json")
 # Behind Cloudflare in production; in tests an outbound ip-api.com lookup per
 # hit would make the suite depend on a third party being up.
 os.environ["ANALYTICS_GEO_LOOKUP"] = "0"
@@ -163,8 +169,9 @@ class Client:
         self._kind = kind
         self._loop = loop
 
-    def get(self, path: str, user_agent: str = BROWSER_UA, accept: str = None) -> Response:
-        headers = {"User-Agent": user_agent}
+    def get(self, path: str, user_agent: str = BROWSER_UA, accept: str = None,
+            headers: dict = None) -> Response:
+        headers = {"User-Agent": user_agent, **(headers or {})}
         if accept is not None:
             headers["Accept"] = accept
 
@@ -196,6 +203,28 @@ class Client:
         r = self._raw.get(path, headers=headers)
         return Response(r.status_code, r.text, dict(r.headers))
 
+    def post(self, path: str, body: bytes, headers: dict = None) -> Response:
+        """A raw-bytes POST — Dash callbacks are exercised as the renderer sends
+        them, so a test can compare response bodies byte for byte."""
+        headers = {"User-Agent": BROWSER_UA, "Content-Type": "application/json",
+                   **(headers or {})}
+
+        if self._kind == "werkzeug":
+            r = self._raw.post(path, data=body, headers=headers)
+            return Response(r.status_code, r.get_data().decode("utf-8", "replace"),
+                            dict(r.headers))
+
+        if self._kind == "quart":
+            async def send():
+                r = await self._raw.post(path, data=body, headers=headers)
+                text = (await r.get_data()).decode("utf-8", "replace")
+                return r.status_code, text, dict(r.headers)
+
+            return Response(*self._loop.run_until_complete(send()))
+
+        r = self._raw.post(path, content=body, headers=headers)
+        return Response(r.status_code, r.text, dict(r.headers))
+
 
 @pytest.fixture(scope="session")
 def client(app):
@@ -22,6 +22,7 @@ session and the failures would look like anything but the cause.
 from __future__ import annotations
 
 import re
+import time
 
 import pytest
 
@@ -106,6 +107,70 @@ def hub_allows(monkeypatch):
     hub_client.clear_cache()
 
 
+@pytest.fixture
+def stand_in_hub(monkeypatch):
+    """A real hub on localhost, reached through the real signed `_post`.
+
+    It checks the webhook signature the way the hub does and answers every
+    agent-key route: VALID_KEY is allowed, any other key denied. Set
+    `.batch = False` to play a hub that predates verify-many, and `.delay`
+    to make every answer slow.
+    """
+    import hashlib
+    import hmac
+    import json
+    import threading
+    import types
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    secret = "stand-in-secret"
+    hub = types.SimpleNamespace(calls=[], batch=True, delay=0.0)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            signed = f"{self.headers['X-AI-Canvas-Timestamp']}.".encode() + body
+            expected = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, self.headers["X-AI-Canvas-Signature"]):
+                return self.answer(401, {})
+            payload = json.loads(body)
+            hub.calls.append((self.path, payload))
+            time.sleep(hub.delay)
+            verdict = "allow" if payload.get("key") == VALID_KEY else "deny"
+            if self.path == "/api/agent-key/verify":
+                return self.answer(200, {"verdict": verdict, "ttl": 300})
+            if self.path == "/api/agent-key/verify-many" and hub.batch:
+                return self.answer(200, {"verdicts": dict.fromkeys(payload["paths"], verdict),
+                                         "ttl": 300})
+            if self.path == "/api/page-tiers":
+                return self.answer(200, {"tiers": {}, "ttl": 300})
+            self.answer(404, {})
+
+        def answer(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("NETWORK_HUB_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setenv("CROSS_APP_WEBHOOK_SECRET", secret)
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    hub_client.clear_cache()
+    try:
+        yield hub
+    finally:
+        server.shutdown()
+        server.server_close()
+        hub_client.clear_cache()
+
+
 def signed_in(monkeypatch, user=None):
     monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
     monkeypatch.setattr(auth, "current_user", lambda: user or FakeUser())
@@ -267,12 +332,547 @@ def test_a_failed_tier_fetch_is_cached_and_loosens_nothing(
     assert page_tiers.effective_tier("/x", hub_client.hub_tiers().get("/x")) == "admin"
 
 
+def test_a_stale_tier_feed_is_served_while_one_thread_refreshes_it(monkeypatch):
+    """Past the refresh point every request still answers from the last good
+    snapshot at once; N of them together start exactly one hub fetch."""
+    import threading
+
+    release, calls = threading.Event(), []
+
+    def hub(route, payload, timeout):
+        calls.append(route)
+        release.wait(5)
+        return {"tiers": {"/x": "admin"}, "ttl": 300}
+
+    monkeypatch.setattr(hub_client, "_post", hub)
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    hub_client.clear_cache()
+    monkeypatch.setattr(hub_client, "_TIERS_CACHE",
+                        ({"/x": "auth"}, time.time() - 1, time.time() - 400))
+
+    answers = []
+    readers = [threading.Thread(target=lambda: answers.append(hub_client.hub_tiers()))
+               for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join(2)
+    assert answers == [{"/x": "auth"}] * 8, "a request waited on the hub"
+    assert len(calls) == 1, "concurrent expiries each fetched"
+
+    release.set()
+    with hub_client._fetch_lock:  # the refresh thread holds it until done
+        pass
+    assert hub_client.hub_tiers() == {"/x": "admin"}
+    assert len(calls) == 1
+
+
+def test_a_failed_refresh_keeps_the_last_good_ceiling(monkeypatch):
+    monkeypatch.setattr(hub_client, "_post", lambda *a, **k: None)
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    hub_client.clear_cache()
+    monkeypatch.setattr(hub_client, "_TIERS_CACHE",
+                        ({"/x": "auth"}, time.time() - 1, time.time() - 400))
+    hub_client.hub_tiers()
+    with hub_client._fetch_lock:
+        pass
+    assert hub_client.hub_tiers() == {"/x": "auth"}, "an outage dropped the ceiling"
+
+
+def test_workers_share_the_tier_snapshot_through_the_file(monkeypatch):
+    """A second worker (a fresh process state) adopts what the first one
+    fetched instead of paying its own hub round trip."""
+    calls = []
+
+    def hub(route, payload, timeout):
+        calls.append(route)
+        return {"tiers": {"/x": "auth"}, "ttl": 300}
+
+    monkeypatch.setattr(hub_client, "_post", hub)
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    hub_client.clear_cache()
+    assert hub_client.hub_tiers() == {"/x": "auth"}
+    assert hub_client._shared_path().exists()
+
+    monkeypatch.setattr(hub_client, "_TIERS_CACHE", ({}, 0.0, 0.0))
+    monkeypatch.setattr(hub_client, "_shared_seen", 0)
+    assert hub_client.hub_tiers() == {"/x": "auth"}
+    assert len(calls) == 1, "the second worker fetched again"
+
+    # Another app's snapshot in the same directory is not ours to serve.
+    monkeypatch.setattr(hub_client, "_TIERS_CACHE", ({}, 0.0, 0.0))
+    monkeypatch.setattr(hub_client, "_shared_seen", 0)
+    monkeypatch.setenv("SATELLITE_APP_KEY", "some-other-app")
+    hub_client.hub_tiers()
+    assert len(calls) == 2
+    hub_client.clear_cache()
+
+
+def test_decisions_are_compiled_once_and_rebuilt_on_any_input_change(
+        restore_tiers, monkeypatch):
+    """Requests read a compiled table; a board toggle, a new hub snapshot or
+    an env flip each land on the very next lookup."""
+    from lib import page_visibility
+
+    compiled = []
+    real = access._compile
+    monkeypatch.setattr(access, "_compile",
+                        lambda path, ceiling: compiled.append(path) or real(path, ceiling))
+    page_tiers.register("/decision-probe", "auth")
+    access.decision("/decision-probe")
+
+    compiled.clear()
+    for _ in range(50):
+        access.decision("/decision-probe")
+        access.decision(PUBLIC_PAGE)
+    assert compiled == [], "a request re-resolved an unchanged page"
+
+    assert access.decision("/decision-probe").window_open
+    monkeypatch.setenv("LLMS_PUBLIC_DEFAULT", "0")
+    assert not access.decision("/decision-probe").window_open, "env flip missed"
+
+    monkeypatch.setitem(page_visibility._overrides, "/decision-probe",
+                        {"visibility": "admin"})
+    assert access.decision("/decision-probe").tier == "admin", "board toggle missed"
+
+    monkeypatch.setattr(hub_client, "_TIERS_CACHE",
+                        ({PUBLIC_PAGE: "hidden"}, time.time() + 60, time.time()))
+    assert access.decision(PUBLIC_PAGE).tier == "hidden", "hub ceiling missed"
+    assert access.decision(PUBLIC_PAGE).degraded == "hidden"
+
+
 def test_a_junk_tier_from_the_hub_cannot_loosen_a_local_tier(restore_tiers):
     page_tiers.register("/x", "admin")
     assert page_tiers.effective_tier("/x", "not-a-tier") == "admin"
     assert page_tiers.effective_tier("/x", "public") == "admin"
 
 
+@pytest.fixture
+def section_rules(restore_tiers):
+    saved = (dict(page_tiers._RULES), dict(page_tiers._RULE_LLMS_PUBLIC),
+             set(page_tiers._INHERITED))
+    yield page_tiers.register_rule
+    page_tiers._RULES.clear()
+    page_tiers._RULES.update(saved[0])
+    page_tiers._RULE_LLMS_PUBLIC.clear()
+    page_tiers._RULE_LLMS_PUBLIC.update(saved[1])
+    page_tiers._INHERITED.clear()
+    page_tiers._INHERITED.update(saved[2])
+
+
+def test_a_section_rule_gates_every_page_under_it(section_rules):
+    section_rules("/internal/**", "admin")
+    section_rules("/api/*/private", "auth", llms_public=False)
+    page_tiers.register("/internal/runbook", None)        # no frontmatter tier
+    page_tiers.register("/internal/faq", "public")        # frontmatter wins
+
+    assert page_tiers.local_tier("/internal") == "admin"
+    assert page_tiers.local_tier("/internal/deep/generated/page") == "admin"
+    assert page_tiers.registered()["/internal/runbook"] == "admin"
+    assert page_tiers.local_tier("/internal/faq") == "public"
+    assert page_tiers.local_tier("/internals") == page_tiers._default_tier()
+
+    assert page_tiers.local_tier("/api/v2/private") == "auth"
+    assert page_tiers.local_tier("/api/v2/beta/private") != "auth", "* crossed a segment"
+    assert not page_tiers.get_llms_public("/api/v2/private")
+    assert page_tiers.declares_tier("/api/v2/private")
+
+
+def test_the_most_specific_rule_wins(section_rules):
+    section_rules("/**", "auth")
+    section_rules("/guides/**", "public")
+    section_rules("/guides/*/drafts/**", "hidden")
+    section_rules("/guides/setup/drafts/**", "admin")
+    assert page_tiers.local_tier("/anything") == "auth"
+    assert page_tiers.local_tier("/guides/intro") == "public"
+    assert page_tiers.local_tier("/guides/intro/drafts/x") == "hidden"
+    assert page_tiers.local_tier("/guides/setup/drafts/x") == "admin"
+
+
+def test_each_path_is_matched_once_per_rule_set(section_rules, monkeypatch):
+    section_rules("/internal/**", "admin")
+    walks = []
+    real = page_tiers.RuleTrie.matches
+    monkeypatch.setattr(page_tiers.RuleTrie, "matches",
+                        lambda self, path: walks.append(path) or real(self, path))
+    for _ in range(50):
+        page_tiers.local_tier("/internal/a")
+        page_tiers.get_llms_public("/internal/a")
+    assert walks == ["/internal/a"]
+
+    section_rules("/internal/a", "hidden")
+    assert page_tiers.local_tier("/internal/a") == "hidden", "a new rule was not compiled in"
+    assert walks == ["/internal/a", "/internal/a"]
+
+
+def test_a_hub_pattern_ceiling_raises_a_whole_section(section_rules, monkeypatch):
+    ceiling = {"/reference/**": "auth", "/reference/secret": "admin",
+               "/reference/*/old": "hidden"}
+    assert page_tiers.ceiling_for("/reference/button", ceiling) == "auth"
+    assert page_tiers.ceiling_for("/reference/secret", ceiling) == "admin"
+    assert page_tiers.ceiling_for("/reference/button/old", ceiling) == "hidden"
+    assert page_tiers.ceiling_for("/guide", ceiling) is None
+
+    page_tiers.register("/reference/button", "public")
+    monkeypatch.setattr(hub_client, "hub_tiers", lambda timeout=3.0: ceiling)
+    access.clear_decisions()
+    assert access.decision("/reference/button").tier == "auth"
+    assert not access.decision("/reference/button").window_open, \
+        "the hub's gate was loosened by the machine window"
+
+
+def test_malformed_rules_are_refused(section_rules):
+    assert section_rules("/a/**/b", "auth") is None
+    assert section_rules("/a/**", "secret") is None
+    assert page_tiers.rules() == {} or "/a/**" not in page_tiers.rules()
+    assert page_tiers.parse_rules(" /internal/**=admin, junk ,/api/*=auth") == [
+        ("/internal/**", "admin"), ("/api/*", "auth")]
+
+
+def test_the_verdict_cache_evicts_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr(hub_client, "_CACHE_MAX", 3)
+    hub_client.clear_cache()
+    for path in ("/a", "/b", "/c"):
+        hub_client._cache_put("fp", path, "allow", 60)
+    assert hub_client._cache_get("fp", "/a") == "allow"  # /a is now the newest
+    hub_client._cache_put("fp", "/d", "allow", 60)
+    assert hub_client._cache_get("fp", "/b") is None, "evicted the wrong entry"
+    assert hub_client._cache_get("fp", "/a") == "allow"
+    assert len(hub_client._VERDICT_CACHE) == 3, "a full cache was flushed whole"
+
+
+def test_concurrent_misses_for_one_key_and_path_send_one_verify(monkeypatch):
+    import threading
+
+    release, calls = threading.Event(), []
+
+    def hub(route, payload, timeout):
+        calls.append(payload["path"])
+        release.wait(5)
+        return {"verdict": "allow", "ttl": 300}
+
+    monkeypatch.setattr(hub_client, "_post", hub)
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    hub_client.clear_cache()
+
+    verdicts = []
+    agents = [threading.Thread(
+        target=lambda: verdicts.append(hub_client.verify(VALID_KEY, "/x", "auth")))
+        for _ in range(8)]
+    for agent in agents:
+        agent.start()
+    time.sleep(0.05)
+    release.set()
+    for agent in agents:
+        agent.join(2)
+    assert verdicts == ["allow"] * 8
+    assert calls == ["/x"], "concurrent misses each asked the hub"
+
+
+def test_concurrent_first_fetches_with_one_key_send_one_batch(monkeypatch):
+    import threading
+
+    release, batches = threading.Event(), []
+
+    def hub(route, payload, timeout):
+        batches.append(route)
+        release.wait(5)
+        return {"verdicts": {path: "allow" for path in payload["paths"]}, "ttl": 300}
+
+    monkeypatch.setattr(hub_client, "_post", hub)
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    hub_client.clear_cache()
+
+    pages = {"/a": "auth", "/b": "auth"}
+    answers = []
+    agents = [threading.Thread(
+        target=lambda: answers.append(hub_client.verify_many(VALID_KEY, pages)))
+        for _ in range(6)]
+    for agent in agents:
+        agent.start()
+    time.sleep(0.05)
+    release.set()
+    for agent in agents:
+        agent.join(2)
+    assert answers == [{"/a": "allow", "/b": "allow"}] * 6
+    assert batches == ["/api/agent-key/verify-many"], "each miss sent its own batch"
+    hub_client.clear_cache()
+
+
+def test_no_batch_is_assembled_when_it_cannot_be_sent(access_on, hub_allows, monkeypatch):
+    """Hub off, or in batch backoff: a keyed miss goes straight to verify,
+    without walking the registry for siblings or reading the shared cache."""
+    anonymous(monkeypatch)
+    monkeypatch.setattr(access, "_request_key", lambda: VALID_KEY)
+    monkeypatch.setattr(access, "_same_tier_siblings", lambda *a: pytest.fail(
+        "siblings were built for a batch that could not be sent"))
+    monkeypatch.setattr(hub_client, "_batch_retry_at", time.time() + 60)
+    assert access.check(GATED_PAGE) == "allow"
+    monkeypatch.setattr(hub_client, "enabled", lambda: False)
+    hub_client.clear_cache()
+    assert access.check(GATED_PAGE) == "gated"
+
+
+def test_workers_share_verdicts_by_fingerprint_only(tmp_path, monkeypatch):
+    import sqlite3
+
+    calls = []
+
+    def hub(route, payload, timeout):
+        calls.append(payload["path"])
+        return {"verdict": "deny", "ttl": 60}
+
+    shared = tmp_path / "verdicts.sqlite"
+    monkeypatch.setenv("HUB_VERDICT_CACHE_FILE", str(shared))
+    monkeypatch.setattr(hub_client, "_post", hub)
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    hub_client.clear_cache()
+
+    assert hub_client.verify(VALID_KEY, "/x", "auth") == "deny"
+    hub_client._VERDICT_CACHE.clear()  # another worker: nothing in memory
+    assert hub_client.verify(VALID_KEY, "/x", "auth") == "deny"
+    assert calls == ["/x"], "the second worker verified again"
+
+    rows = sqlite3.connect(shared).execute("SELECT * FROM verdicts").fetchall()
+    assert rows and all(VALID_KEY not in str(row) for row in rows)
+    hub_client.clear_cache()
+
+
+def keyed_crawl(monkeypatch, key, pages):
+    anonymous(monkeypatch)
+    monkeypatch.setattr(access, "_request_key", lambda: key)
+    for page in pages:
+        page_tiers.register(page, "auth", llms_public=False)
+    return [access.check(page) for page in pages]
+
+
+def test_an_agent_crawl_costs_one_hub_round_trip(access_on, stand_in_hub, monkeypatch):
+    """The first keyed fetch verifies every same-tier sibling in one batch;
+    the rest of the crawl is cache hits."""
+    pages = [f"/crawl-{n}" for n in range(40)]
+    assert keyed_crawl(monkeypatch, VALID_KEY, pages) == ["allow"] * 40
+    routes = [route for route, _ in stand_in_hub.calls if "/agent-key/" in route]
+    assert routes == ["/api/agent-key/verify-many"], routes
+
+    batch = stand_in_hub.calls[-1][1]["paths"]
+    assert set(pages) | {GATED_PAGE} <= set(batch)
+    assert PUBLIC_PAGE not in batch, "a public page was sent for verification"
+    assert all(tier == "auth" for tier in batch.values())
+
+
+def test_a_denied_key_is_denied_for_the_whole_crawl_in_one_call(
+        access_on, stand_in_hub, monkeypatch):
+    assert keyed_crawl(monkeypatch, "k2p_revoked", ["/a", "/b", "/c"]) == ["deny"] * 3
+    assert len([c for c in stand_in_hub.calls if "/agent-key/" in c[0]]) == 1
+
+
+def test_a_hub_without_batch_verify_falls_back_per_path(access_on, stand_in_hub, monkeypatch):
+    """An older hub 404s verify-many: each path is verified on its own, and
+    the batch is not retried before every one of them."""
+    stand_in_hub.batch = False
+    assert keyed_crawl(monkeypatch, VALID_KEY, ["/a", "/b", "/c"]) == ["allow"] * 3
+    routes = [route for route, _ in stand_in_hub.calls if "/agent-key/" in route]
+    assert routes.count("/api/agent-key/verify-many") == 1
+    assert routes.count("/api/agent-key/verify") == 3
+
+
+def test_an_async_verify_leaves_the_loop_serving(stand_in_hub):
+    """Five coroutines miss on one pair while the hub is slow: one POST, and
+    the loop keeps running other work the whole time."""
+    import asyncio
+
+    stand_in_hub.delay = 0.2
+
+    async def scenario():
+        ticks = 0
+
+        async def other_requests():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(other_requests())
+        verdicts = await asyncio.gather(*(
+            hub_client.verify_async(VALID_KEY, "/p", "auth") for _ in range(5)))
+        ticker.cancel()
+        return verdicts, ticks
+
+    verdicts, ticks = asyncio.run(scenario())
+    assert verdicts == ["allow"] * 5
+    assert ticks >= 10, "the event loop stalled behind the hub"
+    assert [route for route, _ in stand_in_hub.calls] == ["/api/agent-key/verify"]
+    # The blocking twin reads the same cache.
+    assert hub_client.verify(VALID_KEY, "/p", "auth") == "allow"
+    assert len(stand_in_hub.calls) == 1
+
+
+def test_a_thread_and_a_coroutine_share_one_flight(stand_in_hub):
+    import asyncio
+    import threading
+
+    stand_in_hub.delay = 0.2
+    from_thread = []
+    worker = threading.Thread(
+        target=lambda: from_thread.append(hub_client.verify(VALID_KEY, "/p", "auth")))
+    worker.start()
+    while not hub_client._IN_FLIGHT:
+        time.sleep(0.005)
+    assert asyncio.run(hub_client.verify_async(VALID_KEY, "/p", "auth")) == "allow"
+    worker.join()
+    assert from_thread == ["allow"] and len(stand_in_hub.calls) == 1
+
+
+def test_the_asgi_middleware_verifies_before_the_sync_check(access_on, stand_in_hub,
+                                                            monkeypatch):
+    """The package's check runs in a worker thread on FastAPI and Quart. By
+    the time it does, the key has been verified on the loop, and the key is
+    readable there even with no framework request object."""
+    import asyncio
+
+    anonymous(monkeypatch)
+    seen = []
+
+    async def package_route(scope, receive, send):
+        seen.append((access._request_key(), access.check(GATED_PAGE)))
+        seen.append([route for route, _ in stand_in_hub.calls if "/agent-key/" in route])
+
+    front = access._AsyncKeyCheck(package_route)
+    scope = {"type": "http", "path": f"{GATED_PAGE}/llms.txt",
+             "query_string": f"raw=1&key={VALID_KEY}".encode()}
+    asyncio.run(front(scope, None, None))
+    assert seen == [(VALID_KEY, "allow"), ["/api/agent-key/verify-many"]]
+    assert access._request_key() == "", "the key outlived its request"
+
+    unkeyed = {"type": "http", "path": GATED_PAGE, "query_string": b""}
+    seen.clear()
+    asyncio.run(front(unkeyed, None, None))
+    assert seen == [("", "gated"), ["/api/agent-key/verify-many"]]
+
+
+CREDENTIAL_SHAPES = [
+    ("", False),
+    ("theme=dark; _ga=GA1.2.3", False),
+    ("my__session=x; sessionid=y", False),
+    ("__session=eyJ", True),
+    ("theme=dark; __session_Xy12=eyJ", True),
+    ("__dca_identity=abc", True),
+    ("session=abc", True),
+]
+
+
+@pytest.mark.parametrize("cookie, credentialed", CREDENTIAL_SHAPES)
+def test_which_cookies_count_as_credentials(cookie, credentialed):
+    assert auth.carries_credentials({"cookie": cookie}) is credentialed
+    assert auth.carries_credentials({"cookie": cookie, "authorization": "Bearer eyJ"})
+
+
+@pytest.mark.parametrize("cookie, credentialed", CREDENTIAL_SHAPES)
+def test_the_asgi_key_check_leaves_signed_in_readers_to_check(
+        access_on, stand_in_hub, cookie, credentialed):
+    """Outside any request scope the middleware cannot see who is signed in;
+    a request carrying a session spends no hub call there."""
+    import asyncio
+
+    passed = []
+
+    async def package_route(scope, receive, send):
+        passed.append(scope["path"])
+
+    front = access._AsyncKeyCheck(package_route)
+    asyncio.run(front({"type": "http", "path": GATED_PAGE,
+                       "headers": [(b"cookie", cookie.encode())],
+                       "query_string": f"key={VALID_KEY}".encode()}, None, None))
+    assert passed == [GATED_PAGE]
+    assert bool(stand_in_hub.calls) is not credentialed
+
+
+def test_async_verifies_read_the_shared_cache_off_the_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    monkeypatch.setenv("HUB_VERDICT_CACHE_FILE", str(tmp_path / "verdicts.sqlite"))
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+
+    async def hub(route, payload, timeout):
+        return {"verdicts": {p: "allow" for p in payload["paths"]}, "ttl": 60}
+
+    monkeypatch.setattr(hub_client, "_post_async", hub)
+    hub_client.clear_cache()
+    threads = []
+    real = hub_client._shared_get
+    monkeypatch.setattr(hub_client, "_shared_get", lambda *a: (
+        threads.append(threading.current_thread()) or real(*a)))
+
+    async def scenario():
+        return (threading.current_thread(),
+                await hub_client.verify_many_async(VALID_KEY, {"/a": "auth"}))
+
+    loop_thread, verdicts = asyncio.run(scenario())
+    assert verdicts == {"/a": "allow"}
+    assert threads and loop_thread not in threads, "SQLite ran on the event loop"
+    hub_client.clear_cache()
+
+
+def test_a_cold_async_tier_fetch_is_one_post(stand_in_hub):
+    import asyncio
+
+    stand_in_hub.delay = 0.1
+
+    async def scenario():
+        return await asyncio.gather(*(hub_client.hub_tiers_async() for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [{}] * 5
+    assert [route for route, _ in stand_in_hub.calls] == ["/api/page-tiers"]
+    assert hub_client._TIERS_CACHE[2], "the async fetch did not land in the cache"
+
+
+def test_sync_tiers_on_the_loop_never_wait_on_an_async_fetch(monkeypatch):
+    """Under FastAPI, Dash runs sync callbacks on the loop's thread: a sync
+    hub_tiers() there must answer at once while a coroutine's fetch is in
+    flight, and must not start a second one."""
+    import asyncio
+
+    posts, sync_posts, gate = [], [], {}
+
+    async def slow_hub(route, payload, timeout):
+        posts.append(route)
+        await gate["release"].wait()
+        return {"tiers": {"/x": "admin"}, "ttl": 300}
+
+    monkeypatch.setattr(hub_client, "_post_async", slow_hub)
+    monkeypatch.setattr(hub_client, "_post", lambda *a, **k: sync_posts.append(a))
+    monkeypatch.setattr(hub_client, "enabled", lambda: True)
+    monkeypatch.setenv("HUB_TIERS_FILE", "0")
+    hub_client.clear_cache()
+    # Past a failed first fetch's retry window: nothing good to serve.
+    monkeypatch.setattr(hub_client, "_TIERS_CACHE", ({}, time.time() - 1, 0.0))
+
+    async def scenario():
+        gate["release"] = asyncio.Event()
+        first = asyncio.create_task(hub_client.hub_tiers_async())
+        while not posts:
+            await asyncio.sleep(0)
+        second = asyncio.create_task(hub_client.hub_tiers_async())
+        started = time.monotonic()
+        on_the_loop = hub_client.hub_tiers()
+        waited = time.monotonic() - started
+        gate["release"].set()
+        return on_the_loop, waited, await first, await second
+
+    on_the_loop, waited, first, second = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert on_the_loop == {} and waited < 0.5, "the loop's thread waited on the hub"
+    assert first == second == {"/x": "admin"}
+    assert posts == ["/api/page-tiers"] and not sync_posts
+    assert hub_client._TIERS_FLIGHT is None
+
+
+def test_install_async_only_wraps_asgi_backends(app_module):
+    from lib.backend import get_backend_info
+
+    assert not access.install_async(app_module.app, get_backend_info("flask"))
+
+
 # ---------------------------------------------------------------------------
 # The mint path (nothing calls it on this deployment; forks will)
 # ---------------------------------------------------------------------------
@@ -355,6 +955,395 @@ def test_the_cache_never_stores_the_key_itself():
 # ---------------------------------------------------------------------------
 
 
+def test_one_request_resolves_its_viewer_once(monkeypatch):
+    """check, resolve_page_access, viewer_identity and the board all ask;
+    the session is read once per request, and never across two."""
+    from flask import Flask
+
+    lookups = []
+    monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
+    monkeypatch.setattr(auth, "_lookup_user",
+                        lambda: lookups.append(1) or FakeUser(email="a@example.com"))
+    server = Flask(__name__)
+
+    with server.test_request_context("/"):
+        assert auth.current_user().email == "a@example.com"
+        auth.is_admin_user()
+        auth.viewer_identity()
+        auth.current_user()
+    assert len(lookups) == 1, "the session was re-read within one request"
+
+    with server.test_request_context("/"):
+        auth.current_user()
+    assert len(lookups) == 2, "an identity outlived its request"
+
+    auth.current_user()
+    auth.current_user()
+    assert len(lookups) == 4, "memoized outside any request"
+
+
+def test_the_asgi_request_scope_memoizes_per_request(monkeypatch):
+    import asyncio
+
+    lookups = []
+    monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
+    monkeypatch.setattr(auth, "_lookup_user", lambda: lookups.append(1) or FakeUser())
+
+    async def endpoint(scope, receive, send):
+        auth.current_user()
+        await asyncio.sleep(0)
+        auth.current_user()
+
+    scoped = auth._RequestScope(endpoint)
+
+    async def two_requests():
+        await asyncio.gather(*(scoped({"type": "http"}, None, None) for _ in range(2)))
+
+    asyncio.run(two_requests())
+    assert len(lookups) == 2
+
+
+def test_the_admin_allowlist_is_parsed_once_and_follows_the_env(monkeypatch):
+    auth._admin_allowlist.cache_clear()
+    monkeypatch.setenv("ADMIN_EMAILS", "Ops@Example.com, other@example.com")
+    user = FakeUser(email="ops@example.com")
+    assert auth.is_admin_user(user) and auth.is_admin_user(user)
+    assert auth._admin_allowlist.cache_info().misses == 1
+
+    monkeypatch.setenv("ADMIN_EMAILS", "other@example.com")
+    assert not auth.is_admin_user(user), "an allowlist edit did not apply"
+
+
+# ---------------------------------------------------------------------------
+# Local session verification: the signed-in reader survives a slow Clerk
+# ---------------------------------------------------------------------------
+
+FRONTEND_API = "https://clerk.example.test"
+
+
+@pytest.fixture
+def stand_in_jwks(monkeypatch):
+    """Clerk's published key set, served from localhost.
+
+    `.mint(claims)` signs a session token the way Clerk does; `.rotate()`
+    publishes a new key; `.fetches` counts key-set downloads.
+    """
+    import base64
+    import json
+    import threading
+    import types
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+    def b64(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    def b64int(n: int) -> str:
+        return b64(n.to_bytes((n.bit_length() + 7) // 8, "big"))
+
+    keys = types.SimpleNamespace(fetches=0, signing={}, kid=None)
+
+    def rotate():
+        keys.kid = f"ins_{len(keys.signing) + 1}"
+        keys.signing[keys.kid] = rsa.generate_private_key(public_exponent=65537,
+                                                          key_size=2048)
+
+    def mint(sub="user_1", kid=None, **claims):
+        now = int(time.time())
+        claims = {"sub": sub, "sid": "sess_1", "iss": FRONTEND_API, "iat": now,
+                  "nbf": now, "exp": now + 60, "email": f"{sub}@example.com",
+                  **claims}
+        kid = kid or keys.kid
+        head = b64(json.dumps({"alg": "RS256", "kid": kid, "typ": "JWT"}).encode())
+        body = b64(json.dumps(claims).encode())
+        signature = keys.signing[kid].sign(f"{head}.{body}".encode(),
+                                           padding.PKCS1v15(), hashes.SHA256())
+        return f"{head}.{body}.{b64(signature)}"
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            keys.fetches += 1
+            document = {"keys": [
+                {"kty": "RSA", "kid": kid, "alg": "RS256", "use": "sig",
+                 "n": b64int(private.public_key().public_numbers().n),
+                 "e": b64int(private.public_key().public_numbers().e)}
+                for kid, private in keys.signing.items()]}
+            data = json.dumps(document).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    rotate()
+    keys.rotate, keys.mint = rotate, mint
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    keys.server = server
+    monkeypatch.setenv("CLERK_LOCAL_VERIFY", "1")
+    monkeypatch.setenv("CLERK_FRONTEND_API", FRONTEND_API)
+    monkeypatch.setenv("CLERK_JWKS_URL",
+                       f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    auth.clear_session_cache()
+    # What configure_app starts in each worker, awaited.
+    auth._refresh_jwks_in_background()
+    with auth._jwks_lock:
+        pass
+    try:
+        yield keys
+    finally:
+        server.shutdown()
+        server.server_close()
+        auth.clear_session_cache()
+
+
+def test_a_session_token_verifies_locally_and_once(stand_in_jwks, monkeypatch):
+    token = stand_in_jwks.mint()
+    user = auth.session_user(token)
+    assert user.user_id == "user_1" and user.email == "user_1@example.com"
+
+    def must_not_verify(token):
+        raise AssertionError("a cached session was verified again")
+
+    monkeypatch.setattr(auth, "verify_session_token", must_not_verify)
+    assert auth.session_user(token) is user
+    assert stand_in_jwks.fetches == 1
+
+
+@pytest.mark.parametrize("tamper", ["signature", "expired", "issuer", "algorithm"])
+def test_a_token_the_keys_do_not_vouch_for_is_refused(stand_in_jwks, tamper):
+    import base64
+    import json
+
+    token = {
+        "signature": lambda: stand_in_jwks.mint()[:-4] + "AAAA",
+        "expired": lambda: stand_in_jwks.mint(exp=int(time.time()) - 60),
+        "issuer": lambda: stand_in_jwks.mint(iss="https://clerk.elsewhere.test"),
+        "algorithm": lambda: ".".join([
+            base64.urlsafe_b64encode(json.dumps({"alg": "none", "kid": stand_in_jwks.kid})
+                                     .encode()).rstrip(b"=").decode(),
+            stand_in_jwks.mint().split(".")[1], ""]),
+    }[tamper]()
+    assert auth.verify_session_token(token) is None
+    assert auth.session_user(token) is None
+
+
+def test_rotated_keys_are_fetched_once_and_forged_kids_are_rate_limited(stand_in_jwks):
+    import base64
+    import json
+
+    assert auth.session_user(stand_in_jwks.mint())
+    stand_in_jwks.rotate()
+    # Inside the miss backoff a new kid is the package's to verify; past it,
+    # the miss starts one background fetch — never one the request waits on.
+    assert auth.session_user(stand_in_jwks.mint()) is None
+    assert stand_in_jwks.fetches == 1
+    auth._jwks_retry_at = 0.0
+    assert auth.session_user(stand_in_jwks.mint(sub="user_2")) is None
+    with auth._jwks_lock:
+        pass
+    assert auth.session_user(stand_in_jwks.mint(sub="user_2")).user_id == "user_2"
+    assert stand_in_jwks.fetches == 2
+
+    forged = stand_in_jwks.mint().split(".")
+    forged[0] = base64.urlsafe_b64encode(
+        json.dumps({"alg": "RS256", "kid": "ins_forged"}).encode()).rstrip(b"=").decode()
+    auth._jwks_retry_at = 0.0
+    for _ in range(20):
+        assert auth.verify_session_token(".".join(forged)) is None
+    with auth._jwks_lock:
+        pass
+    assert stand_in_jwks.fetches == 3, "a forged kid fetched more than once per backoff"
+
+
+def test_a_key_miss_never_waits_on_the_fetch(stand_in_jwks, monkeypatch):
+    """On FastAPI and Quart the lookup runs on the event loop: a slow key
+    server must cost the request nothing."""
+    import threading
+
+    release, real = threading.Event(), auth._fetch_jwks
+
+    def slow_fetch():
+        release.wait(5)
+        return real()
+
+    monkeypatch.setattr(auth, "_fetch_jwks", slow_fetch)
+    auth.clear_session_cache()
+    token = stand_in_jwks.mint()
+    started = time.monotonic()
+    assert auth.session_user(token) is None, "no keys yet: the package's call"
+    assert auth.session_user(token) is None
+    assert time.monotonic() - started < 1, "a request waited on the key fetch"
+    release.set()
+    with auth._jwks_lock:
+        pass
+    assert auth.session_user(token).user_id == "user_1"
+
+
+def test_stale_keys_keep_verifying_while_clerk_is_down(stand_in_jwks):
+    assert auth.session_user(stand_in_jwks.mint())
+    stand_in_jwks.server.shutdown()
+    stand_in_jwks.server.server_close()
+    keys, _ = auth._JWKS
+    auth._JWKS = (keys, time.time() - auth.JWKS_MAX_AGE_S * 2)
+    auth._jwks_retry_at = 0.0
+
+    assert auth.session_user(stand_in_jwks.mint(sub="user_2")).user_id == "user_2"
+    with auth._jwks_lock:  # the background refresh has given up
+        pass
+    assert auth._JWKS[0] is keys
+
+
+def test_flask_requests_skip_the_clerk_round_trip(stand_in_jwks, monkeypatch):
+    """The package's before_request only runs when the token does not
+    verify here; either way the request resolves its viewer."""
+    import types
+
+    from flask import Flask, g
+
+    server = Flask(__name__)
+    slow_path = []
+
+    @server.before_request
+    def _populate_clerk_user():
+        slow_path.append(1)
+        g.clerk_user = None
+
+    assert auth._install_local_verify(types.SimpleNamespace(server=server))
+    monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
+
+    @server.route("/")
+    def whoami():
+        user = auth.current_user()
+        return user.user_id if user else "anonymous"
+
+    client = server.test_client()
+    client.set_cookie("__session", stand_in_jwks.mint())
+    assert client.get("/").text == "user_1" and not slow_path
+
+    bearer = {"Authorization": f"Bearer {stand_in_jwks.mint(sub='user_2')}"}
+    assert client.get("/", headers=bearer).text == "user_2" and not slow_path
+
+    client.set_cookie("__session", "not-a-token")
+    assert client.get("/").text == "anonymous" and slow_path == [1]
+
+
+def test_asgi_requests_verify_from_the_scope_headers(stand_in_jwks, monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
+    seen = []
+
+    async def endpoint(scope, receive, send):
+        seen.append(auth.current_user())
+
+    cookie = f"theme=dark; __session={stand_in_jwks.mint()}".encode()
+    scope = {"type": "http", "headers": [(b"cookie", cookie)]}
+    asyncio.run(auth._RequestScope(endpoint)(scope, None, None))
+    assert seen[0].user_id == "user_1"
+
+
+def test_flask_paths_the_package_settles_never_verify_here(stand_in_jwks, monkeypatch):
+    import types
+
+    import dash_clerk_auth
+    from flask import Flask, g
+
+    server = Flask(__name__)
+    package_hook = []
+
+    @server.before_request
+    def _populate_clerk_user():
+        package_hook.append(1)
+        g.clerk_user = None
+
+    def must_not_verify(token):
+        raise AssertionError("verified a request the package settles itself")
+
+    assert auth._install_local_verify(types.SimpleNamespace(server=server))
+    monkeypatch.setattr(auth, "verify_session_token", must_not_verify)
+    monkeypatch.setitem(dash_clerk_auth._clerk_config, "session_secret", "s3cret")
+    server.route("/<path:anything>")(lambda anything: "")
+
+    client = server.test_client()
+    client.set_cookie("__session", stand_in_jwks.mint())
+    for path in ("/assets/style.css", "/_dash-component-suites/dash/x.js", "/health"):
+        assert client.get(path).status_code == 200
+    client.set_cookie("__dca_identity", "signed-identity")
+    assert client.get("/page").status_code == 200
+    assert package_hook == [1, 1, 1, 1]
+
+
+def test_the_token_must_be_for_this_instance_and_an_authorized_party(
+        stand_in_jwks, monkeypatch):
+    import base64
+
+    import dash_clerk_auth
+
+    monkeypatch.setitem(dash_clerk_auth._clerk_config, "authorized_parties",
+                        ["https://2plot.ai"])
+    assert auth.verify_session_token(stand_in_jwks.mint(azp="https://2plot.ai"))
+    assert auth.verify_session_token(stand_in_jwks.mint(azp="https://evil.test")) is None
+    assert auth.verify_session_token(stand_in_jwks.mint()) is None
+
+    # Without CLERK_FRONTEND_API the issuer is the host in the publishable key.
+    monkeypatch.delenv("CLERK_FRONTEND_API")
+    host = FRONTEND_API.removeprefix("https://")
+    monkeypatch.setenv("CLERK_PUBLISHABLE_KEY",
+                       "pk_test_" + base64.b64encode(f"{host}$".encode()).decode())
+    assert auth._issuer() == FRONTEND_API
+    assert auth.verify_session_token(stand_in_jwks.mint(azp="https://2plot.ai"))
+    assert auth.verify_session_token(
+        stand_in_jwks.mint(azp="https://2plot.ai", iss="https://clerk.elsewhere.test")) is None
+    assert auth.verify_session_token(stand_in_jwks.mint(azp="https://2plot.ai", iss=None)) is None
+
+
+def test_a_reader_without_an_email_is_profiled_off_the_request_path(
+        stand_in_jwks, monkeypatch):
+    import threading
+
+    import dash_clerk_auth
+
+    release, fetched = threading.Event(), []
+
+    def slow_users_api(user_id, **kwargs):
+        release.wait(5)
+        fetched.append(user_id)
+        return {"email": "reader@example.com", "first_name": "Ada"}
+
+    monkeypatch.setattr(dash_clerk_auth, "get_user_by_id_sync", slow_users_api)
+    token = stand_in_jwks.mint(email=None)
+
+    started = time.monotonic()
+    assert auth.session_user(token) is None, "admitted without the email the allowlists need"
+    assert auth.session_user(token) is None
+    assert time.monotonic() - started < 1, "waited on the users API"
+    release.set()
+    for _ in range(100):
+        if "user_1" in auth._PROFILES:
+            break
+        time.sleep(0.01)
+    assert fetched == ["user_1"], "one fetch per reader, however many requests"
+    user = auth.session_user(token)
+    assert user.email == "reader@example.com" and user.first_name == "Ada"
+
+
+def test_local_verification_is_opt_in(stand_in_jwks, monkeypatch):
+    monkeypatch.delenv("CLERK_LOCAL_VERIFY")
+    assert not auth.local_verify_enabled()
+    monkeypatch.setenv("CLERK_LOCAL_VERIFY", "1")
+    monkeypatch.delenv("CLERK_JWKS_URL")
+    assert auth.jwks_url() == f"{FRONTEND_API}/.well-known/jwks.json"
+    monkeypatch.delenv("CLERK_FRONTEND_API")
+    assert not auth.local_verify_enabled(), "no key set to verify against"
+
+
 def test_markdown_is_byte_identical_with_and_without_a_signed_in_reader(
     access_on, client, monkeypatch
 ):
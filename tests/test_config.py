@@ -238,3 +238,111 @@ def test_no_links_to_retired_domains():
         for match in RETIRED_LINKS.finditer(path.read_text(errors="ignore")):
             offenders.append(f"{path.relative_to(REPO_ROOT)} -> {match.group(1)}")
     assert offenders == [], f"links to retired domains: {offenders}"
+
+
+# ---------------------------------------------------------------------------
+# gunicorn preload (gunicorn.conf.py, lib/prefork.py)
+# ---------------------------------------------------------------------------
+
+
+def test_gunicorn_conf_preloads_and_the_launcher_uses_it(monkeypatch):
+    import runpy
+
+    from lib.prefork import PRELOAD_ENV
+
+    # setenv first, so the conf's own write is undone at teardown.
+    monkeypatch.setenv(PRELOAD_ENV, "0")
+    monkeypatch.delenv("GUNICORN_PRELOAD", raising=False)
+    conf = runpy.run_path(str(REPO_ROOT / "gunicorn.conf.py"))
+    assert conf["preload_app"] is True
+    assert callable(conf["post_fork"]) and callable(conf["when_ready"])
+    assert conf["worker_class"] == "gthread"
+    from lib.serve import plan
+
+    assert "gunicorn.conf.py" in plan("flask").argv()
+
+
+def test_a_preloaded_master_leaves_worker_threads_to_the_workers(monkeypatch):
+    from lib import prefork
+
+    monkeypatch.setattr(prefork, "_deferred", [])
+    monkeypatch.setenv(prefork.PRELOAD_ENV, "1")
+    started = []
+    prefork.in_each_worker(lambda: started.append("reporter"))
+    assert started == []                      # not in the master
+    prefork.worker_started()
+    assert started == ["reporter"] and not prefork.preloading()
+    prefork.in_each_worker(lambda: started.append("late"))
+    assert started[-1] == "late"              # a worker runs it at once
+
+
+# ---------------------------------------------------------------------------
+# Server launcher (lib/serve.py)
+# ---------------------------------------------------------------------------
+
+
+def test_every_start_command_goes_through_the_launcher():
+    for name in ("render.yaml", "Dockerfile"):
+        assert "lib.serve" in (REPO_ROOT / name).read_text(), name
+
+
+@pytest.mark.parametrize("backend, server, worker_class", [
+    ("flask", "gunicorn", "gthread"),
+    ("fastapi", "uvicorn", "asyncio"),
+    ("quart", "hypercorn", None),
+])
+def test_each_backend_gets_its_own_server(monkeypatch, backend, server,
+                                          worker_class):
+    from lib.serve import plan
+
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    chosen = plan(backend, bind="0.0.0.0:8550", cpus=4, memory_mb=8192)
+    assert chosen.server == server and chosen.argv()[2] == server
+    if worker_class:
+        assert chosen.worker_class == worker_class
+    # Threaded WSGI: 2 x CPUs + 1. An event loop per core for ASGI.
+    assert chosen.workers == (9 if backend == "flask" else 4)
+
+
+def test_workers_are_capped_by_memory_and_a_fraction_of_a_cpu(monkeypatch):
+    from lib.serve import plan
+
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("WORKER_MEMORY_MB", raising=False)
+    # A Render starter instance: half a CPU, 512 MB.
+    assert plan("flask", cpus=0.5, memory_mb=512).workers == 2
+    assert plan("fastapi", cpus=0.5, memory_mb=512).workers == 1
+    assert plan("flask", cpus=64, memory_mb=1024).workers == 4
+    monkeypatch.setenv("WEB_CONCURRENCY", "7")
+    assert plan("flask", cpus=64, memory_mb=1024).workers == 7
+
+
+def test_an_asgi_app_under_gunicorn_is_called_out(monkeypatch):
+    import sys
+
+    from lib import serve
+
+    monkeypatch.delenv(serve.SERVER_PLAN_ENV, raising=False)
+    monkeypatch.setitem(sys.modules, "gunicorn", sys.modules.get("gunicorn", sys))
+    for name in ("uvicorn", "hypercorn"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    assert "gunicorn" in serve.server_mismatch("fastapi")
+    assert serve.server_mismatch("flask") is None
+
+
+def test_api_backend_reports_the_server_plan(client, monkeypatch):
+    from dataclasses import asdict
+
+    from conftest import backend
+    from lib import serve
+
+    chosen = asdict(serve.plan(backend(), cpus=1, memory_mb=1024))
+    monkeypatch.setenv(serve.SERVER_PLAN_ENV, json.dumps(chosen))
+    payload = json.loads(client.get("/api/backend").text)
+    assert payload["name"] == backend()
+    assert payload["server"] == chosen
+
+    # A hand-set or truncated plan is dropped, never a 500.
+    monkeypatch.setenv(serve.SERVER_PLAN_ENV, json.dumps({"workers": 3}))
+    response = client.get("/api/backend")
+    assert response.ok and json.loads(response.text)["server"] is None
@@ -145,6 +145,42 @@ def test_own_persist_does_not_bounce_back(clean_store):
     assert page_visibility.tier_override("/cb-canary") == "public"
 
 
+def test_the_watcher_pushes_a_foreign_write_without_a_stat_on_read(
+        clean_store, monkeypatch):
+    """inotify mode: a toggle lands as soon as the write closes, and a read
+    never touches the filesystem."""
+    if not hasattr(os, "register_at_fork") or os.uname().sysname != "Linux":
+        pytest.skip("inotify is Linux-only")
+    monkeypatch.setenv("PAGE_VISIBILITY_WATCH", "1")
+    monkeypatch.setattr(page_visibility, "_watch_tried", False)
+    # Back to polling afterwards, for every test that follows.
+    monkeypatch.setattr(page_visibility, "_watching", False)
+    page_visibility.tier_override("/cb-canary")  # the first read arms it
+    assert page_visibility._watching
+
+    before = page_visibility.version()
+    _foreign_write({"/cb-canary": {"visibility": "hidden"}})
+    deadline = time.monotonic() + 5
+    while page_visibility.version() == before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert page_visibility.version() != before, "the watcher missed the write"
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("a read stat the store")
+
+    monkeypatch.setattr(page_visibility, "_reload_if_changed", no_stat)
+    monkeypatch.setattr(page_visibility, "_next_stat_at", 0.0)
+    assert page_visibility.tier_override("/cb-canary") == "hidden"
+
+
+def test_a_reload_of_unchanged_content_keeps_the_version(clean_store):
+    page_visibility.set_visibility("/cb-canary", "public")
+    before = page_visibility.version()
+    _foreign_write(dict(page_visibility._overrides))
+    page_visibility._next_stat_at = 0.0
+    assert page_visibility.version() == before, "derived caches flushed for nothing"
+
+
 # ---------------------------------------------------------------------------
 # Loud persistence
 # ---------------------------------------------------------------------------
@@ -124,3 +124,145 @@ def _walk(node):
     children = getattr(node, "children", None)
     if children is not None:
         yield from _walk(children)
+
+
+def test_source_files_are_read_once_and_reread_on_change(tmp_path):
+    """Both `.. source::` consumers share one cached read per file.
+
+    The code tabs and the llms.txt expansion used to open the file separately
+    on every page that referenced it; an edit must still land, so the cache
+    keys on mtime rather than on the name alone.
+    """
+    import os
+
+    from lib.directives import source
+
+    target = tmp_path / "example.py"
+    target.write_text("x = 1\n")
+    first = source.read_source(str(target))
+    assert source.read_source(str(target)) is first
+    assert first.language == "python"
+
+    target.write_text("x = 22\n")
+    stamp = os.stat(target).st_mtime_ns + 1_000_000
+    os.utime(target, ns=(stamp, stamp))  # guarantee the mtime actually moves
+    changed = source.read_source(str(target))
+    assert changed.text == "x = 22\n"
+    assert changed.digest != first.digest
+
+
+def test_a_crlf_source_reads_with_plain_newlines(tmp_path, app_module):
+    from lib.directives import source
+
+    target = tmp_path / "windows.py"
+    target.write_bytes(b"x = 1\r\ny = 2\r\n# old mac\rz = 3\r\n")
+    text = source.read_source(str(target)).text
+    assert text == "x = 1\ny = 2\n# old mac\nz = 3\n"
+    expanded = sys.modules["pages.markdown"]._expand_source_directives(
+        f".. source::{target}\n")
+    assert "\r" not in expanded and "y = 2\n# old mac" in expanded
+
+
+def test_code_tabs_and_llms_txt_agree_on_the_language(app_module):
+    """One table: the fence language in /<page>/llms.txt is the tab language."""
+    from lib.directives.source import SC, language_for
+
+    expand = sys.modules["pages.markdown"]._expand_source_directives
+    for name in ("lib/proxy.py", "assets/main.css", "docs/example/example.md"):
+        tabs = SC().render(None, name, "")
+        assert tabs.code[0]["language"] == language_for(name)
+        assert f"```{language_for(name)}\n# File: {name}" in expand(
+            f".. source::{name}\n"
+        )
+
+
+@pytest.fixture
+def fresh_kwargs_cache(tmp_path, monkeypatch):
+    """The props-table cache as a cold boot sees it, persisted under tmp."""
+    from lib.directives import kwargs
+
+    monkeypatch.setenv("KWARGS_CACHE_FILE", str(tmp_path / "kwargs_props.json"))
+    monkeypatch.setattr(kwargs, "_TABLES", {})
+    monkeypatch.setattr(kwargs, "_loaded", False)
+    monkeypatch.setattr(kwargs, "_dirty", False)
+    return kwargs
+
+
+def test_props_tables_survive_a_restart_without_reparsing(fresh_kwargs_cache, monkeypatch):
+    kwargs = fresh_kwargs_cache
+    rows = kwargs.props_table("dash_mantine_components", "Button")
+    assert any(row["name"] == "children" for row in rows)
+    assert kwargs.props_table("dash_mantine_components", "Button") == rows
+    kwargs.save()
+    assert kwargs.cache_path().exists()
+
+    # The next boot: empty memory, and any parse would be a failure.
+    monkeypatch.setattr(kwargs, "_TABLES", {})
+    monkeypatch.setattr(kwargs, "_loaded", False)
+
+    def must_not_parse(package, component_name):
+        raise AssertionError(f"re-parsed {package}.{component_name}")
+
+    monkeypatch.setattr(kwargs, "_extract", must_not_parse)
+    assert kwargs.props_table("dash_mantine_components", "Button") == rows
+
+
+def test_a_package_upgrade_or_parser_edit_invalidates_the_table(fresh_kwargs_cache, monkeypatch):
+    kwargs = fresh_kwargs_cache
+    kwargs.props_table("dash_mantine_components", "Button")
+    kwargs.save()
+    monkeypatch.setattr(kwargs, "_TABLES", {})
+    monkeypatch.setattr(kwargs, "_loaded", False)
+    monkeypatch.setattr(kwargs, "_PARSER_DIGEST", "edited")
+
+    calls = []
+    monkeypatch.setattr(kwargs, "_extract", lambda *spec: calls.append(spec) or [])
+    kwargs.props_table("dash_mantine_components", "Button")
+    assert calls == [("dash_mantine_components", "Button")]
+
+
+def test_a_package_version_bump_invalidates_the_persisted_table(
+        fresh_kwargs_cache, monkeypatch):
+    kwargs = fresh_kwargs_cache
+    kwargs.props_table("dash_mantine_components", "Button")
+    kwargs.save()
+    monkeypatch.setattr(kwargs, "_TABLES", {})
+    monkeypatch.setattr(kwargs, "_loaded", False)
+    monkeypatch.setitem(kwargs._VERSIONS, "dash_mantine_components", "999.0.0")
+
+    calls = []
+    monkeypatch.setattr(kwargs, "_extract", lambda *spec: calls.append(spec) or [])
+    kwargs.props_table("dash_mantine_components", "Button")
+    assert calls == [("dash_mantine_components", "Button")]
+
+
+def test_a_page_editing_its_props_rows_leaves_other_pages_alone(fresh_kwargs_cache):
+    kwargs = fresh_kwargs_cache
+    mine = kwargs.props_table("dash_mantine_components", "Button")
+    mine[0]["description"] = "edited by one page"
+    mine.pop()
+    theirs = kwargs.props_table("dash_mantine_components", "Button")
+    assert theirs[0]["description"] != "edited by one page"
+    assert len(theirs) == len(mine) + 1
+
+
+def test_the_props_cache_defaults_outside_the_checkout(monkeypatch, tmp_path):
+    from lib.directives import kwargs
+
+    monkeypatch.delenv("KWARGS_CACHE_FILE")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert kwargs.cache_path().is_relative_to(tmp_path)
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    assert not kwargs.cache_path().resolve().is_relative_to(REPO_ROOT.resolve())
+
+
+def test_warm_up_resolves_every_referenced_component_once(fresh_kwargs_cache, monkeypatch):
+    kwargs = fresh_kwargs_cache
+    calls = []
+    real = kwargs._extract
+    monkeypatch.setattr(kwargs, "_extract", lambda *spec: calls.append(spec) or real(*spec))
+
+    count = kwargs.warm_up(DOCS)
+    assert ("dash_mantine_components", "Button") in calls
+    assert len(calls) == len(set(calls)) == count
+    assert kwargs.cache_path().exists()
@@ -31,6 +31,14 @@ def _ids(component, found=None):
 CONTENT = "the real page content"
 
 
+@pytest.fixture(autouse=True)
+def fresh_cards():
+    """Cards are cached per process; each test builds its own."""
+    gate_layouts.clear_cache()
+    yield
+    gate_layouts.clear_cache()
+
+
 @pytest.fixture
 def wrapped(app_module):
     return gate_layouts.gated_layout("/some-page", "Some Page", CONTENT)
@@ -101,5 +109,38 @@ def test_the_gate_card_names_the_sign_in_destination(app_module, monkeypatch):
     (bulletin first, env second), falling back to the network primary."""
     monkeypatch.setattr(access, "sign_in_url", lambda: "https://example.test/in")
     assert "https://example.test/in" in str(gate_layouts.sign_in_layout("P"))
+    gate_layouts.clear_cache()
     monkeypatch.setattr(access, "sign_in_url", lambda: None)
     assert "https://2plot.ai" in str(gate_layouts.sign_in_layout("P"))
+
+
+def test_each_card_is_built_once_per_page_and_verdict(wrapped, monkeypatch):
+    built = []
+    real = gate_layouts._build_sign_in
+    monkeypatch.setattr(gate_layouts, "_build_sign_in",
+                        lambda *args: built.append(args) or real(*args))
+    monkeypatch.setattr(access, "resolve_page_access", lambda p: "sign_in")
+    assert wrapped() is wrapped() is gate_layouts.sign_in_layout("Some Page", "/some-page")
+    assert len(built) == 1
+
+    other = gate_layouts.sign_in_layout("Other Page", "/other-page")
+    assert other is not wrapped() and len(built) == 2
+    assert gate_layouts.hidden_layout() is gate_layouts.hidden_layout()
+    assert gate_layouts.forbidden_layout("P") is not gate_layouts.forbidden_layout("Q")
+
+
+def test_the_destination_is_resolved_again_only_for_a_new_bulletin(app_module, monkeypatch):
+    """A network-wide sign-in move rides a bulletin refresh; between refreshes
+    the destination is not looked up at all."""
+    bulletin = {"network": {"sign_in_url": "https://first.test/in"}}
+    lookups = []
+    monkeypatch.setattr(gate_layouts, "_bulletin", lambda: bulletin)
+    monkeypatch.setattr(access, "sign_in_url", lambda: lookups.append(1) or
+                        bulletin["network"]["sign_in_url"])
+
+    first = gate_layouts.sign_in_layout("P")
+    assert gate_layouts.sign_in_layout("P") is first and len(lookups) == 1
+
+    bulletin = {"network": {"sign_in_url": "https://moved.test/in"}}
+    moved = gate_layouts.sign_in_layout("P")
+    assert "https://moved.test/in" in str(moved) and len(lookups) == 2
@@ -164,6 +164,142 @@ def test_real_traffic_is_still_counted(client):
     assert after["bot_hits"] == before["bot_hits"] + 1
 
 
+def test_the_asgi_tracker_reads_the_scope_and_skips_assets(monkeypatch):
+    """FastAPI and Quart track through a raw ASGI middleware; driven directly
+    so it is covered on whichever backend the suite happens to boot.
+
+    An asset or Dash-internal request must cost a path scan and nothing more:
+    no header is decoded and the tracker is never called.
+    """
+    import asyncio
+
+    from lib.analytics_tracker import async_front
+    from lib.asgi_middleware import EdgeMiddleware
+
+    hits = []
+    monkeypatch.setattr(async_front, "submit",
+                        lambda *args, **kwargs: hits.append((args, kwargs)))
+
+    class Untouchable(list):
+        def __iter__(self):
+            raise AssertionError("headers were read for a skipped path")
+
+    served = []
+
+    async def inner(scope, receive, send):
+        served.append(scope["path"])
+
+    middleware = EdgeMiddleware(inner)
+
+    def call(path, headers):
+        scope = {"type": "http", "path": path, "headers": headers,
+                 "client": ("10.0.0.9", 4242)}
+        asyncio.run(middleware(scope, None, None))
+
+    for skipped in ("/healthz", "/_dash-component-suites/dash/dash-renderer.js",
+                    "/_dash-update-component", "/assets/style.css", "//evil"):
+        call(skipped, Untouchable())
+    assert hits == []
+
+    call(PAGE, [(b"user-agent", BROWSER_UA.encode()),
+                (b"x-forwarded-for", b"203.0.113.7, 10.0.0.1"),
+                (b"x-forwarded-for", b"198.51.100.1"),
+                (b"cf-ipcountry", b"NZ"),
+                (b"cookie", b"__session=secret")])
+    (args, kwargs), = hits
+    assert args == (PAGE, BROWSER_UA, "10.0.0.9")
+    assert kwargs["headers"] == {"user-agent": BROWSER_UA,
+                                 "x-forwarded-for": "203.0.113.7, 10.0.0.1",
+                                 "cf-ipcountry": "NZ"}
+    assert len(served) == 6, "a request was held back by analytics"
+
+
+def test_the_flask_tracker_reads_the_environ_not_a_request(monkeypatch):
+    """Flask tracks from a wsgi_app wrapper: each header it needs is one
+    environ lookup, and a skipped path never looks at the headers."""
+    from lib import wsgi_middleware
+
+    hits = []
+    monkeypatch.setattr(tracker, "track_visit",
+                        lambda *args, **kwargs: hits.append((args, kwargs)))
+
+    class Untouchable(dict):
+        def get(self, key, default=None):
+            if key.startswith("HTTP_"):
+                raise AssertionError(f"{key} read for a skipped path")
+            return super().get(key, default)
+
+    edge = wsgi_middleware.wsgi_edge(lambda environ, start_response: [b"ok"])
+    assert edge(Untouchable(PATH_INFO="/assets/app.css"), None) == [b"ok"]
+    assert hits == []
+
+    edge({"PATH_INFO": "/caf\xc3\xa9", "REMOTE_ADDR": "10.0.0.3",
+          "HTTP_USER_AGENT": BROWSER_UA, "HTTP_CF_IPCOUNTRY": "FR",
+          "HTTP_X_FORWARDED_FOR": "203.0.113.9", "HTTP_COOKIE": "__session=x"},
+         None)
+    (args, kwargs), = hits
+    assert args == ("/café", BROWSER_UA, "10.0.0.3")
+    assert kwargs["headers"] == {"user-agent": BROWSER_UA, "cf-ipcountry": "FR",
+                                 "x-forwarded-for": "203.0.113.9"}
+
+
+def test_flask_tracking_sits_outside_every_hook(app):
+    assert not any(getattr(f, "__name__", "") == "track_visitor"
+                   for f in app.server.before_request_funcs.get(None, []))
+
+
+class _SlowLedger:
+    """A tracker whose flush blocks until released, like an flock held by
+    another worker."""
+
+    def __init__(self):
+        import threading
+
+        self.rows, self.flushed, self.release = [], [], threading.Event()
+
+    def visit_record(self, path, user_agent, ip_address=None, headers=None):
+        return {"path": path}
+
+    def buffer_hit(self, row):
+        self.rows.append(row)
+        return True                       # every hit asks for a flush
+
+    def flush(self):
+        self.release.wait(5)
+        self.flushed.append(len(self.rows))
+
+
+def test_a_flush_never_stalls_the_event_loop():
+    import asyncio
+
+    from lib.analytics_tracker import AsyncTrackerFront
+
+    ledger = _SlowLedger()
+    front = AsyncTrackerFront(ledger, maxsize=4)
+
+    async def traffic():
+        for i in range(3):
+            assert front.submit(f"/p{i}", BROWSER_UA)
+            # The loop keeps turning while the first flush is parked.
+            await asyncio.sleep(0.01)
+        assert front.stats()["flushing"], "the flush ran on the loop"
+        assert front.stats()["coalesced"] == 2
+        # Nothing drains while this coroutine holds the loop: the queue fills
+        # and the overflow is dropped, not awaited.
+        results = [front.submit(f"/burst{i}", BROWSER_UA) for i in range(6)]
+        assert results == [True] * 4 + [False] * 2
+
+    asyncio.run(traffic())
+    ledger.release.set()
+
+    stats = front.stats()
+    assert stats["accepted"] == 7 and stats["dropped"] == 2
+    assert stats["max_depth"] == 4 and stats["flushes"] == 1
+    assert stats["depth"] == 0
+    # The shutdown drain buffered the burst for the atexit flush.
+    assert [r["path"] for r in ledger.rows][-4:] == [f"/burst{i}" for i in range(4)]
+
+
 # ----------------------------------------------------------------- outbound --
 
 
@@ -183,6 +319,23 @@ def _capture_headers(monkeypatch, module, attr="post"):
     return seen
 
 
+def test_a_forked_worker_does_not_replay_the_parents_buffer(monkeypatch):
+    """Under gunicorn preload every worker is a fork of the master: a copied
+    buffer would reach the ledger once per worker, and a copied geolocation
+    in-flight set would wait forever on threads the fork did not carry."""
+    from lib import analytics_tracker as at
+
+    for name in ("_buffer", "_buffer_lock", "_last_flush"):
+        monkeypatch.setattr(at.tracker, name, getattr(at.tracker, name))
+    for name in ("_lock", "_queues", "_executor", "_flushing", "_counts"):
+        monkeypatch.setattr(at.async_front, name, getattr(at.async_front, name))
+    monkeypatch.setattr(at, "_geo_inflight", {"203.0.113.9"})
+    monkeypatch.setattr(at, "_geo_lock", at._geo_lock)
+    monkeypatch.setattr(at.tracker, "_buffer", [{"path": "/from-the-master"}])
+    at._reset_after_fork()
+    assert at.tracker._buffer == [] and at._geo_inflight == set()
+
+
 def test_the_traffic_rollup_post_sends_the_token(monkeypatch):
     import requests
 
@@ -6,7 +6,9 @@ import re
 import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
 
-from conftest import BROWSER_ACCEPT, CRAWLER_UA
+import pytest
+
+from conftest import BROWSER_ACCEPT, CRAWLER_UA, backend
 from lib import network_directory as nd
 from lib.constants import BASE_URL
 
@@ -135,6 +137,142 @@ def test_healthz(client):
     assert "ok" in response.text.lower()
 
 
+def test_healthz_is_bytes_from_boot_answered_at_the_edge(client, monkeypatch):
+    """The hub reports probe latency as this app's speed: the body is
+    serialized once, and nothing behind the outermost layer runs for it."""
+    import json
+
+    from conftest import backend
+    from lib import health, request_timing
+
+    monkeypatch.setattr(request_timing, "record", lambda *a: (_ for _ in ()).throw(
+        AssertionError("/healthz reached the timing edge")))
+    response = client.get("/healthz")
+    assert response.text.encode() == health.health_body(backend())
+    assert json.loads(response.text)["ok"] is True
+    assert response.header("Cache-Control") == "no-store"
+
+
+def test_the_asgi_health_front_answers_get_and_head_only():
+    import asyncio
+
+    from lib.health import _AsgiHealth
+
+    passed = []
+
+    async def inner(scope, receive, send):
+        passed.append(scope["method"])
+
+    front = _AsgiHealth(inner, b'{"ok":true}')
+
+    def call(method, path="/healthz"):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(front({"type": "http", "method": method, "path": path},
+                          None, send))
+        return sent
+
+    got = call("GET")
+    assert got[0]["status"] == 200 and got[1]["body"] == b'{"ok":true}'
+    assert (b"content-length", b"11") in got[0]["headers"]
+    assert call("HEAD")[1]["body"] == b""
+    assert call("POST") == [] and call("GET", "/healthz/x") == []
+    assert passed == ["POST", "GET"]
+
+
+def test_readyz_warms_dash_itself_then_stays_ready(monkeypatch):
+    """503 while a check fails; the first probe that finds Dash cold pays the
+    first-request setup itself, with an internal GET /; then 200 for good.
+    The warm-up is timed under no series: it is boot, not a page view."""
+    from lib import health, request_timing
+    from lib.wsgi_middleware import wsgi_edge
+
+    monkeypatch.setattr(health, "_ready", False)
+    monkeypatch.setattr(request_timing, "_STATS", {})
+    monkeypatch.setattr(health, "_CHECKS", {})
+    docs = {"done": False}
+    health.add_readiness_check("llms-docs", lambda: docs["done"])
+
+    class FakeDash:
+        _got_first_request = {"pages": False, "setup_server": False}
+
+    dash_app, seen = FakeDash(), []
+
+    def inner(environ, start_response):
+        seen.append((environ["PATH_INFO"], environ["HTTP_USER_AGENT"]))
+        dash_app._got_first_request["setup_server"] = True
+        start_response("200 OK", [])
+        return [b"<html>"]
+
+    health.add_readiness_check("dash", lambda: health._dash_is_warm(dash_app))
+    front = health._wsgi_health(wsgi_edge(inner), b"{}", dash_app)
+
+    def probe():
+        status = []
+        body = b"".join(front({"PATH_INFO": "/readyz", "REQUEST_METHOD": "GET",
+                               "HTTP_USER_AGENT": "kube-probe/1.29"},
+                              lambda s, h: status.append(s)))
+        return status[0], body
+
+    status, body = probe()
+    assert status.startswith("503") and b'"waiting":["llms-docs"]' in body
+    assert len(seen) == 1 and seen[0][0] == "/" and "2plot-internal" in seen[0][1]
+    assert request_timing.snapshot() == {}
+    docs["done"] = True
+    assert probe() == ("200 OK", b'{"ready":true}')
+    docs["done"] = False                  # latched: not re-checked
+    assert probe()[0] == "200 OK" and len(seen) == 1
+
+
+def test_healthz_detail_is_for_internal_callers_only(client):
+    import json
+
+    from conftest import backend
+    from lib import health
+    from lib.constants import INTERNAL_UA
+
+    plain = client.get("/healthz?detail=1")
+    assert plain.text.encode() == health.health_body(backend())
+    detail = json.loads(client.get("/healthz?detail=1",
+                                   headers={"User-Agent": INTERNAL_UA}).text)
+    assert detail["ok"] is True and "ready" in detail
+    assert {"latency", "analytics_queue"} <= detail.keys()
+
+
+@pytest.mark.skipif(backend() != "fastapi", reason="the showcase API is FastAPI's")
+def test_api_pages_pages_filters_and_revalidates(client):
+    import json
+
+    full = client.get("/api/pages")
+    etag = full.header("ETag")
+    listing = json.loads(full.text)
+    assert etag and listing["count"] == listing["total"] == len(listing["pages"])
+    assert [p["path"] for p in listing["pages"]] == sorted(
+        p["path"] for p in listing["pages"])
+    assert client.get("/api/pages", headers={"If-None-Match": etag}).status == 304
+
+    page = json.loads(client.get("/api/pages?limit=2&offset=1").text)
+    assert page["pages"] == listing["pages"][1:3] and page["total"] == listing["total"]
+    assert json.loads(client.get("/api/pages?category=nope").text)["total"] == 0
+
+
+def test_timing_percentiles_come_from_the_buckets(monkeypatch):
+    from lib import request_timing
+
+    monkeypatch.setattr(request_timing, "_STATS", {})
+    for _ in range(90):
+        request_timing.record("hub", 0.002)
+    for _ in range(10):
+        request_timing.record("hub", 0.3)
+    row = request_timing.snapshot()["hub"]
+    assert row["count"] == 100 and row["max_ms"] == 300.0
+    # Upper bound of the rank's bucket, capped at the observed max.
+    assert (row["p50_ms"], row["p90_ms"], row["p99_ms"]) == (2.5, 2.5, 300.0)
+
+
 # ---------------------------------------------------------------------------
 # Content negotiation on /<page>/llms.txt (dash-improve-my-llms 2.2.0)
 #
@@ -0,0 +1,188 @@
+"""Pre-serialized page navigation — `lib/page_snapshots.py`.
+
+The promise is narrow and byte-exact: with `PAGE_SNAPSHOTS=1`, a navigation
+the snapshot front answers is indistinguishable from the one Dash would have
+sent, and every navigation it must not answer (a page whose verdict depends
+on the visitor, a hidden page) still reaches `gated_layout`. Both directions
+are asserted through the real app, as the renderer sends them.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from lib import access, gate_layouts, page_snapshots, page_tiers
+
+ROUTER_OUTPUT = ".._pages_content.children..._pages_store.data.."
+
+
+def navigation(pathname: str) -> bytes:
+    """The body dash-renderer POSTs when the location changes."""
+    return json.dumps({
+        "output": ROUTER_OUTPUT,
+        "outputs": [{"id": "_pages_content", "property": "children"},
+                    {"id": "_pages_store", "property": "data"}],
+        "inputs": [{"id": "_pages_location", "property": "pathname", "value": pathname},
+                   {"id": "_pages_location", "property": "search", "value": ""}],
+        "changedPropIds": ["_pages_location.pathname"],
+    }).encode()
+
+
+@pytest.fixture
+def snapshots_on(client, monkeypatch):
+    # Dash registers its router callback on the first request it serves.
+    client.get("/")
+    monkeypatch.setenv("PAGE_SNAPSHOTS", "1")
+    page_snapshots.clear_cache()
+    yield
+    page_snapshots.clear_cache()
+
+
+def test_snapshot_navigation_is_byte_identical_to_dash(client, monkeypatch):
+    client.get("/")
+    monkeypatch.delenv("PAGE_SNAPSHOTS", raising=False)
+    from_dash = client.post("/_dash-update-component", navigation("/backends"))
+    assert from_dash.ok and "etag" not in from_dash.headers
+
+    monkeypatch.setenv("PAGE_SNAPSHOTS", "1")
+    from_snapshot = client.post("/_dash-update-component", navigation("/backends"))
+    assert from_snapshot.ok
+    assert from_snapshot.header("ETag")
+    assert from_snapshot.text == from_dash.text
+
+
+def test_a_snapshot_answer_never_calls_the_layout(client, snapshots_on, monkeypatch):
+    def must_not_run(path):
+        raise AssertionError("gated_layout ran for a snapshot navigation")
+
+    monkeypatch.setattr(access, "resolve_page_access", must_not_run)
+    r = client.post("/_dash-update-component", navigation("/backends"))
+    assert r.ok and "Pluggable Backends" in r.text
+
+
+def test_a_hidden_page_gets_the_cached_card_dash_would_send(client, snapshots_on, monkeypatch):
+    monkeypatch.setitem(page_tiers._LOCAL_TIERS, "/backends", "hidden")
+    cached = client.post("/_dash-update-component", navigation("/backends"))
+    assert cached.header("ETag") and "Page not available" in cached.text
+
+    monkeypatch.delenv("PAGE_SNAPSHOTS")
+    assert client.post("/_dash-update-component", navigation("/backends")).text == cached.text
+
+
+def test_only_a_credential_less_request_gets_the_cached_sign_in_card(
+        client, snapshots_on, monkeypatch):
+    from lib import auth
+
+    monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
+    monkeypatch.setitem(page_tiers._LOCAL_TIERS, "/backends", "auth")
+
+    anonymous = client.post("/_dash-update-component", navigation("/backends"))
+    assert anonymous.header("ETag")
+
+    # A bearer token might be a signed-in user: identity is Dash's call.
+    signed = client.post("/_dash-update-component", navigation("/backends"),
+                         headers={"Authorization": "Bearer eyJ"})
+    assert "etag" not in signed.headers
+    # ...and with no user behind it, Dash renders the very same card.
+    assert signed.text == anonymous.text
+    assert "Authentication required" in anonymous.text
+
+
+def test_the_cached_sign_in_card_follows_a_new_destination(client, snapshots_on, monkeypatch):
+    from lib import auth
+
+    monkeypatch.setattr(auth, "clerk_enabled", lambda: True)
+    monkeypatch.setitem(page_tiers._LOCAL_TIERS, "/backends", "auth")
+    monkeypatch.setattr(gate_layouts, "_bulletin", lambda: "first bulletin")
+    monkeypatch.setattr(access, "sign_in_url", lambda: "https://one.example/sign-in")
+    first = client.post("/_dash-update-component", navigation("/backends"))
+    assert "one.example" in first.text
+
+    # A refreshed bulletin is another object; the destination is resolved again.
+    monkeypatch.setattr(access, "sign_in_url", lambda: "https://two.example/sign-in")
+    monkeypatch.setattr(gate_layouts, "_bulletin", lambda: "second bulletin")
+    second = client.post("/_dash-update-component", navigation("/backends"))
+    assert "two.example" in second.text and "one.example" not in second.text
+    assert second.header("ETag") != first.header("ETag")
+    assert sum(k[:2] == ("backends", "sign_in") for k in page_snapshots._SNAPSHOTS) == 1
+
+
+def test_navigation_payloads_are_precompressed(client, snapshots_on):
+    import gzip
+
+    plain = client.post("/_dash-update-component", navigation("/backends"))
+    packed = page_snapshots.snapshot("/backends").navigation
+    assert gzip.decompress(packed.bodies["gzip"]).decode() == plain.text
+    assert len(packed.bodies["gzip"]) < len(packed.bodies["identity"]) / 3
+    assert packed.etags["gzip"] != packed.etags["identity"]
+
+    negotiated = client.post("/_dash-update-component", navigation("/backends"),
+                             headers={"Accept-Encoding": "gzip, deflate"})
+    assert negotiated.header("Content-Encoding") == "gzip"
+    assert negotiated.header("ETag") == packed.etags["gzip"]
+    assert "Accept-Encoding" in negotiated.header("Vary")
+
+
+def test_snapshot_route_serves_json_and_html_with_conditional_get(client, snapshots_on):
+    as_json = client.get("/_dash-page-snapshot?path=/backends")
+    assert as_json.ok and as_json.content_type.startswith("application/json")
+    assert json.loads(as_json.text)["props"]["id"] == "m2d-page-backends"
+
+    as_html = client.get("/_dash-page-snapshot?path=/backends&format=html")
+    assert as_html.content_type.startswith("text/html")
+    assert "<h2" in as_html.text and "Pluggable Backends" in as_html.text
+    assert as_html.header("ETag") != as_json.header("ETag")
+
+    again = client.get("/_dash-page-snapshot?path=/backends&format=html",
+                       headers={"If-None-Match": as_html.header("ETag")})
+    assert again.status == 304 and again.text == ""
+    assert again.header("ETag") == as_html.header("ETag")
+
+    assert client.get("/_dash-page-snapshot?path=/no-such-page").status == 404
+    assert client.get("/_dash-page-snapshot?path=/backends&format=xml").status == 400
+
+
+def test_snapshots_are_off_by_default(client, monkeypatch):
+    monkeypatch.delenv("PAGE_SNAPSHOTS", raising=False)
+    assert client.get("/_dash-page-snapshot?path=/backends").status == 404
+
+
+def test_asgi_front_answers_or_replays_the_body_untouched(app_module, monkeypatch):
+    """FastAPI and Quart share this adapter; driven directly so it is covered
+    on whichever backend the suite happens to boot."""
+    import asyncio
+
+    monkeypatch.setenv("PAGE_SNAPSHOTS", "1")
+    seen = []
+
+    async def inner(scope, receive, send):
+        message = await receive()
+        seen.append(message["body"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"from dash"})
+
+    front = page_snapshots._asgi_snapshots(inner, "/")
+
+    def post(body: bytes):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/_dash-update-component",
+                 "headers": [(b"content-length", str(len(body)).encode())]}
+        asyncio.run(front(scope, receive, send))
+        return sent
+
+    answered = post(navigation("/backends"))
+    assert answered[0]["status"] == 200 and not seen
+    assert b"Pluggable Backends" in answered[1]["body"]
+
+    other = json.dumps({"output": "some-other.children", "inputs": []}).encode()
+    passed = post(other)
+    assert seen == [other] and passed[1]["body"] == b"from dash"
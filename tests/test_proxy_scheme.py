@@ -97,6 +97,70 @@ def test_it_is_on_by_default(monkeypatch):
     assert proxy.enabled() is True
 
 
+class _CountedHeaders(list):
+    """A raw ASGI header list that counts how often it is walked."""
+
+    walks = 0
+
+    def __iter__(self):
+        type(self).walks += 1
+        return super().__iter__()
+
+
+def _asgi_call(middleware_factory, path, headers):
+    import asyncio
+
+    seen = {}
+
+    async def inner(scope, receive, send):
+        seen["scheme"] = scope["scheme"]
+
+    _CountedHeaders.walks = 0
+    scope = {"type": "http", "scheme": "http", "path": path,
+             "headers": _CountedHeaders(headers), "client": ("10.0.0.2", 1)}
+    asyncio.run(middleware_factory(inner)(scope, None, None))
+    return seen["scheme"], _CountedHeaders.walks
+
+
+def test_the_asgi_fix_reads_the_first_forwarded_header():
+    scheme, _ = _asgi_call(proxy._asgi_proxy_fix, "/",
+                           [(b"x-forwarded-proto", b"https"),
+                            (b"x-forwarded-proto", b"http")])
+    assert scheme == "https"
+    assert _asgi_call(proxy._asgi_proxy_fix, "/",
+                      [(b"x-forwarded-ssl", b"on")])[0] == "https"
+    assert _asgi_call(proxy._asgi_proxy_fix, "/", [])[0] == "http"
+
+
+def test_the_edge_middleware_scans_headers_once(monkeypatch):
+    """FastAPI and Quart fuse the scheme fix with analytics and timing: one
+    walk over the raw headers serves both, on a tracked page."""
+    from lib import asgi_middleware, request_timing
+
+    hits = []
+    monkeypatch.setattr(asgi_middleware.async_front, "submit",
+                        lambda *args, **kwargs: hits.append(kwargs["headers"]))
+    request_timing.clear()
+
+    def edge(app):
+        return asgi_middleware.EdgeMiddleware(app, fix_scheme=True)
+
+    scheme, walks = _asgi_call(edge, "/backends",
+                               [(b"x-forwarded-proto", b"https"),
+                                (b"user-agent", b"Mozilla/5.0"),
+                                (b"cf-ipcountry", b"DE")])
+    assert (scheme, walks) == ("https", 1)
+    assert hits == [{"user-agent": "Mozilla/5.0", "cf-ipcountry": "DE"}]
+
+    # An asset still gets its scheme, and is neither tracked nor re-scanned.
+    scheme, walks = _asgi_call(edge, "/assets/app.css",
+                               [(b"x-forwarded-proto", b"https")])
+    assert (scheme, walks) == ("https", 1) and len(hits) == 1
+
+    timed = request_timing.snapshot()
+    assert timed["page"]["count"] == 1 and timed["asset"]["count"] == 1
+
+
 # --------------------------------------------------------------- the wiring --
 
 
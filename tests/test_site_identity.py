@@ -282,3 +282,33 @@ def test_code_examples_keep_the_placeholder_syntax_verbatim():
     assert substitute_versions(fenced) == fenced
     inline = "write `{{VERSION:dash}}` in prose"
     assert substitute_versions(inline) == inline
+
+
+def test_a_code_span_never_reaches_across_a_fence():
+    """The scanner is one pass over the whole document, so the paragraph
+    boundary a fence makes has to be part of the span rule itself."""
+    from importlib.metadata import version
+
+    from lib.versions import substitute_versions
+
+    text = "a `b\n```\n{{VERSION:dash}}\n```\n` {{VERSION:dash}}\n"
+    assert substitute_versions(text) == (
+        f"a `b\n```\n{{{{VERSION:dash}}}}\n```\n` {version('dash')}\n"
+    )
+    # An unmatched backtick is literal text, not the start of a code block.
+    assert substitute_versions("`` {{VERSION:dash}}") == f"`` {version('dash')}"
+
+
+def test_each_distribution_is_looked_up_once(monkeypatch):
+    from lib import versions
+
+    versions.installed_version.cache_clear()
+    calls = []
+    monkeypatch.setattr(versions, "version", lambda dist: calls.append(dist) or "9.9")
+    try:
+        text = "{{VERSION:dash}} and {{VERSION:dash}}, {{DIMLL_VERSION}}"
+        assert versions.substitute_versions(text) == "9.9 and 9.9, 9.9"
+        versions.substitute_versions(text)
+        assert sorted(calls) == ["dash", "dash-improve-my-llms"]
+    finally:
+        versions.installed_version.cache_clear()
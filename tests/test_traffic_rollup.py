@@ -28,6 +28,8 @@ from datetime import date
 
 import pytest
 
+from lib import path_kinds
+from lib.analytics_tracker import is_tracked_path
 from lib.traffic_rollup import (
     daily_rollup,
     is_agent_surface,
@@ -101,6 +103,42 @@ def test_every_agent_surface_is_skipped_by_load_visits(tmp_path):
         )
 
 
+@pytest.mark.parametrize("path, kind", [
+    ("/", "page"),
+    ("/backends", "page"),
+    ("/docs/health-checks", "page"),          # '/health' as a substring
+    ("/robots-and-agents", "page"),
+    ("/backends/page.json", "agent-surface"),  # '.js' as a substring
+    ("/llms-full.txt", "agent-surface"),
+    ("/sitemap.xml", "agent-surface"),
+    ("/openapi.json", "asset"),
+    ("/assets/style.css", "asset"),
+    ("/favicon.ico", "asset"),
+    ("/_dash-component-suites/dash/dash.min.js", "dash-internal"),
+    ("/app/_dash-update-component", "dash-internal"),
+    ("/_reload-hash", "dash-internal"),
+    ("/healthz", "health"),
+    ("/readyz", "health"),
+    ("/api/backend", "api"),                  # monitoring curls, not readers
+    ("/api/pages", "api"),
+    ("//evil.example", "junk"),
+    ("/a/[]", "junk"),
+    ("", "junk"),
+])
+def test_one_classifier_labels_every_path(path, kind):
+    assert path_kinds.classify(path) == kind
+
+
+@pytest.mark.parametrize("path", MACHINE_SURFACES + PAGE_SURFACES + [
+    "/healthz", "/assets/x.css", "/_dash-layout", "/openapi.json"])
+def test_write_time_and_read_time_agree(tmp_path, path):
+    """A hit the tracker writes is read back as exactly one of a visit or a
+    machine-surface row; a hit it drops would have been read as neither."""
+    ledger = _ledger(tmp_path, [_visit(path, **BOT)])
+    read = len(load_visits(ledger)) + len(load_agent_hits(ledger))
+    assert read == (1 if is_tracked_path(path) else 0)
+
+
 # ---------------------------------------------------------------------------
 # The 402 board's signal: machine-only days, per-row bot splits
 # ---------------------------------------------------------------------------